@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+複数アカウントのマニフェスト（accounts.json）
+
+1プロセスで複数の Threads アカウントを回すための設定。認証情報そのものは書かず、
+読み込む環境変数名を書く（.env / Actions の secrets に置く）。
+
+形式:
+  {
+    "accounts": [
+      {"name": "main", "access_token_env": "THREADS_ACCESS_TOKEN",
+       "user_id_env": "THREADS_USER_ID", "csv": "data/posts_schedule.csv"},
+      {"name": "sub", "access_token_env": "SUB_ACCESS_TOKEN",
+       "user_id_env": "SUB_USER_ID", "csv": "data/sub_schedule.csv"}
+    ]
+  }
+
+場所: THREADS_ACCOUNTS_FILE（未設定なら ./accounts.json）
+"""
+
+import json
+import os
+from pathlib import Path
+
+
+def accounts_file() -> Path:
+    return Path(os.getenv('THREADS_ACCOUNTS_FILE') or 'accounts.json')
+
+
+def load_accounts(path=None):
+    """マニフェストを読み込み、環境変数から認証情報を解決したアカウントのリストを返す
+
+    認証情報やCSVが欠けているアカウントは ValueError（起動時に気付けるように）。
+    """
+    path = Path(path) if path else accounts_file()
+    if not path.exists():
+        raise FileNotFoundError(f"アカウント設定が見つかりません: {path}")
+
+    with open(path, 'r', encoding='utf-8') as f:
+        manifest = json.load(f)
+
+    accounts = []
+    names = set()
+    for entry in manifest.get('accounts', []):
+        name = entry.get('name')
+        if not name or name in names:
+            raise ValueError(f"アカウント名が空または重複しています: {name!r}")
+        names.add(name)
+
+        access_token = os.getenv(entry.get('access_token_env', ''))
+        user_id = os.getenv(entry.get('user_id_env', ''))
+        if not access_token or not user_id:
+            raise ValueError(f"[{name}] 認証情報の環境変数が未設定です: "
+                             f"{entry.get('access_token_env')}, {entry.get('user_id_env')}")
+
+        csv_path = entry.get('csv')
+        if not csv_path or not Path(csv_path).exists():
+            raise ValueError(f"[{name}] CSVファイルが見つかりません: {csv_path}")
+
+        accounts.append({
+            'name': name,
+            'access_token': access_token,
+            'user_id': user_id,
+            'csv': csv_path,
+        })
+    return accounts
@@ -12,6 +12,8 @@ Notes:
   - Requires THREADS_ACCESS_TOKEN and THREADS_USER_ID in environment (.env ok).
   - Maps schedule rows to posted items by comparing the first 100 chars of `text`.
   - Fetches insights: views, likes, replies, reposts, quotes (where available for own posts).
+  - The post list is synced incrementally (all pages) into .state/timeline.sqlite.
+  - Insights are cached in .state/insights.sqlite; only posts due for a refresh hit the API.
 """
 
 import csv
@@ -22,45 +24,55 @@ from typing import Dict, Any
 import requests
 from dotenv import load_dotenv
 
+import graph_batch
+import insights_store
+import timeline_store
+
 load_dotenv(override=True)
 
-API_BASE_URL = 'https://graph.threads.net/v1.0'
 ACCESS_TOKEN = os.getenv('THREADS_ACCESS_TOKEN')
 USER_ID = os.getenv('THREADS_USER_ID')
 
 JST = timezone(timedelta(hours=9))
 
 
-def get_user_posts(limit=200):
-    url = f'{API_BASE_URL}/{USER_ID}/threads'
-    params = {
-        'fields': 'id,text,timestamp',
-        'limit': limit,
-        'access_token': ACCESS_TOKEN
-    }
-    r = requests.get(url, params=params)
-    r.raise_for_status()
-    return r.json().get('data', [])
+def get_user_posts():
+    """Full post history, newest first (synced incrementally into .state/timeline.sqlite)."""
+    timeline_store.sync('threads', USER_ID, ACCESS_TOKEN)
+    return timeline_store.recent('threads')
 
 
-def get_insights(thread_id: str) -> Dict[str, Any]:
-    url = f"{API_BASE_URL}/{thread_id}/insights"
+def fetch_insights(thread_ids) -> Dict[str, Any]:
+    """Fetch insights for many posts, coalesced into Graph batch requests (None when unavailable)."""
     params = {
         'metric': 'views,likes,replies,reposts,quotes',
         'access_token': ACCESS_TOKEN
     }
-    try:
-        r = requests.get(url, params=params)
-        r.raise_for_status()
-        data = r.json().get('data', [])
-        out = {}
+    responses = graph_batch.get_many([(f'{th_id}/insights', params) for th_id in thread_ids], ACCESS_TOKEN)
+    out = {}
+    for th_id, r in zip(thread_ids, responses):
+        out[th_id] = None
+        if isinstance(r, Exception):
+            continue
+        try:
+            r.raise_for_status()
+            data = r.json().get('data', [])
+        except (requests.exceptions.RequestException, ValueError):
+            continue
+        metrics = {}
         for item in data:
             name = item.get('name')
             values = item.get('values', [{}])
-            out[name] = values[0].get('value', 0)
-        return out
-    except requests.exceptions.RequestException:
-        return {}
+            metrics[name] = values[0].get('value', 0)
+        out[th_id] = metrics
+    return out
+
+
+def get_insights_many(posts) -> Dict[str, Dict[str, Any]]:
+    """Latest insights for the given posts, re-fetching only those due per insights_store."""
+    latest, fetched = insights_store.refresh(posts, fetch_insights)
+    print(f"Insights: fetched {fetched} from the API, {len(latest) - fetched} served from the local store")
+    return {th_id: metrics for th_id, metrics in latest.items() if metrics is not None}
 
 
 def parse_tags(tag_str: str) -> Dict[str, str]:
@@ -102,11 +114,18 @@ def main():
         day_counts[d] += 1
 
     # Build lookup for posted items by preview
-    posts = get_user_posts(limit=500)
+    posts = get_user_posts()
     preview_to_id = {}
+    posts_by_id = {}
     for p in posts:
         t = (p.get('text') or '').strip()
         preview_to_id[t[:100]] = p.get('id')
+        posts_by_id[p.get('id')] = p
+
+    # Fetch insights for every matched post up front (a handful of batch calls)
+    matched_ids = [preview_to_id[(r.get('text') or '').strip()[:100]] for r in rows
+                   if (r.get('text') or '').strip()[:100] in preview_to_id]
+    insights_by_id = get_insights_many([posts_by_id[th_id] for th_id in dict.fromkeys(matched_ids)])
 
     outpath = f"experiments_results_{start.strftime('%Y%m%d')}_{end.strftime('%Y%m%d')}.csv"
     with open(outpath, 'w', encoding='utf-8', newline='') as f:
@@ -122,7 +141,7 @@ def main():
             th_id = preview_to_id.get(preview)
             insights = {'views':0,'likes':0,'replies':0,'reposts':0,'quotes':0}
             if th_id:
-                insights.update(get_insights(th_id))
+                insights.update(insights_by_id.get(th_id, {}))
             views = max(1, int(insights.get('views') or 0))
             likes = int(insights.get('likes') or 0)
             replies = int(insights.get('replies') or 0)
@@ -153,6 +172,7 @@ def main():
             ])
 
     print(f"✅ Wrote {outpath}")
+    print(f"   Factor effects: python3 analyze_factors.py {outpath}")
 
 
 if __name__ == '__main__':
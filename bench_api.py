@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+"""
+API呼び出しのベンチマーク（stub_server.py の代役サーバーに対して、オフラインで計測）
+
+各スクリプトの代表的な処理を代役サーバーに向けて実行し、
+所要時間とHTTP呼び出し回数を表示する。呼び出し回数は予算（CALL_BUDGET）と比べ、
+超えていれば終了コード1（バッチ化・キャッシュ・ページ送りの退行を検出する）。
+
+使い方:
+  python3 bench_api.py                                  既定（遅延50ms）
+  python3 bench_api.py --latency-ms 120 --jitter-ms 60
+  python3 bench_api.py --error-rate 0.1 --rate-limit 100   エラー・制限ありの挙動を見る（予算は判定しない）
+
+状態ファイルは一時ディレクトリに作る（.state/ には触れない）。
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import time
+
+from stub_server import STUB_USER_ID, StubThreadsAPI, start_server
+
+TIMELINE_POSTS = 250
+INSIGHT_POSTS = 120
+DELETE_POSTS = 30
+NO_BATCH_POSTS = 10
+
+# シナリオごとのHTTP呼び出し回数の予算（エラー・レート制限なしのとき）
+CALL_BUDGET = {
+    f'タイムライン全件取得（{TIMELINE_POSTS}件、delete_all_posts）': 3,
+    f'インサイト取得（{INSIGHT_POSTS}件、daily-report）': 3,
+    # 1回目はバッチを1回試して断られ、2回目の実行は .state の記録で試さない
+    f'インサイト取得・バッチ非対応×2（{NO_BATCH_POSTS}件）': 2 * NO_BATCH_POSTS + 1,
+    '投稿＋返信2件（threads_simple）': 9,
+    '重複確認用タイムライン×2（2回目は新着確認1ページ）': 2,
+    'プロフィール取得×2（キャッシュ）': 1,
+    'フォロワー数×2（キャッシュ）': 1,
+    f'削除{DELETE_POSTS}件・逐次（delete_all_posts）': DELETE_POSTS,
+    f'削除{DELETE_POSTS}件・並行（delete_all_posts --async）': DELETE_POSTS,
+}
+
+
+def _timeline_paging(api):
+    import delete_all_posts
+    delete_all_posts.ACCESS_TOKEN, delete_all_posts.USER_ID = 'stub', STUB_USER_ID
+    posts = delete_all_posts.get_all_posts()
+    assert len(posts) == TIMELINE_POSTS, len(posts)
+
+
+def _insights(api):
+    import threads_simple
+    ids = [p['id'] for p in api.posts[:INSIGHT_POSTS]]
+    results = threads_simple.get_posts_insights(ids)
+    assert len(results) == INSIGHT_POSTS, len(results)
+
+
+def _insights_without_batch(api):
+    import graph_batch
+    import threads_simple
+    api.batch = False
+    ids = [p['id'] for p in api.posts[:NO_BATCH_POSTS]]
+    for _ in range(2):
+        graph_batch._batch_available = True  # 別の実行（新しいプロセス）として
+        results = threads_simple.get_posts_insights(ids)
+        assert len(results) == NO_BATCH_POSTS, len(results)
+
+
+def _publish_chain(api):
+    import threads_simple
+    main_id = threads_simple.create_threads_post(f'ベンチ投稿 {time.time()}', csv_id='bench')
+    assert main_id
+    reply_to = main_id
+    for i in (2, 3):
+        reply_to = threads_simple.create_threads_post(f'ベンチ返信 {i} {time.time()}', reply_to_id=reply_to,
+                                                      csv_id='bench', part=threads_simple.thread_part_name(i - 1))
+        assert reply_to
+
+
+def _recent_twice(api):
+    import threads_simple
+    assert threads_simple.get_recent_posts_from_api() is not None
+    assert threads_simple.get_recent_posts_from_api() is not None
+
+
+def _profile_twice(api):
+    import update_profile
+    update_profile.ACCESS_TOKEN, update_profile.USER_ID = 'stub', STUB_USER_ID
+    assert update_profile.get_current_profile()
+    assert update_profile.get_current_profile()
+
+
+def _followers_twice(api):
+    import threads_simple
+    threads_simple.get_followers_count()
+    threads_simple.get_followers_count()
+
+
+def _delete_serial(api):
+    import delete_all_posts
+    delete_all_posts.ACCESS_TOKEN = 'stub'
+    assert all(delete_all_posts.delete_post(p['id']) for p in list(api.posts))
+
+
+def _delete_async(api):
+    import delete_all_posts
+    delete_all_posts.ACCESS_TOKEN = 'stub'
+    assert all(delete_all_posts.delete_posts_async(list(api.posts)))
+
+
+SCENARIOS = {
+    f'タイムライン全件取得（{TIMELINE_POSTS}件、delete_all_posts）': (_timeline_paging, TIMELINE_POSTS),
+    f'インサイト取得（{INSIGHT_POSTS}件、daily-report）': (_insights, INSIGHT_POSTS),
+    f'インサイト取得・バッチ非対応×2（{NO_BATCH_POSTS}件）': (_insights_without_batch, NO_BATCH_POSTS),
+    '投稿＋返信2件（threads_simple）': (_publish_chain, 0),
+    '重複確認用タイムライン×2（2回目は新着確認1ページ）': (_recent_twice, 50),
+    'プロフィール取得×2（キャッシュ）': (_profile_twice, 0),
+    'フォロワー数×2（キャッシュ）': (_followers_twice, 0),
+    f'削除{DELETE_POSTS}件・逐次（delete_all_posts）': (_delete_serial, DELETE_POSTS),
+    f'削除{DELETE_POSTS}件・並行（delete_all_posts --async）': (_delete_async, DELETE_POSTS),
+}
+
+
+def run_scenario(fn, posts, args):
+    """新しい代役サーバーと状態ディレクトリで1シナリオを実行
+
+    Returns:
+        tuple: (所要ミリ秒, HTTP呼び出し回数, エラー or None)
+    """
+    import graph_batch
+    import threads_api
+    import threads_simple
+
+    api = StubThreadsAPI(posts=posts, latency_ms=args.latency_ms, jitter_ms=args.jitter_ms,
+                         error_rate=args.error_rate, rate_limit=args.rate_limit, seed=args.seed)
+    server, base_url = start_server(api)
+    threads_simple.ACCESS_TOKEN, threads_simple.USER_ID = 'stub', STUB_USER_ID
+    threads_simple._env_loaded = True
+
+    error = None
+    with tempfile.TemporaryDirectory() as state_dir:
+        os.environ['THREADS_STATE_DIR'] = state_dir
+        os.environ['THREADS_API_BASE_URL'] = base_url
+        threads_api._governor = None  # 前のシナリオのペース配分を持ち越さない
+        graph_batch._batch_available = True
+        start = time.perf_counter()
+        try:
+            with contextlib.redirect_stdout(sys.stdout if args.verbose else io.StringIO()):
+                fn(api)
+        except Exception as e:  # 計測は続け、結果にエラーとして出す
+            error = f"{type(e).__name__}: {e}"
+        elapsed = (time.perf_counter() - start) * 1000
+
+    server.shutdown()
+    server.server_close()
+    calls = sum(count for name, count in api.stats.items() if name not in ('429', '5xx'))
+    return elapsed, calls, error
+
+
+def main():
+    parser = argparse.ArgumentParser(description='代役サーバーに対するAPI呼び出しのベンチマーク')
+    parser.add_argument('--latency-ms', type=float, default=50, help='応答の遅延（ミリ秒、既定: 50）')
+    parser.add_argument('--jitter-ms', type=float, default=0, help='遅延のばらつき（ミリ秒）')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='503 を返す確率')
+    parser.add_argument('--rate-limit', type=int, default=0, help='60秒あたりの呼び出し上限（0で無制限）')
+    parser.add_argument('--seed', type=int, default=0, help='乱数シード')
+    parser.add_argument('--verbose', action='store_true', help='各シナリオのログを表示')
+    args = parser.parse_args()
+
+    check_budget = not args.error_rate and not args.rate_limit
+    print(f"代役サーバー: 遅延 {args.latency_ms:.0f}ms（+0〜{args.jitter_ms:.0f}ms）/ "
+          f"エラー率 {args.error_rate:.0%} / レート制限 {args.rate_limit or 'なし'}\n")
+    print(f"{'シナリオ':<40} {'時間':>9} {'呼び出し':>6} {'予算':>4}")
+
+    failed = []
+    timings = {}
+    for name, (fn, posts) in SCENARIOS.items():
+        elapsed, calls, error = run_scenario(fn, posts, args)
+        timings[name] = elapsed
+        budget = CALL_BUDGET[name]
+        over = check_budget and calls > budget
+        mark = '✗' if error or over else '✓'
+        print(f"{name:<40} {elapsed:>7.0f}ms {calls:>6} {budget:>4} {mark}")
+        if error:
+            print(f"  エラー: {error}")
+        if error or over:
+            failed.append(name)
+
+    serial = timings[f'削除{DELETE_POSTS}件・逐次（delete_all_posts）']
+    parallel = timings[f'削除{DELETE_POSTS}件・並行（delete_all_posts --async）']
+    print(f"\n並行削除の速さ: 逐次の {serial / parallel:.1f}倍"
+          f"（1件あたり 逐次 {serial / DELETE_POSTS:.0f}ms / 並行 {parallel / DELETE_POSTS:.0f}ms）")
+
+    if failed:
+        print(f"\n❌ 予算超過・エラー: {', '.join(failed)}")
+        sys.exit(1)
+    print("\n✅ すべて予算内")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+threads_simple.py の起動時間ベンチマーク
+
+各サブコマンドの「起動してから処理に入るまで」（import・.env読み込み・HTTPセッション作成・
+スケジュール参照）を新しいインタプリタで計測し、素の `python -c pass` との差を予算と比べる。
+APIは呼ばない。状態ファイルは一時ディレクトリに作る。
+
+使い方:
+  python3 bench_startup.py            計測して表を表示（予算超過があれば終了コード1）
+  python3 bench_startup.py --repeat 20
+"""
+
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+# サブコマンドごとの起動オーバーヘッド予算（ミリ秒、素のインタプリタ起動との差）
+BUDGET_MS = {
+    'post（時間外で即終了）': 40,
+    'post（時間内・投稿直前まで）': 250,
+    'daily-report（API直前まで）': 250,
+    'compile-day': 120,
+}
+
+_PRELUDE = "from datetime import datetime, date; import threads_simple as t; "
+
+PROBES = {
+    'post（時間外で即終了）':
+        "t.main(datetime(2025, 11, 10, 3, 0, tzinfo=t.JST))",
+    'post（時間内・投稿直前まで）':
+        "t.load_env(); t.threads_api.session(); t.load_schedule_rows(t.resolve_csv_path(), date(2025, 11, 10), [(8, 0), (8, 30)])",
+    'daily-report（API直前まで）':
+        "t.load_env(); t.threads_api.session()",
+    'compile-day':
+        "t.compile_day(date(2025, 11, 10))",
+}
+
+
+def run_once(code, env):
+    start = time.perf_counter()
+    subprocess.run([sys.executable, '-c', code], env=env, check=True,
+                   stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    return (time.perf_counter() - start) * 1000
+
+
+def measure(code, env, repeat):
+    return statistics.median(run_once(code, env) for _ in range(repeat))
+
+
+def main():
+    repeat = 10
+    if '--repeat' in sys.argv:
+        repeat = int(sys.argv[sys.argv.index('--repeat') + 1])
+
+    with tempfile.TemporaryDirectory() as state_dir:
+        env = dict(os.environ, THREADS_STATE_DIR=state_dir)
+
+        # 索引・プランを作っておく（2回目以降の実行と同じ状態で計測）
+        for code in PROBES.values():
+            subprocess.run([sys.executable, '-c', _PRELUDE + code], env=env, check=True,
+                           stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+        baseline = measure('pass', env, repeat)
+        print(f"素のインタプリタ起動: {baseline:.1f} ms（中央値, {repeat}回）\n")
+        print(f"{'サブコマンド':<28} {'合計':>8} {'差分':>8} {'予算':>8}")
+
+        failed = []
+        for name, code in PROBES.items():
+            total = measure(_PRELUDE + code, env, repeat)
+            overhead = total - baseline
+            budget = BUDGET_MS[name]
+            mark = '✓' if overhead <= budget else '✗'
+            print(f"{name:<28} {total:>6.1f}ms {overhead:>6.1f}ms {budget:>6d}ms {mark}")
+            if overhead > budget:
+                failed.append(name)
+
+    if failed:
+        print(f"\n❌ 起動時間の予算超過: {', '.join(failed)}")
+        sys.exit(1)
+    print("\n✅ すべて予算内")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+1日分の投稿プラン（コンパイル済み）
+
+指定日の posts_schedule.csv の行を、スロット順に並べた小さなJSONへ変換しておく。
+日時・トピック・返信チェーンの分割・指紋は変換済みなので、各スロットの実行はCSVも索引も開かずに済む。
+
+プランには元CSVの SHA-256（と mtime/サイズ）を埋め込み、読み込み時にCSVと突き合わせる。
+CSVが変わっていれば古いプランとして使わない（呼び出し側は索引にフォールバック）。
+
+出力先: .state/plans/YYYY-MM-DD.json
+"""
+
+import json
+import os
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from post_fingerprint import fingerprint
+from schedule_index import JST, file_sha256, lookup_slots
+from threads_state import state_dir
+
+PLAN_VERSION = 3
+KEEP_DAYS = 2  # これより古いプランはコンパイル時に削除
+
+
+def plan_path(target_date) -> Path:
+    path = state_dir() / 'plans'
+    path.mkdir(exist_ok=True)
+    return path / f"{target_date.strftime('%Y-%m-%d')}.json"
+
+
+def compile_day(csv_path, target_date, schedule_times):
+    """指定日のプランをコンパイルして保存
+
+    Returns:
+        tuple: (保存先パス, 投稿数)
+    """
+    st = os.stat(csv_path)
+    digest = file_sha256(csv_path)
+    rows_by_term = lookup_slots(csv_path, target_date, schedule_times)
+
+    slots = []
+    count = 0
+    for term in sorted(rows_by_term):
+        rows = rows_by_term[term]
+        if not rows:
+            continue
+        posts = []
+        for row in rows:
+            posts.append({
+                'csv_id': row['csv_id'],
+                'seq': row['seq'],
+                'scheduled_at': row['scheduled_at'].isoformat(),
+                'text': row['text'],
+                'thread_text': row['thread_text'],
+                'thread_parts': row['thread_parts'],
+                'topics': row['topics'],
+                'hashtags': row['hashtags'],
+                'fingerprint': fingerprint(row['text']),
+                'thread_fingerprints': [fingerprint(part) for part in row['thread_parts']],
+            })
+        slots.append({'term': list(term), 'posts': posts})
+        count += len(posts)
+
+    plan = {
+        'version': PLAN_VERSION,
+        'date': target_date.strftime('%Y-%m-%d'),
+        'source': str(csv_path),
+        'csv_sha256': digest,
+        'csv_mtime_ns': st.st_mtime_ns,
+        'csv_size': st.st_size,
+        'compiled_at': datetime.now(JST).isoformat(timespec='seconds'),
+        'slots': slots,
+    }
+
+    path = plan_path(target_date)
+    tmp_path = path.with_name(f'{path.name}.{os.getpid()}.tmp')
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(plan, f, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+    # 古いプランを掃除
+    cutoff = (target_date - timedelta(days=KEEP_DAYS)).strftime('%Y-%m-%d')
+    for old in path.parent.glob('*.json'):
+        if old.stem < cutoff:
+            old.unlink()
+
+    return path, count
+
+
+def load_day_plan(csv_path, target_date):
+    """コンパイル済みプランを読み込む（無い・CSVと不一致ならNone）
+
+    Returns:
+        dict: {(時, 分): [行, ...]}（行の形式は schedule_index.lookup_slots と同じ + 指紋）
+    """
+    path = plan_path(target_date)
+    if not path.exists():
+        return None
+
+    with open(path, 'r', encoding='utf-8') as f:
+        plan = json.load(f)
+
+    if plan.get('version') != PLAN_VERSION:
+        return None
+
+    # 元CSVと突き合わせ（mtime/サイズが同じならハッシュ計算を省く）
+    st = os.stat(csv_path)
+    if (plan.get('csv_mtime_ns'), plan.get('csv_size')) != (st.st_mtime_ns, st.st_size):
+        if plan.get('csv_sha256') != file_sha256(csv_path):
+            print(f"⚠️  コンパイル済みプランがCSVと一致しないため使いません: {path}")
+            return None
+
+    rows_by_term = {}
+    for slot in plan['slots']:
+        rows = []
+        for post in slot['posts']:
+            rows.append(dict(post, scheduled_at=datetime.fromisoformat(post['scheduled_at'])))
+        rows_by_term[tuple(slot['term'])] = rows
+    return rows_by_term
@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+後回しにした投稿の待ち行列（期限付きヒープ、.state/deferred_queue.json に保存）
+
+「いつ投稿してよいか」を持たせて積んでおく。投稿どうしの間隔（MIN_PUBLISH_SPACING_SECONDS）の待ちは
+実行内では数秒（時計のずれ程度）しか待たず、それより先にしか投稿できないものはここに積む。
+- 常駐モード: 次の期限で起きて投稿する
+- 1回実行（cron）: 期限の来ていないものは保存して次の実行に引き継ぐ（前日以前の予定の分も破棄しない）
+
+使い方:
+- python3 deferred_queue.py         待ち行列の中身を表示
+"""
+
+import heapq
+import json
+import os
+from datetime import datetime, timezone, timedelta
+
+from threads_state import state_path
+
+# JST タイムゾーン
+JST = timezone(timedelta(hours=9))
+
+QUEUE_FILE = 'deferred_queue.json'
+MIN_PUBLISH_SPACING_SECONDS = 300  # 投稿どうしの最小間隔（スパム対策、5分）
+
+
+class DeferredQueue:
+    """期限（due_at）順に取り出せる投稿待ち行列"""
+
+    def __init__(self, items=None, last_published_at=None):
+        self._heap = []
+        self.last_published_at = last_published_at
+        for item in items or []:
+            self.push(item, datetime.fromisoformat(item['due_at']))
+
+    @classmethod
+    def load(cls):
+        path = state_path(QUEUE_FILE)
+        if not path.exists():
+            return cls()
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        last = data.get('last_published_at')
+        return cls(data.get('items', []), datetime.fromisoformat(last) if last else None)
+
+    def save(self):
+        """アトミックに保存"""
+        path = state_path(QUEUE_FILE)
+        data = {
+            'last_published_at': self.last_published_at.isoformat() if self.last_published_at else None,
+            'items': [entry[2] for entry in sorted(self._heap)],
+        }
+        tmp_path = path.with_name(f'{path.name}.{os.getpid()}.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, path)
+
+    def __len__(self):
+        return len(self._heap)
+
+    def __contains__(self, csv_id):
+        return any(entry[2]['csv_id'] == csv_id for entry in self._heap)
+
+    def push(self, item, due_at):
+        """item（csv_id, scheduled_at を含む dict）を due_at に積む（同じ csv_id は1つだけ）"""
+        if item['csv_id'] in self:
+            return
+        item = dict(item, due_at=due_at.isoformat())
+        heapq.heappush(self._heap, (due_at.timestamp(), item['csv_id'], item))
+
+    def next_due_at(self):
+        """次に投稿してよい時刻（空ならNone）。投稿間隔も考慮する"""
+        if not self._heap:
+            return None
+        due_at = datetime.fromisoformat(self._heap[0][2]['due_at'])
+        return max(due_at, self.next_allowed_at() or due_at)
+
+    def pop_due(self, now):
+        """期限が来ていて投稿間隔も空いていれば先頭を取り出す（なければNone）"""
+        if not self._heap or not self.can_publish(now):
+            return None
+        if self._heap[0][0] > now.timestamp():
+            return None
+        return heapq.heappop(self._heap)[2]
+
+    def next_allowed_at(self):
+        """前回の投稿から最小間隔が空く時刻"""
+        if self.last_published_at is None:
+            return None
+        return self.last_published_at + timedelta(seconds=MIN_PUBLISH_SPACING_SECONDS)
+
+    def can_publish(self, now):
+        allowed_at = self.next_allowed_at()
+        return allowed_at is None or now >= allowed_at
+
+    def mark_published(self, now):
+        self.last_published_at = now
+
+    def items(self):
+        return [entry[2] for entry in sorted(self._heap)]
+
+
+def main():
+    queue = DeferredQueue.load()
+    print(f"待ち行列: {state_path(QUEUE_FILE)}")
+    if queue.last_published_at:
+        print(f"  最終投稿: {queue.last_published_at.strftime('%Y-%m-%d %H:%M:%S')}")
+    if not len(queue):
+        print("  （空）")
+    for item in queue.items():
+        due_at = datetime.fromisoformat(item['due_at'])
+        print(f"  [{item['csv_id']}] 予定 {item['scheduled_at'][:16]} → 投稿可能 {due_at.strftime('%Y-%m-%d %H:%M:%S')}")
+
+
+if __name__ == '__main__':
+    main()
@@ -3,58 +3,44 @@
 Threads 投稿削除スクリプト
 
 全ての投稿を取得して削除します。
+--async を付けると削除を並行に送ります（threads_async.py。速さはレート制限で決まる）。
+--deadline 秒 で並行削除全体の期限を指定できます（期限までに送れなかった分は失敗として数える）。
 """
 
-import requests
 import time
 import os
 import sys
 from dotenv import load_dotenv
 
+import threads_api
+import timeline_store
+
 # 環境変数読み込み
 load_dotenv(override=True)
 
 # Threads API設定
-API_BASE_URL = 'https://graph.threads.net/v1.0'
 ACCESS_TOKEN = os.getenv('THREADS_ACCESS_TOKEN')
 USER_ID = os.getenv('THREADS_USER_ID')
 
 # ドライランモード
 DRY_RUN = '--dry-run' in sys.argv
+# 並行削除（threads_async）
+USE_ASYNC = '--async' in sys.argv
+DEADLINE = float(sys.argv[sys.argv.index('--deadline') + 1]) if '--deadline' in sys.argv else None
 
 
 def get_all_posts():
-    """全ての投稿を取得（ページネーション対応）"""
-    all_posts = []
-    url = f'{API_BASE_URL}/{USER_ID}/threads'
-    params = {
-        'fields': 'id,text,timestamp',
-        'limit': 100,  # 最大値
-        'access_token': ACCESS_TOKEN
-    }
-
+    """全ての投稿を取得（timeline_store で全ページを同期。2回目以降は新着分だけ取得）"""
     print("📥 投稿を取得中...")
 
-    while url:
-        try:
-            response = requests.get(url, params=params)
-            response.raise_for_status()
-            data = response.json()
-
-            posts = data.get('data', [])
-            all_posts.extend(posts)
-
-            print(f"  取得済み: {len(all_posts)}件")
-
-            # 次のページがあるか確認
-            paging = data.get('paging', {})
-            url = paging.get('next')
-            params = None  # 次のURLには既にパラメータが含まれている
-
-        except Exception as e:
-            print(f"✗ エラー: {e}")
-            break
+    try:
+        added = timeline_store.sync('threads', USER_ID, ACCESS_TOKEN)
+        print(f"  新しく取得: {added}件")
+    except Exception as e:
+        print(f"✗ エラー: {e}")
+        return []
 
+    all_posts = timeline_store.recent('threads')
     print(f"\n✓ 合計 {len(all_posts)} 件の投稿を取得しました")
     return all_posts
 
@@ -67,10 +53,9 @@ def delete_post(post_id):
         return True
 
     try:
-        url = f'{API_BASE_URL}/{post_id}'
         params = {'access_token': ACCESS_TOKEN}
 
-        response = requests.delete(url, params=params)
+        response = threads_api.delete(post_id, params=params)
         response.raise_for_status()
 
         result = response.json()
@@ -81,6 +66,36 @@ def delete_post(post_id):
         return False
 
 
+def delete_posts_async(posts):
+    """投稿をまとめて並行に削除
+
+    Returns:
+        list: 各投稿の成否（posts と同じ順）
+    """
+    import threads_async
+
+    if DRY_RUN:
+        return [delete_post(post.get('id')) for post in posts]
+
+    params = {'access_token': ACCESS_TOKEN}
+    calls = [('DELETE', post.get('id'), {'params': params, 'kind': 'write'}) for post in posts]
+    results = threads_async.run_all(calls, deadline=DEADLINE)
+
+    ok = []
+    for response in results:
+        if isinstance(response, Exception):
+            print(f"  ✗ 削除エラー: {response}")
+            ok.append(False)
+            continue
+        try:
+            response.raise_for_status()
+            ok.append(response.json().get('success', False))
+        except Exception as e:
+            print(f"  ✗ 削除エラー: {e}")
+            ok.append(False)
+    return ok
+
+
 def main():
     """メイン処理"""
     print("=" * 70)
@@ -114,26 +129,27 @@ def main():
     print("🗑️  削除を開始します")
     print("=" * 70)
 
-    success_count = 0
-    fail_count = 0
+    if USE_ASYNC:
+        print(f"\n並行に削除します（{len(posts)}件）")
+        results = delete_posts_async(posts)
+    else:
+        results = []
+        for i, post in enumerate(posts, 1):
+            post_id = post.get('id')
+            text_preview = (post.get('text') or '')[:50].replace('\n', ' ')
 
-    for i, post in enumerate(posts, 1):
-        post_id = post.get('id')
-        text_preview = post.get('text', '')[:50].replace('\n', ' ')
+            print(f"\n[{i}/{len(posts)}] ID: {post_id}")
+            print(f"本文: {text_preview}...")
 
-        print(f"\n[{i}/{len(posts)}] ID: {post_id}")
-        print(f"本文: {text_preview}...")
+            results.append(delete_post(post_id))
+            print("  ✓ 削除成功" if results[-1] else "  ✗ 削除失敗")
 
-        if delete_post(post_id):
-            success_count += 1
-            print("  ✓ 削除成功")
-        else:
-            fail_count += 1
-            print("  ✗ 削除失敗")
+    success_count = sum(results)
+    fail_count = len(results) - success_count
 
-        # レート制限対策（最後以外）
-        if i < len(posts):
-            time.sleep(1)
+    # 削除できた投稿は手元の一覧からも外す
+    if not DRY_RUN:
+        timeline_store.forget([post.get('id') for post, ok in zip(posts, results) if ok])
 
     # 結果サマリー
     print("\n" + "=" * 70)
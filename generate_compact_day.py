@@ -18,6 +18,7 @@ import sys
 from datetime import datetime, date
 from pathlib import Path
 import os
+from slot_calendar import get_calendar
 
 def default_csv_path() -> Path:
     env = os.getenv('CSV_FILE')
@@ -28,10 +29,7 @@ def default_csv_path() -> Path:
 
 CSV_PATH = default_csv_path()
 
-SLOTS_12 = [
-    (8,0),(9,30),(11,0),(12,30),(14,0),(15,30),
-    (17,0),(18,30),(20,0),(21,0),(22,0),(23,30)
-]
+SLOTS_12 = list(get_calendar('compact12').slots)
 
 DEFAULTS = [
     (date(2025,11,12), '放課後の光線'),
@@ -20,6 +20,7 @@ import os
 import sys
 from datetime import datetime
 from pathlib import Path
+from slot_calendar import get_calendar
 
 
 def csv_path() -> Path:
@@ -30,11 +31,7 @@ def csv_path() -> Path:
     return p if p.exists() else Path('posts_schedule.csv')
 
 
-SLOTS = [
-    (8,0),(8,30),(9,0),(9,30),(10,0),(10,30),(11,0),(11,30),(12,0),(12,30),
-    (13,0),(13,30),(14,0),(14,30),(15,0),(15,30),(16,0),(16,30),(17,0),(17,30),
-    (18,0),(18,30),(19,0),(19,30),(20,0),(20,30),(21,0),(21,30),(22,0),(22,30),(23,0),(23,30)
-]
+SLOTS = list(get_calendar('default').slots)
 
 # 8 story blocks (3 consecutive slots each) + 6 essays
 STORY_BLOCKS = [
@@ -17,6 +17,7 @@ from dataclasses import dataclass
 from datetime import datetime, date, timedelta
 from pathlib import Path
 import os
+from slot_calendar import get_calendar
 
 def default_csv_path() -> Path:
     env = os.getenv('CSV_FILE')
@@ -32,13 +33,7 @@ JST = timedelta(hours=9)  # used only for labels
 NIGHT_THREAD_TIMES = {(20,0), (20,30), (21,0), (22,0), (23,0)}
 
 # 25 time slots per day (night-heavy, 30-min granularity)
-SLOTS = [
-    (8,0),(8,30),(9,0),(9,30),(11,0),
-    (12,0),(13,0),(14,0),(14,30),(15,0),
-    (15,30),(16,0),(16,30),(18,0),(18,30),
-    (19,0),(19,30),(20,0),(20,30),(21,0),
-    (21,30),(22,0),(22,30),(23,0),(23,30)
-]
+SLOTS = list(get_calendar('week25').slots)
 
 THEMES = [
     (date(2025,11,11), '窓ぎわの天気予報'),
@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+"""
+独立したGET呼び出しのまとめ送り（Graph API のバッチリクエスト）
+
+投稿ごとのインサイト取得のように、互いに依存しないGETを1件ずつ送ると
+投稿数ぶんの往復になる。get_many はそれらを最大 BATCH_SIZE 件ずつ
+1回の POST（batch=[{"method": "GET", "relative_url": ...}, ...]）にまとめ、
+応答を呼び出し順に振り分けて返す。
+
+- 各応答は requests.Response と同じように使える（status_code / json() / raise_for_status()）
+- バッチが使えない（エンドポイントが無い・形式の違う応答）ときは1件ずつの呼び出しに切り替え、
+  以降そのプロセスではバッチを試さない。エンドポイントに断られたときは .state/graph_batch.json に
+  記録し、UNSUPPORTED_RECHECK_DAYS 日は次の実行からも試さない（毎回1回ぶんの失敗した呼び出しを省く）
+- バッチ内で 5xx/429・タイムアウト（null）になった分だけ、1件ずつ再試行する
+- 1件ずつの呼び出しは threads_async で並行に送る（同時実行数に上限あり）。
+  失敗した分は例外オブジェクトを結果に入れ、他の結果は返す
+
+呼び出しはすべて threads_api 経由（タイムアウト・再試行・ペース配分はそのまま効く）。
+"""
+
+import json
+import os
+from datetime import datetime, timedelta
+from urllib.parse import urlencode
+
+import requests
+
+import threads_api
+import threads_clock as clock
+from threads_state import state_path
+
+BATCH_SIZE = 50  # Graph API のバッチ1回あたりの上限
+PROBE_FILE = 'graph_batch.json'
+UNSUPPORTED_RECHECK_DAYS = 7  # バッチに断られたら、この日数は試さない（過ぎたら1回だけ確かめ直す）
+
+_batch_available = True
+
+
+class _BatchUnsupported(Exception):
+    """エンドポイントがバッチを受け付けない（4xx・バッチの形でない応答）"""
+
+
+class BatchItemResponse:
+    """バッチ内の1件の応答（requests.Response の必要な部分だけ）"""
+
+    def __init__(self, item):
+        self.status_code = int(item.get('code') or 0)
+        self.headers = {h.get('name'): h.get('value') for h in item.get('headers') or []}
+        self.text = item.get('body') or ''
+
+    def json(self):
+        return json.loads(self.text)
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise requests.exceptions.HTTPError(f"{self.status_code}: {self.text}", response=self)
+
+
+def _relative_url(path, params, access_token):
+    """バッチ内の1件の relative_url（共通のアクセストークンは外側に1回だけ付ける）"""
+    params = {k: v for k, v in (params or {}).items() if not (k == 'access_token' and v == access_token)}
+    path = path.lstrip('/')
+    return f"{path}?{urlencode(params)}" if params else path
+
+
+def _known_unsupported():
+    """前の実行でバッチに断られ、まだ確かめ直す時期でないか（APIの接続先が同じときだけ）"""
+    path = state_path(PROBE_FILE)
+    if not path.exists():
+        return False
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            probe = json.load(f)
+        until = datetime.fromisoformat(probe['unsupported_until'])
+    except (ValueError, KeyError, TypeError):
+        return False
+    return probe.get('base_url') == threads_api.base_url() and clock.now() < until
+
+
+def _remember_unsupported():
+    """バッチに断られたことを記録（UNSUPPORTED_RECHECK_DAYS 日は次の実行からも試さない）"""
+    path = state_path(PROBE_FILE)
+    probe = {
+        'base_url': threads_api.base_url(),
+        'unsupported_until': (clock.now() + timedelta(days=UNSUPPORTED_RECHECK_DAYS)).isoformat(),
+    }
+    tmp_path = path.with_name(f'{path.name}.{os.getpid()}.tmp')
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(probe, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, path)
+
+
+def _is_auth_error(response):
+    """トークンの問題で断られたか（バッチの対応とは関係ないので記録しない）"""
+    if response.status_code in (401, 403):
+        return True
+    try:
+        return response.json().get('error', {}).get('code') == 190
+    except (ValueError, AttributeError):
+        return False
+
+
+def _send_batch(calls, access_token):
+    """1回分のバッチを送る
+
+    Returns:
+        list: 各呼び出しの応答（個別に再試行すべきものは None）。
+            一時的な失敗（接続エラー・5xx/429）でバッチが使えなければ None
+
+    Raises:
+        _BatchUnsupported: エンドポイントがバッチを受け付けない
+    """
+    batch = [{'method': 'GET', 'relative_url': _relative_url(path, params, access_token)}
+             for path, params in calls]
+    try:
+        response = threads_api.post('', data={'batch': json.dumps(batch), 'access_token': access_token},
+                                    kind='read')
+    except requests.exceptions.RequestException:
+        return None
+    if response.status_code in threads_api.RETRY_STATUS or _is_auth_error(response):
+        return None
+    if response.status_code != 200:
+        raise _BatchUnsupported(f"HTTP {response.status_code}")
+    try:
+        items = response.json()
+    except ValueError:
+        raise _BatchUnsupported('JSONでない応答')
+    if not isinstance(items, list) or len(items) != len(calls):
+        raise _BatchUnsupported('バッチの形でない応答')
+
+    results = []
+    for item in items:
+        if not isinstance(item, dict) or 'code' not in item:
+            results.append(None)  # タイムアウトなどで結果なし
+            continue
+        result = BatchItemResponse(item)
+        results.append(None if result.status_code in threads_api.RETRY_STATUS else result)
+    return results
+
+
+def get_many(calls, access_token):
+    """独立したGETをまとめて送り、呼び出し順の応答リストを返す
+
+    Args:
+        calls: [(path, params), ...]（threads_api.get と同じ指定）
+        access_token: バッチ全体に使うアクセストークン
+
+    Returns:
+        list: 各呼び出しの応答（BatchItemResponse または requests.Response）。
+            1件ずつの呼び出しが接続エラー・タイムアウトになった分は例外オブジェクト
+    """
+    global _batch_available
+    calls = list(calls)
+    results = [None] * len(calls)
+
+    if _batch_available and len(calls) > 1 and _known_unsupported():
+        _batch_available = False
+    if _batch_available and len(calls) > 1:
+        for start in range(0, len(calls), BATCH_SIZE):
+            chunk = calls[start:start + BATCH_SIZE]
+            try:
+                chunk_results = _send_batch(chunk, access_token)
+            except _BatchUnsupported as e:
+                print(f"  … バッチリクエストに断られました（{e}）。{UNSUPPORTED_RECHECK_DAYS}日間は次の実行からも試しません")
+                _remember_unsupported()
+                chunk_results = None
+            if chunk_results is None:
+                print("  … バッチリクエストが使えないため、1件ずつ取得します")
+                _batch_available = False
+                break
+            results[start:start + len(chunk)] = chunk_results
+
+    # バッチに乗らなかった分・個別に再試行する分（並行に送る）
+    remaining = [i for i, result in enumerate(results) if result is None]
+    if remaining:
+        import threads_async
+        singles = threads_async.run_all([('GET', calls[i][0], {'params': calls[i][1]}) for i in remaining])
+        for i, result in zip(remaining, singles):
+            results[i] = result
+    return results
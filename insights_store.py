@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+"""
+投稿インサイトの時系列ストア（.state/insights.sqlite）
+
+インサイトを取得するたびに、投稿ごとのスナップショット（取得時刻つき）を記録する。
+次に取りに行くかどうかは、投稿の経過時間と数値の動きで決める（refresh_due）:
+- 投稿直後は短い間隔、日が経つほど長い間隔（REFRESH_TIERS）
+- 前回から数値が変わっていなければ間隔を倍に（最大 2**MAX_STABLE_DOUBLINGS 倍）、変わったら元に戻す
+- 取得できなかった投稿は次回また取りに行く
+
+毎朝のレポートや analyze_experiments.py は、期限が来た投稿だけをAPIで取り直し、
+残りは手元の最新スナップショットを使う。
+
+使い方:
+- python3 insights_store.py           記録済みの投稿数・スナップショット数・取り直し待ちを表示
+- python3 insights_store.py <投稿ID>   その投稿のスナップショットを古い順に表示
+"""
+
+import sqlite3
+import sys
+from datetime import datetime, timedelta
+
+import threads_clock as clock
+from threads_state import state_path
+
+STORE_FILE = 'insights.sqlite'
+STORE_VERSION = '1'
+METRICS = ('views', 'likes', 'replies', 'reposts', 'quotes')
+
+# 投稿からの経過時間 → 取り直しの基本間隔
+REFRESH_TIERS = [
+    (timedelta(hours=6), timedelta(minutes=30)),
+    (timedelta(days=1), timedelta(hours=2)),
+    (timedelta(days=3), timedelta(hours=12)),
+    (timedelta(days=14), timedelta(days=2)),
+]
+REFRESH_INTERVAL_OLD = timedelta(days=14)  # それより古い投稿
+MAX_STABLE_DOUBLINGS = 3  # 数値が動かない投稿は基本間隔の最大8倍まで延ばす
+
+
+def parse_graph_time(value):
+    """Graph API の時刻（2025-11-10T08:00:00+0000）を datetime に"""
+    if value.endswith('+0000'):
+        value = value[:-5] + '+00:00'
+    elif value.endswith('Z'):
+        value = value[:-1] + '+00:00'
+    return datetime.fromisoformat(value)
+
+
+def open_store():
+    """ストアへの接続を返す（無ければ作成）"""
+    conn = sqlite3.connect(state_path(STORE_FILE), timeout=30)
+    conn.executescript(f"""
+        CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+        CREATE TABLE IF NOT EXISTS posts (
+            post_id TEXT PRIMARY KEY,
+            published_at TEXT NOT NULL,
+            last_fetched_at TEXT,
+            next_refresh_at TEXT,
+            stable_count INTEGER NOT NULL DEFAULT 0
+        );
+        CREATE TABLE IF NOT EXISTS snapshots (
+            post_id TEXT NOT NULL,
+            fetched_at TEXT NOT NULL,
+            {', '.join(f'{m} INTEGER' for m in METRICS)},
+            PRIMARY KEY (post_id, fetched_at)
+        );
+        INSERT OR IGNORE INTO meta VALUES ('version', '{STORE_VERSION}');
+    """)
+    return conn
+
+
+def refresh_interval(age, stable_count):
+    """経過時間 age・変化なしの回数 stable_count の投稿を次に取り直すまでの間隔"""
+    base = next((interval for limit, interval in REFRESH_TIERS if age < limit), REFRESH_INTERVAL_OLD)
+    return base * 2 ** min(stable_count, MAX_STABLE_DOUBLINGS)
+
+
+def refresh_due(conn, posts, now):
+    """取り直しの期限が来ている（または未取得の）投稿IDを返す
+
+    Args:
+        posts: [{'id': ..., 'timestamp': ...}, ...]
+    """
+    known = dict(conn.execute('SELECT post_id, next_refresh_at FROM posts'))
+    due = []
+    for post in posts:
+        next_at = known.get(post['id'])
+        if next_at is None or datetime.fromisoformat(next_at) <= now:
+            due.append(post['id'])
+    return due
+
+
+def latest_snapshot(conn, post_id):
+    """最新のスナップショット（{指標: 値}、欠けていた指標は入らない）。無ければ None"""
+    row = conn.execute(f"SELECT {', '.join(METRICS)} FROM snapshots WHERE post_id = ? "
+                       f"ORDER BY fetched_at DESC LIMIT 1", (post_id,)).fetchone()
+    if row is None:
+        return None
+    return {m: v for m, v in zip(METRICS, row) if v is not None}
+
+
+def record_snapshot(conn, post_id, published_at, metrics, now):
+    """スナップショットを記録し、次の取り直し時刻を決める"""
+    previous = latest_snapshot(conn, post_id)
+    row = conn.execute('SELECT stable_count FROM posts WHERE post_id = ?', (post_id,)).fetchone()
+    stable_count = (row[0] + 1 if row and previous == metrics else 0)
+
+    conn.execute(f"INSERT OR REPLACE INTO snapshots (post_id, fetched_at, {', '.join(METRICS)}) "
+                 f"VALUES (?, ?, {', '.join('?' * len(METRICS))})",
+                 (post_id, now.isoformat(), *(metrics.get(m) for m in METRICS)))
+    next_at = now + refresh_interval(now - published_at, stable_count)
+    conn.execute('INSERT OR REPLACE INTO posts VALUES (?, ?, ?, ?, ?)',
+                 (post_id, published_at.isoformat(), now.isoformat(), next_at.isoformat(), stable_count))
+
+
+def refresh(posts, fetch, now=None):
+    """期限の来た投稿だけ取り直し、全投稿の最新インサイトを返す
+
+    Args:
+        posts: [{'id': ..., 'timestamp': ...}, ...]（Graph API の投稿一覧の形）
+        fetch: 投稿IDのリスト → {投稿ID: {指標: 値} or None}（取得できなければ None）
+
+    Returns:
+        tuple: ({投稿ID: {指標: 値} or None}, APIで取り直した件数)
+    """
+    now = now or clock.now()
+    posts = [post for post in posts if post.get('id') and post.get('timestamp')]
+    conn = open_store()
+    try:
+        due = refresh_due(conn, posts, now)
+        if due:
+            fetched = fetch(due)
+            published = {post['id']: parse_graph_time(post['timestamp']) for post in posts}
+            for post_id in due:
+                metrics = fetched.get(post_id)
+                if metrics is not None:
+                    record_snapshot(conn, post_id, published[post_id], metrics, now)
+            conn.commit()
+        return {post['id']: latest_snapshot(conn, post['id']) for post in posts}, len(due)
+    finally:
+        conn.close()
+
+
+def main():
+    conn = open_store()
+    if len(sys.argv) > 1:
+        post_id = sys.argv[1]
+        print(f"{'取得時刻':<26} " + ' '.join(f'{m:>8}' for m in METRICS))
+        for row in conn.execute(f"SELECT fetched_at, {', '.join(METRICS)} FROM snapshots "
+                                f"WHERE post_id = ? ORDER BY fetched_at", (post_id,)):
+            print(f"{row[0]:<26} " + ' '.join(f"{'-' if v is None else v:>8}" for v in row[1:]))
+        return
+
+    now = clock.now()
+    posts = conn.execute('SELECT COUNT(*) FROM posts').fetchone()[0]
+    snapshots = conn.execute('SELECT COUNT(*) FROM snapshots').fetchone()[0]
+    due = sum(1 for (next_at,) in conn.execute('SELECT next_refresh_at FROM posts')
+              if datetime.fromisoformat(next_at) <= now)
+    print(f"インサイトの記録: {posts} 投稿 / {snapshots} スナップショット")
+    print(f"取り直し待ち: {due} 投稿")
+
+
+if __name__ == '__main__':
+    main()
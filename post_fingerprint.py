@@ -0,0 +1,34 @@
+#!/usr/bin/env python3
+"""
+投稿本文の指紋（重複判定用）
+
+本文を正規化（NFKC・空白の畳み込み）してから SHA-256 を取る。
+全文で比較するので、書き出しが同じ投稿同士でも衝突しない。
+"""
+
+import hashlib
+import re
+import unicodedata
+
+_WHITESPACE = re.compile(r'\s+')
+
+
+def normalize_text(text):
+    """NFKC正規化し、改行・全角空白を含む空白の連続を1つの半角空白に畳む"""
+    text = unicodedata.normalize('NFKC', text or '')
+    return _WHITESPACE.sub(' ', text).strip()
+
+
+def fingerprint(text):
+    """正規化した本文の SHA-256（16進）"""
+    return hashlib.sha256(normalize_text(text).encode('utf-8')).hexdigest()
+
+
+def build_fingerprint_index(posts):
+    """API の投稿リストから {指紋: 投稿ID} の索引を作る（1実行につき1回）"""
+    index = {}
+    for post in posts:
+        text = post.get('text')
+        if text:
+            index.setdefault(fingerprint(text), post.get('id'))
+    return index
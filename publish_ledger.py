@@ -0,0 +1,239 @@
+#!/usr/bin/env python3
+"""
+投稿台帳（追記専用ジャーナル）
+
+コンテナ作成・公開に成功するたびに1行のJSONを .state/publish_ledger.jsonl へ追記する。
+重複判定はまず台帳を見て、台帳が途切れている可能性があるときだけAPIで照合する。
+
+公開済みなのは確かだが投稿IDが分からない（一覧への反映待ち）ときは threads_id なしの publish を、
+公開の応答も状態確認も失敗して公開されたか分からないときは unknown を記録する。
+
+行の形式:
+  {"event": "container" | "publish" | "reconcile" | "unknown" | "checkpoint",
+   "csv_id": ..., "part": "main" | "thread" | "thread_2" | ..., "fingerprint": ...,
+   "creation_id": ..., "threads_id": ..., "scheduled_at": ..., "recorded_at": ...}
+
+台帳を信頼する条件:
+- 最後の checkpoint が MAX_GAP_SECONDS 以内（前回の実行の状態が引き継がれている）
+- GitHub Actions では、さらに checkpoint が直前の実行（run_number が1つ前、または同じ実行）のもの。
+  actions/cache は成功した実行の分しか保存しないので、途中で失敗した実行があると
+  その実行の投稿が台帳から抜ける。実行番号が飛んでいたら・再実行（run_attempt > 1）ならAPIで照合する
+- 最後の checkpoint より後に、まだ公開が確かめられていない unknown がある → APIで照合する
+- それ以外・台帳が空 → 前回の状態が失われた可能性があるのでAPIで照合する
+
+圧縮:
+- 行数が COMPACT_AFTER_LINES を超えたら、保持期間内の公開記録と最新の checkpoint
+  （とその後の unknown）だけを残して書き直す
+
+使い方:
+- python3 publish_ledger.py            台帳の概要を表示
+- python3 publish_ledger.py compact    台帳を圧縮
+"""
+
+import json
+import os
+import sys
+from datetime import datetime, timezone, timedelta
+
+import threads_clock as clock
+from threads_state import state_path
+
+# JST タイムゾーン
+JST = timezone(timedelta(hours=9))
+
+LEDGER_FILE = 'publish_ledger.jsonl'
+RETENTION_DAYS = 14  # 圧縮時に残す公開記録の期間
+COMPACT_AFTER_LINES = 1000  # この行数を超えたら圧縮
+MAX_GAP_SECONDS = 45 * 60  # checkpoint がこれより古ければAPIで照合（30分間隔 + 余裕）
+UNKNOWN_SETTLE_SECONDS = 10 * 60  # 公開されたか分からない投稿が一覧に出てくるのを待つ時間（その間は投稿済み扱い）
+
+# 公開済みとみなすイベント
+PUBLISHED_EVENTS = ('publish', 'reconcile')
+
+
+def ledger_path():
+    return state_path(LEDGER_FILE)
+
+
+def _now():
+    return clock.now()
+
+
+def append_event(event, **fields):
+    """台帳に1行追記"""
+    entry = {'event': event, **fields, 'recorded_at': _now().isoformat(timespec='seconds')}
+    with open(ledger_path(), 'a', encoding='utf-8') as f:
+        f.write(json.dumps(entry, ensure_ascii=False) + '\n')
+        f.flush()
+        os.fsync(f.fileno())
+
+
+def read_events():
+    """台帳の全行を読む（書きかけの壊れた行は無視）"""
+    path = ledger_path()
+    if not path.exists():
+        return []
+
+    events = []
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                events.append(json.loads(line))
+            except json.JSONDecodeError:
+                continue
+    return events
+
+
+def compact(events=None):
+    """保持期間内の公開記録と最新の checkpoint（とその後の unknown）だけを残して書き直す"""
+    if events is None:
+        events = read_events()
+
+    cutoff = _now() - timedelta(days=RETENTION_DAYS)
+    published = {}
+    last_checkpoint = None
+    unknown = []
+
+    for entry in events:
+        if entry.get('event') == 'checkpoint':
+            last_checkpoint = entry
+            unknown = []
+            continue
+        if entry.get('event') == 'unknown':
+            unknown.append(entry)
+            continue
+        if entry.get('event') not in PUBLISHED_EVENTS:
+            continue
+        if datetime.fromisoformat(entry['recorded_at']) < cutoff:
+            continue
+        # 同じ指紋の重複記録は1件だけ（投稿IDの分かっている記録を優先）
+        previous = published.get(entry.get('fingerprint'))
+        if previous is not None and (previous.get('threads_id') or not entry.get('threads_id')):
+            continue
+        published[entry.get('fingerprint')] = entry
+
+    kept = list(published.values())
+    if last_checkpoint:
+        kept.append(last_checkpoint)
+    kept.extend(unknown)
+
+    path = ledger_path()
+    tmp_path = path.with_name(f'{path.name}.{os.getpid()}.tmp')
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        for entry in kept:
+            f.write(json.dumps(entry, ensure_ascii=False) + '\n')
+    os.replace(tmp_path, path)
+    return kept
+
+
+def load_ledger(allow_compact=True):
+    """台帳を読み込んで公開済みの指紋索引を返す
+
+    Args:
+        allow_compact: 行数が多ければ圧縮する（ドライランなど書き込まない実行では False）
+
+    Returns:
+        dict: {
+            'published': {指紋: 投稿ID（公開済みだがIDが分からなければ None）},
+            'unknown': 最後の checkpoint より後の、公開されたか分からない投稿 {指紋: 台帳の行},
+            'last_checkpoint': datetime or None,
+            'last_run': 最後の checkpoint を書いた実行 {'number', 'attempt'}（Actions 以外では None）,
+            'lines': 読み込んだ行数,
+        }
+    """
+    events = read_events()
+    lines = len(events)
+    if allow_compact and lines > COMPACT_AFTER_LINES:
+        events = compact(events)
+
+    published = {}
+    unknown = {}
+    last_checkpoint = None
+    last_run = None
+    for entry in events:
+        event = entry.get('event')
+        fp = entry.get('fingerprint')
+        if event in PUBLISHED_EVENTS and fp:
+            if published.get(fp) is None:
+                published[fp] = entry.get('threads_id')
+            unknown.pop(fp, None)
+        elif event == 'unknown' and fp and fp not in published:
+            unknown[fp] = entry
+        elif event == 'checkpoint':
+            last_checkpoint = datetime.fromisoformat(entry['recorded_at'])
+            last_run = entry.get('run')
+            unknown = {}
+
+    return {'published': published, 'unknown': unknown, 'last_checkpoint': last_checkpoint,
+            'last_run': last_run, 'lines': lines}
+
+
+def current_run():
+    """GitHub Actions の実行番号と試行回数（Actions 以外では None）"""
+    number = os.getenv('GITHUB_RUN_NUMBER')
+    if not number:
+        return None
+    return {'number': int(number), 'attempt': int(os.getenv('GITHUB_RUN_ATTEMPT') or 1)}
+
+
+def is_trusted(ledger, now=None, run=None):
+    """台帳だけで重複判定してよいか（前回の実行から途切れていないか）
+
+    Args:
+        run: 今の実行（省略時は current_run()）
+    """
+    last_checkpoint = ledger.get('last_checkpoint')
+    if last_checkpoint is None:
+        return False
+    if ledger.get('unknown'):
+        return False  # 公開の応答が失われた投稿がある（一覧で確かめるまで台帳は不完全）
+    now = now or _now()
+    if (now - last_checkpoint).total_seconds() > MAX_GAP_SECONDS:
+        return False
+
+    run = run or current_run()
+    if run is None:
+        return True
+    last_run = ledger.get('last_run')
+    if not last_run:
+        return False
+    if last_run == run:
+        return True  # 同じ実行の中で書いた checkpoint
+    # 直前の実行から途切れずに引き継いでいるか（再実行は前の試行の投稿が抜けている可能性がある）
+    return run['attempt'] == 1 and last_run.get('number') == run['number'] - 1
+
+
+def record_checkpoint():
+    """ここまでの台帳が完全であることを記録（Actions では実行番号も残す）"""
+    run = current_run()
+    if run is None:
+        append_event('checkpoint')
+    else:
+        append_event('checkpoint', run=run)
+
+
+def main():
+    if len(sys.argv) > 1 and sys.argv[1] == 'compact':
+        before = len(read_events())
+        after = len(compact())
+        print(f"✅ 台帳を圧縮しました: {before}行 → {after}行")
+        return
+
+    ledger = load_ledger(allow_compact=False)
+    print(f"台帳: {ledger_path()}")
+    print(f"  行数: {ledger['lines']}")
+    print(f"  公開済み（指紋）: {len(ledger['published'])}件")
+    if ledger['unknown']:
+        print(f"  公開されたか不明: {len(ledger['unknown'])}件（{', '.join(e.get('csv_id') or '?' for e in ledger['unknown'].values())}）")
+    if ledger['last_checkpoint']:
+        status = '信頼可' if is_trusted(ledger) else '要API照合'
+        print(f"  最終checkpoint: {ledger['last_checkpoint'].strftime('%Y-%m-%d %H:%M:%S')}（{status}）")
+    else:
+        print("  最終checkpoint: なし（要API照合）")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+API呼び出しのペース配分（トークンバケット + 使用率ヘッダーでの自動調整）
+
+Graph API は応答ヘッダーで使用率（上限に対する%）を返す:
+- X-App-Usage: {"call_count": 12, "total_time": 3, "total_cputime": 2}
+- X-Business-Use-Case-Usage: {"<id>": [{"call_count": 40, ..., "estimated_time_to_regain_access": 0}]}
+
+レートは BASE_RATE_PER_SECOND から始め、使用率で上下させる:
+- LOW_USAGE_PERCENT 以下 → 応答ごとに RAMP_UP_FACTOR 倍ずつ上げる（上限は max_rate）
+- SOFT_LIMIT_PERCENT まで → そのまま（基準レートより遅ければ基準レートに戻す）
+- SOFT〜HARD_LIMIT_PERCENT → 基準レートから最低レートへなめらかに落とす
+- 上限到達・429 → 最低レートにして、回復までの目安時間があればその間は止める
+固定の sleep の代わりに、threads_api.request が呼び出しのたびに acquire / observe する。
+
+Graph API の制限は使用率（1時間あたりの呼び出し数・処理時間の%）で決まり、秒あたりの上限は
+公開されていない。そのため基準レートは「使用率ヘッダーがまだ無い最初の呼び出しでも
+1回の実行（数十回の呼び出し）が数秒で終わる」程度の 10/秒 にし、速くしてよいかは
+ヘッダーに決めさせる。上限と同時に流せる数は環境変数で変えられる
+（THREADS_API_MAX_RATE / THREADS_API_BURST。アプリの割り当てが大きい・小さいとき用）。
+"""
+
+import json
+import os
+import threading
+
+import threads_clock as clock
+
+BASE_RATE_PER_SECOND = 10.0  # 使用率が分かるまでのレート（減速もここから）
+MAX_RATE_PER_SECOND = 40.0  # 使用率が低いときに上げてよい上限（THREADS_API_MAX_RATE で変更）
+MIN_RATE_PER_SECOND = 0.2  # 上限間際のレート
+BURST = 5  # まとめて流せる呼び出し数（THREADS_API_BURST で変更）
+LOW_USAGE_PERCENT = 25  # これ以下ならレートを上げる
+RAMP_UP_FACTOR = 1.25  # 使用率が低い応答1回あたりの加速
+SOFT_LIMIT_PERCENT = 50  # これを超えたら減速を始める
+HARD_LIMIT_PERCENT = 90  # ここで最低レート
+THROTTLED_PAUSE_SECONDS = 60  # 429 で回復目安が分からないときの停止時間
+
+
+def usage_percent(headers):
+    """応答ヘッダーから使用率（%、最も逼迫しているもの）と回復までの秒数を取り出す
+
+    Returns:
+        tuple: (使用率 or None, 回復までの秒数)
+    """
+    usage = None
+    regain_seconds = 0
+
+    app = headers.get('X-App-Usage')
+    if app:
+        try:
+            values = json.loads(app)
+            usage = max([usage or 0] + [float(v) for v in values.values()])
+        except (ValueError, TypeError, AttributeError):
+            pass
+
+    business = headers.get('X-Business-Use-Case-Usage')
+    if business:
+        try:
+            for entries in json.loads(business).values():
+                for entry in entries:
+                    for key in ('call_count', 'total_time', 'total_cputime'):
+                        if key in entry:
+                            usage = max(usage or 0, float(entry[key]))
+                    regain_seconds = max(regain_seconds, float(entry.get('estimated_time_to_regain_access') or 0) * 60)
+        except (ValueError, TypeError, AttributeError):
+            pass
+
+    return usage, regain_seconds
+
+
+def _env_number(name, default):
+    """環境変数の正の数（未設定・不正なら default）"""
+    try:
+        value = float(os.getenv(name) or default)
+    except ValueError:
+        return default
+    return value if value > 0 else default
+
+
+class RateGovernor:
+    """スレッドセーフなトークンバケット（レートは使用率ヘッダーで変わる）"""
+
+    def __init__(self, max_rate=None, burst=None, base_rate=BASE_RATE_PER_SECOND):
+        self.max_rate = max_rate or _env_number('THREADS_API_MAX_RATE', MAX_RATE_PER_SECOND)
+        self.base_rate = min(base_rate, self.max_rate)
+        self.rate = self.base_rate
+        self.burst = burst or _env_number('THREADS_API_BURST', BURST)
+        self.usage = None
+        self._tokens = float(self.burst)
+        self._updated = clock.monotonic()
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        self._tokens = min(self.burst, self._tokens + max(0.0, now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self):
+        """1回分の呼び出し枠を取る（空いていなければ待つ）"""
+        while True:
+            with self._lock:
+                now = clock.monotonic()
+                if now < self._paused_until:
+                    wait = self._paused_until - now
+                else:
+                    self._refill(now)
+                    if self._tokens >= 1 - 1e-9:
+                        self._tokens = max(0.0, self._tokens - 1)
+                        return
+                    wait = (1 - self._tokens) / self.rate
+            clock.sleep(wait)
+
+    def observe(self, status_code, headers):
+        """応答を見てレートを調整"""
+        usage, regain_seconds = usage_percent(headers)
+        retry_after = headers.get('Retry-After')
+        if retry_after and retry_after.isdigit():
+            regain_seconds = max(regain_seconds, float(retry_after))
+        with self._lock:
+            now = clock.monotonic()
+            self._refill(now)
+
+            if usage is not None:
+                self.usage = usage
+                self.rate = self._rate_for(usage)
+
+            if status_code == 429 or (usage is not None and usage >= 100):
+                pause = regain_seconds or THROTTLED_PAUSE_SECONDS
+                self.rate = MIN_RATE_PER_SECOND
+                self._tokens = 0
+                self._paused_until = max(self._paused_until, now + pause)
+            elif regain_seconds:
+                self._paused_until = max(self._paused_until, now + regain_seconds)
+
+    def _rate_for(self, usage):
+        if usage <= LOW_USAGE_PERCENT:
+            return min(self.max_rate, max(self.rate, self.base_rate) * RAMP_UP_FACTOR)
+        if usage <= SOFT_LIMIT_PERCENT:
+            return max(self.rate, self.base_rate)
+        if usage >= HARD_LIMIT_PERCENT:
+            return MIN_RATE_PER_SECOND
+        # SOFT〜HARD の間は基準レートから線形に落とす
+        ratio = (usage - SOFT_LIMIT_PERCENT) / (HARD_LIMIT_PERCENT - SOFT_LIMIT_PERCENT)
+        return self.base_rate - (self.base_rate - MIN_RATE_PER_SECOND) * ratio
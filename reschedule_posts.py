@@ -8,6 +8,7 @@
 import csv
 import os
 from datetime import datetime, timedelta
+from slot_calendar import get_calendar
 
 # 設定
 MAX_POSTS_PER_DAY = 32
@@ -20,13 +21,8 @@ def _csv_path():
 INPUT_FILE = _csv_path()
 OUTPUT_FILE = INPUT_FILE
 
-# 30分間隔のスケジュール時刻（JST）
-SCHEDULE_TIMES = [
-    (8, 0), (8, 30), (9, 0), (9, 30), (10, 0), (10, 30), (11, 0), (11, 30),
-    (12, 0), (12, 30), (13, 0), (13, 30), (14, 0), (14, 30), (15, 0), (15, 30),
-    (16, 0), (16, 30), (17, 0), (17, 30), (18, 0), (18, 30), (19, 0), (19, 30),
-    (20, 0), (20, 30), (21, 0), (21, 30), (22, 0), (22, 30), (23, 0), (23, 30)
-]
+# 30分間隔のスケジュール時刻（JST）。slot_calendar.py の本番グリッドと共通
+SCHEDULE_TIMES = list(get_calendar('default').slots)
 
 
 def main():
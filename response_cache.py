@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+"""
+変化の遅い読み取りの応答キャッシュ（.state/http_cache.json）
+
+プロフィール・フォロワー数・タイムラインは実行のたびに同じ内容を取り直していた。
+ここでは用途ごとの有効期限（CACHE_TTLS）の間は手元の応答を返し、
+期限切れ後は ETag があれば If-None-Match 付きで問い合わせる（304 なら手元の応答を使い回す）。
+
+- 'timeline' は有効期限0（毎回問い合わせる）。重複判定に使うため古い内容は返さず、
+  変わっていなければ 304 で本文の転送だけを省く
+- 成功（200）の応答だけを保存する。エラーは保存しない
+- キーはパスとパラメータ（access_token を除く）。複数アカウント時は状態ディレクトリごとに分かれる
+- 書き込みはロックの中でファイルを読み直し、自分のキーだけを変えて保存する
+  （並行して取得するスレッドどうしで互いの書き込みを消さない）。一時ファイル名は書き込みごとに別
+
+使い方:
+- python3 response_cache.py         キャッシュの中身を表示
+- python3 response_cache.py clear   キャッシュを削除
+"""
+
+import hashlib
+import json
+import os
+import sys
+import tempfile
+import threading
+from datetime import datetime
+
+import threads_api
+import threads_clock as clock
+from threads_state import state_path
+
+CACHE_FILE = 'http_cache.json'
+
+# 用途ごとの有効期限（秒）。0 は毎回 ETag で確認
+CACHE_TTLS = {
+    'profile': 6 * 3600,
+    'followers': 3600,
+    'timeline': 0,
+}
+
+_lock = threading.Lock()  # 読み直し→変更→保存を1つずつにする
+
+
+class CachedResponse:
+    """キャッシュから返す応答（requests.Response の必要な部分だけ）"""
+
+    status_code = 200
+
+    def __init__(self, entry):
+        self.text = entry['body']
+        self.headers = {'ETag': entry['etag']} if entry.get('etag') else {}
+        self.from_cache = True
+
+    def json(self):
+        return json.loads(self.text)
+
+    def raise_for_status(self):
+        pass
+
+
+def load_cache():
+    """{キー: {path, etag, body, stored_at}}"""
+    path = state_path(CACHE_FILE)
+    if not path.exists():
+        return {}
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}  # 壊れていれば作り直す
+
+
+def save_cache(cache):
+    path = state_path(CACHE_FILE)
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=f'{path.name}.', suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(cache, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+def _put(key, entry):
+    """ロックの中でキャッシュを読み直し、key だけを entry にして保存する"""
+    with _lock:
+        cache = load_cache()
+        cache[key] = entry
+        save_cache(cache)
+
+
+def cache_key(path, params):
+    """パスとパラメータ（access_token を除く）のキー"""
+    params = sorted((k, str(v)) for k, v in (params or {}).items() if k != 'access_token')
+    return hashlib.sha256(json.dumps([path, params]).encode('utf-8')).hexdigest()[:32]
+
+
+def _age_seconds(entry, now):
+    return (now - datetime.fromisoformat(entry['stored_at'])).total_seconds()
+
+
+def cached_get(name, path, params=None):
+    """用途 name の有効期限つきで GET する
+
+    Returns:
+        CachedResponse（手元の応答を返したとき）または requests.Response
+    """
+    ttl = CACHE_TTLS[name]
+    now = clock.now()
+    cache = load_cache()
+    key = cache_key(path, params)
+    entry = cache.get(key)
+
+    if entry is not None and _age_seconds(entry, now) < ttl:
+        return CachedResponse(entry)
+
+    headers = {'If-None-Match': entry['etag']} if entry is not None and entry.get('etag') else None
+    response = threads_api.get(path, params=params, headers=headers)
+
+    if response.status_code == 304 and entry is not None:
+        entry['stored_at'] = now.isoformat()
+        _put(key, entry)
+        return CachedResponse(entry)
+
+    if response.status_code == 200:
+        _put(key, {
+            'name': name,
+            'path': path,
+            'etag': response.headers.get('ETag'),
+            'body': response.text,
+            'stored_at': now.isoformat(),
+        })
+    return response
+
+
+def invalidate(name):
+    """用途 name のキャッシュを捨てる（更新した直後など）"""
+    with _lock:
+        cache = load_cache()
+        kept = {key: entry for key, entry in cache.items() if entry.get('name') != name}
+        if len(kept) != len(cache):
+            save_cache(kept)
+
+
+def main():
+    if len(sys.argv) > 1 and sys.argv[1] == 'clear':
+        path = state_path(CACHE_FILE)
+        if path.exists():
+            path.unlink()
+        print("🗑  応答キャッシュを削除しました")
+        return
+
+    cache = load_cache()
+    now = clock.now()
+    print(f"応答キャッシュ: {len(cache)} 件")
+    for entry in sorted(cache.values(), key=lambda e: e['stored_at']):
+        age = _age_seconds(entry, now) / 60
+        etag = 'ETagあり' if entry.get('etag') else 'ETagなし'
+        print(f"  {entry['name']:<10} {entry['path']:<30} {age:6.0f}分前  {etag}  {len(entry['body']):,}B")
+
+
+if __name__ == '__main__':
+    main()
@@ -14,6 +14,7 @@ import sys
 from datetime import datetime, date
 from pathlib import Path
 import os
+from slot_calendar import get_calendar
 
 def default_csv_path() -> Path:
     env = os.getenv('CSV_FILE')
@@ -25,10 +26,7 @@ def default_csv_path() -> Path:
 CSV_PATH = default_csv_path()
 
 # night-heavy 25-slot ordering (ascending time)
-SLOTS25 = [
-    (8,30),(9,30),(11,0),(12,0),(13,0),(13,30),(14,0),(15,0),(15,30),(16,0),(16,30),
-    (17,0),(17,30),(18,0),(18,30),(19,0),(19,30),(20,0),(20,30),(21,0),(21,30),(22,0),(22,30),(23,0),(23,30)
-]
+SLOTS25 = list(get_calendar('night_heavy25').slots)
 
 DEFAULTS = [date(2025,11,11), date(2025,11,13), date(2025,11,15)]
 
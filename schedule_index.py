@@ -0,0 +1,226 @@
+#!/usr/bin/env python3
+"""
+スケジュールCSVの索引（SQLiteサイドカー）
+
+posts_schedule.csv を (日付, 時, 分) をキーにした SQLite 索引に変換しておき、
+スロット参照では該当行だけを読む。CSVが伸び続けても1回の参照コストは一定。
+
+再構築の条件:
+- CSVの mtime / サイズ が前回と同じ → そのまま使う
+- 変わっていたら SHA-256 を計算し、内容が同じなら mtime だけ更新
+- 内容が変わっていれば一時ファイルに作り直して置き換え（同時実行でも壊れない）
+
+使い方:
+- python3 schedule_index.py            索引を再構築して件数を表示
+"""
+
+import csv
+import hashlib
+import os
+import sqlite3
+import sys
+from datetime import datetime, timezone, timedelta
+from pathlib import Path
+
+from thread_parts import split_thread_parts
+from threads_state import state_path
+
+# JST タイムゾーン
+JST = timezone(timedelta(hours=9))
+
+# 索引フォーマットのバージョン（列を変えたら上げる）
+INDEX_VERSION = '1'
+
+
+def index_path_for(csv_path) -> Path:
+    """CSVに対応する索引ファイルのパス"""
+    return state_path(f'{Path(csv_path).stem}.idx.sqlite')
+
+
+def file_sha256(path) -> str:
+    """ファイルの SHA-256（16進）"""
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 16), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def _read_meta(conn):
+    try:
+        return dict(conn.execute('SELECT key, value FROM meta'))
+    except sqlite3.DatabaseError:
+        return {}
+
+
+def _build_index(csv_path, index_path, st, digest):
+    """CSVを1回だけ走査して索引を作り直す"""
+    tmp_path = index_path.with_name(f'{index_path.name}.{os.getpid()}.tmp')
+    if tmp_path.exists():
+        tmp_path.unlink()
+
+    conn = sqlite3.connect(tmp_path)
+    try:
+        conn.executescript("""
+            CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT);
+            CREATE TABLE rows (
+                seq INTEGER PRIMARY KEY,
+                csv_id TEXT NOT NULL,
+                date TEXT NOT NULL,
+                hour INTEGER NOT NULL,
+                minute INTEGER NOT NULL,
+                datetime TEXT NOT NULL,
+                text TEXT NOT NULL,
+                thread_text TEXT,
+                category TEXT,
+                subcategory TEXT,
+                hashtags TEXT
+            );
+        """)
+
+        records = []
+        with open(csv_path, 'r', encoding='utf-8') as f:
+            reader = csv.DictReader(f)
+            for seq, row in enumerate(reader):
+                csv_id = (row.get('id') or '').strip()
+                datetime_str = (row.get('datetime') or '').strip()
+                text = (row.get('text') or '').strip()
+
+                if not csv_id or not datetime_str or not text:
+                    continue
+
+                scheduled_at = datetime.strptime(datetime_str, '%Y-%m-%d %H:%M')
+                records.append((
+                    seq, csv_id, scheduled_at.strftime('%Y-%m-%d'),
+                    scheduled_at.hour, scheduled_at.minute, datetime_str, text,
+                    (row.get('thread_text') or '').strip(),
+                    (row.get('category') or '').strip(),
+                    (row.get('subcategory') or '').strip(),
+                    (row.get('hashtags') or '').strip(),
+                ))
+
+        conn.executemany('INSERT INTO rows VALUES (?,?,?,?,?,?,?,?,?,?,?)', records)
+        conn.execute('CREATE INDEX idx_slot ON rows (date, hour, minute)')
+        conn.executemany('INSERT INTO meta VALUES (?, ?)', [
+            ('version', INDEX_VERSION),
+            ('mtime_ns', str(st.st_mtime_ns)),
+            ('size', str(st.st_size)),
+            ('sha256', digest),
+        ])
+        conn.commit()
+    finally:
+        conn.close()
+
+    os.replace(tmp_path, index_path)
+    return len(records)
+
+
+def open_index(csv_path):
+    """最新の索引への接続を返す（必要なときだけ再構築）"""
+    csv_path = Path(csv_path)
+    index_path = index_path_for(csv_path)
+    st = csv_path.stat()
+
+    if index_path.exists():
+        conn = sqlite3.connect(index_path)
+        meta = _read_meta(conn)
+        if meta.get('version') == INDEX_VERSION:
+            if meta.get('mtime_ns') == str(st.st_mtime_ns) and meta.get('size') == str(st.st_size):
+                return conn
+
+            # mtime が変わっただけ（checkout直後など）なら内容で判定
+            digest = file_sha256(csv_path)
+            if meta.get('sha256') == digest:
+                conn.executemany('UPDATE meta SET value = ? WHERE key = ?', [
+                    (str(st.st_mtime_ns), 'mtime_ns'),
+                    (str(st.st_size), 'size'),
+                ])
+                conn.commit()
+                return conn
+        else:
+            digest = file_sha256(csv_path)
+        conn.close()
+    else:
+        digest = file_sha256(csv_path)
+
+    _build_index(csv_path, index_path, st, digest)
+    return sqlite3.connect(index_path)
+
+
+def _row_to_post(row):
+    seq, csv_id, datetime_str, text, thread_text, category, subcategory, hashtags = row
+
+    # scheduled_at をパース（タイムゾーン情報なし = JST として扱う）
+    scheduled_at = datetime.strptime(datetime_str, '%Y-%m-%d %H:%M').replace(tzinfo=JST)
+
+    # トピックリストを構築
+    topics = []
+    if category:
+        topics.append(category)
+    if subcategory:
+        topics.append(subcategory)
+
+    return {
+        'csv_id': csv_id,
+        'seq': seq,
+        'scheduled_at': scheduled_at,
+        'text': text,
+        'thread_text': thread_text or None,
+        'thread_parts': split_thread_parts(thread_text),
+        'topics': topics,
+        'hashtags': hashtags,
+    }
+
+
+def lookup_slot(csv_path, target_date, schedule_time):
+    """指定日・スロット（時, 分）の行だけを返す（CSV内の順序）"""
+    return lookup_slots(csv_path, target_date, [schedule_time])[tuple(schedule_time)]
+
+
+def lookup_slots(csv_path, target_date, schedule_times):
+    """指定日の複数スロットの行を1回の問い合わせでまとめて返す
+
+    Returns:
+        dict: {(時, 分): [行, ...]}（該当なしのスロットは空リスト）
+    """
+    result = {tuple(t): [] for t in schedule_times}
+    if not result:
+        return result
+
+    slot_keys = [h * 60 + m for h, m in result]
+    placeholders = ','.join('?' * len(slot_keys))
+    conn = open_index(csv_path)
+    try:
+        cur = conn.execute(
+            'SELECT hour, minute, seq, csv_id, datetime, text, thread_text, category, subcategory, hashtags '
+            f'FROM rows WHERE date = ? AND hour * 60 + minute IN ({placeholders}) ORDER BY seq',
+            (target_date.strftime('%Y-%m-%d'), *slot_keys),
+        )
+        for row in cur:
+            result[(row[0], row[1])].append(_row_to_post(row[2:]))
+        return result
+    finally:
+        conn.close()
+
+
+def main():
+    from threads_simple import resolve_csv_path
+
+    csv_path = sys.argv[1] if len(sys.argv) > 1 else resolve_csv_path()
+    index_path = index_path_for(csv_path)
+    if index_path.exists():
+        index_path.unlink()
+
+    conn = open_index(csv_path)
+    try:
+        count = conn.execute('SELECT COUNT(*) FROM rows').fetchone()[0]
+        days = conn.execute('SELECT COUNT(DISTINCT date) FROM rows').fetchone()[0]
+    finally:
+        conn.close()
+
+    print(f"✅ 索引を再構築しました: {index_path}")
+    print(f"   {count}行 / {days}日分")
+
+
+if __name__ == '__main__':
+    main()
@@ -7,20 +7,22 @@ Threads API 長期トークン取得スクリプト
 """
 
 import requests
+import re
 import sys
 import os
 from datetime import datetime, timedelta
 
+import threads_api
+
 def get_user_info(access_token):
     """アクセストークンからユーザー情報を取得"""
-    url = "https://graph.threads.net/v1.0/me"
     params = {
         "fields": "id,username",
         "access_token": access_token
     }
 
     print("📋 ユーザー情報を取得中...")
-    response = requests.get(url, params=params)
+    response = threads_api.get('me', params=params)
     response.raise_for_status()
 
     data = response.json()
@@ -36,7 +38,7 @@ def get_user_info(access_token):
 
 def exchange_for_long_lived_token(short_token, app_secret):
     """短期トークンを長期トークン（60日間有効）に交換"""
-    url = "https://graph.threads.net/access_token"
+    url = f"{re.sub(r'/v[0-9.]+$', '', threads_api.base_url())}/access_token"  # バージョンなしのパス
     params = {
         "grant_type": "th_exchange_token",
         "client_secret": app_secret,
@@ -44,7 +46,7 @@ def exchange_for_long_lived_token(short_token, app_secret):
     }
 
     print("\n🔄 長期トークンに交換中...")
-    response = requests.get(url, params=params)
+    response = threads_api.get(url, params=params)
     response.raise_for_status()
 
     data = response.json()
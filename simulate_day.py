@@ -0,0 +1,400 @@
+#!/usr/bin/env python3
+"""
+仮想時計で threads_simple.py の1日〜数週間分を再生するシミュレーター
+
+実際の投稿処理（投稿プラン・台帳・待ち行列・補完・事前作成・返信チェーン）を、
+仮想時計とメモリ上の Threads API で動かす。cron の遅延（ジッター）や実行のスキップも再現し、
+各投稿が「いつ・何分遅れで」公開されるか、取りこぼし・二重投稿がないかを数秒で確認できる。
+
+最終日の翌朝の最初の実行まで再生する（前日の最後のタームの持ち越しも確かめる）。
+実際のAPIは呼ばない。状態ファイルは一時ディレクトリに作る（.state/ には触れない）。
+
+使い方:
+  python3 simulate_day.py 2025-11-10                 1日分
+  python3 simulate_day.py 2025-11-10 --days 30       30日分
+  python3 simulate_day.py 2025-11-10 --jitter 15 --skip-rate 0.2 --seed 1
+  python3 simulate_day.py 2025-11-10 --csv data/new_schedule.csv --verbose
+  python3 simulate_day.py 2025-11-10 --lost-publish-rate 0.2 --listing-lag 10   公開の応答喪失・一覧の反映遅れ
+  python3 simulate_day.py --acceptance               cronが飛ぶシナリオの受け入れ確認（マージ前に実行）
+
+終了コード: 取りこぼし・二重投稿があれば 1（--acceptance は補完の遅れ・1回の実行時間が上限を超えても 1）
+"""
+
+import argparse
+import contextlib
+import io
+import itertools
+import json
+import os
+import random
+import sys
+import tempfile
+from collections import Counter
+from datetime import datetime, timedelta
+from urllib.parse import parse_qsl
+
+import threads_clock as clock
+from post_fingerprint import fingerprint
+from threads_clock import JST, VirtualClock
+
+ON_TIME_MINUTES = 15  # これ以内の遅れは定刻扱い（cron の判定幅と同じ）
+DRAIN_OFFSET_MINUTES = 15  # ターム間の実行（drain）はタームの15分後（ワークフローの 15,45 分のcron）
+IDLE_GAP_MINUTES = 60  # 実行がこれより空いている時間（夜間）は補完の遅れに数えない
+ACCEPTANCE_MAX_WAIT_MINUTES = 90  # 補完の遅れの上限（3ターム分。1回の実行で公開するのは1件なので、続けて飛ぶとその分遅れる）
+
+# 受け入れ確認のシナリオ（説明, 開始日, 日数, ジッター(分), スキップ率, シード, APIの障害）
+ACCEPTANCE_SCENARIOS = [
+    ('スキップ10%・ジッター5分・1日', '2025-11-10', 1, 5, 0.1, 3, None),
+    ('スキップ10%・7日', '2025-11-10', 7, 10, 0.1, 1, None),
+    ('スキップ20%・ジッター15分・7日', '2025-11-10', 7, 15, 0.2, 2, None),
+    ('スキップ30%・7日', '2025-11-17', 7, 10, 0.3, 4, None),
+    # 公開はされたが応答が失われ（半分は状態確認も失敗）、一覧への反映も遅れる
+    ('公開の応答喪失20%・反映遅れ10分・7日', '2025-11-10', 7, 10, 0.1, 5,
+     {'lost_publish_rate': 0.2, 'status_outage_rate': 0.5, 'listing_lag_minutes': 10}),
+]
+
+
+class _Response:
+    """requests.Response の必要な部分だけ"""
+
+    def __init__(self, payload, status_code=200):
+        self._payload = payload
+        self.status_code = status_code
+        self.text = json.dumps(payload, ensure_ascii=False)
+        self.headers = {}
+
+    def json(self):
+        return self._payload
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            import requests
+            raise requests.exceptions.HTTPError(f"{self.status_code}: {self._payload}", response=self)
+
+
+class SimulatedThreadsAPI:
+    """メモリ上の Threads API（コンテナ作成・状態確認・公開・最近の投稿/返信の取得・インサイト・バッチ）
+
+    faults で障害を再現できる:
+    - lost_publish_rate: 公開はされたが応答が失われる（ReadTimeout）確率
+    - status_outage_rate: 応答が失われたあと、そのコンテナの状態確認も（再試行を含めて）失敗する確率
+    - listing_lag_minutes: 公開から最近の投稿・返信の一覧に出るまでの遅れ（分）
+    """
+
+    def __init__(self, faults=None, seed=0):
+        self.containers = {}
+        self.posts = []  # 公開順
+        self._ids = itertools.count(1)
+        self.batch_calls = 0
+        self.faults = faults or {}
+        self.lost_responses = 0
+        self._fault_rng = random.Random(seed)
+
+    def request(self, method, url, params=None, data=None, **kwargs):
+        if method == 'GET':
+            return self.get(url, params=params)
+        return self.post(url, params=params, data=data)
+
+    def post(self, url, params=None, data=None, **kwargs):
+        data = data or {}
+        if 'batch' in data:
+            return self._batch(json.loads(data['batch']))
+
+        if url.endswith('/threads'):
+            container_id = f'sim_c{next(self._ids)}'
+            self.containers[container_id] = {'text': data.get('text'),
+                                             'reply_to_id': data.get('reply_to_id'),
+                                             'status': 'FINISHED'}
+            return _Response({'id': container_id})
+
+        if url.endswith('/threads_publish'):
+            container = self.containers.get(data.get('creation_id'))
+            if container is None or container['status'] != 'FINISHED':
+                return _Response({'error': {'message': 'invalid creation_id'}}, 400)
+            container['status'] = 'PUBLISHED'
+            post_id = f'sim_p{next(self._ids)}'
+            self.posts.append({'id': post_id, 'text': container['text'],
+                               'reply_to_id': container['reply_to_id'], 'published_at': clock.now()})
+            if self._fault_rng.random() < self.faults.get('lost_publish_rate', 0):
+                import requests
+                import threads_api
+                self.lost_responses += 1
+                if self._fault_rng.random() < self.faults.get('status_outage_rate', 0):
+                    container['outage'] = threads_api.MAX_RETRIES + 1
+                raise requests.exceptions.ReadTimeout('公開の応答が失われました（シミュレーション）')
+            return _Response({'id': post_id})
+
+        return _Response({'error': {'message': f'unknown endpoint {url}'}}, 404)
+
+    def _batch(self, batch):
+        """Graph API のバッチ（GETのみ）"""
+        self.batch_calls += 1
+        items = []
+        for entry in batch:
+            path, _, query = entry['relative_url'].partition('?')
+            response = self.get(path, params=dict(parse_qsl(query)))
+            items.append({'code': response.status_code, 'headers': [], 'body': json.dumps(response.json())})
+        return _Response(items)
+
+    def get(self, url, params=None, **kwargs):
+        params = params or {}
+        limit = int(params.get('limit', 25))
+        if url.endswith('/threads') or url.endswith('/replies'):
+            replies = url.endswith('/replies')
+            listed_until = clock.now() - timedelta(minutes=self.faults.get('listing_lag_minutes', 0))
+            found = [p for p in reversed(self.posts)
+                     if bool(p['reply_to_id']) == replies and p['published_at'] <= listed_until][:limit]
+            return _Response({'data': [
+                {'id': p['id'], 'text': p['text'], 'timestamp': p['published_at'].isoformat()} for p in found
+            ]})
+
+        if url.endswith('/threads_insights'):
+            return _Response({'data': [{'name': 'followers_count', 'values': [{'value': 3 * len(self.posts)}]}]})
+
+        if url.endswith('/insights'):
+            post_id = url.rsplit('/', 2)[-2]
+            post = next((p for p in self.posts if p['id'] == post_id), None)
+            if post is None:
+                return _Response({'error': {'message': f'unknown post {post_id}'}}, 400)
+            metrics = params.get('metric', '').split(',')
+            return _Response({'data': [{'name': m, 'values': [{'value': len(post['text'] or '') % 97}]}
+                                       for m in metrics if m]})
+
+        container = self.containers.get(url.rsplit('/', 1)[-1])
+        if container is not None:
+            if container.get('outage'):
+                import requests
+                container['outage'] -= 1
+                raise requests.exceptions.ConnectionError('状態確認に失敗しました（シミュレーション）')
+            return _Response({'status': container['status']})
+
+        return _Response({'error': {'message': f'unknown endpoint {url}'}}, 404)
+
+
+def cron_fire_times(start_date, days, schedule_times, jitter_minutes, skip_rate, rng):
+    """cron の実行時刻（遅延のみ・スキップあり）を返す（最後に最終日の翌朝の最初の実行を加える）
+
+    各タームの実行（'slot'）と、その15分後のターム間の実行（'drain'）の両方を作る。
+
+    Returns:
+        tuple: ([(実行時刻, 'slot' | 'drain'), ...]（時刻順）, スキップした回数)
+    """
+    fires = []
+    skipped = 0
+    for offset in range(days):
+        day = start_date + timedelta(days=offset)
+        for hour, minute in schedule_times:
+            slot_at = datetime(day.year, day.month, day.day, hour, minute, tzinfo=JST)
+            for kind, at in (('slot', slot_at), ('drain', slot_at + timedelta(minutes=DRAIN_OFFSET_MINUTES))):
+                if rng.random() < skip_rate:
+                    skipped += 1
+                    continue
+                fires.append((at + timedelta(seconds=rng.uniform(0, jitter_minutes * 60)), kind))
+
+    # 翌朝の最初の実行（前日から持ち越した分はここで公開される）
+    if schedule_times:
+        day = start_date + timedelta(days=days)
+        hour, minute = schedule_times[0]
+        slot_at = datetime(day.year, day.month, day.day, hour, minute, tzinfo=JST)
+        fires.append((slot_at + timedelta(seconds=rng.uniform(0, jitter_minutes * 60)), 'slot'))
+    return sorted(fires), skipped
+
+
+def simulate(csv_path, start_date, days, jitter_minutes, skip_rate, seed, verbose=False, faults=None):
+    """シミュレーションを実行して結果を返す（faults は SimulatedThreadsAPI を参照）"""
+    import threads_simple
+    import schedule_index
+    from threads_state import current_account
+
+    rng = random.Random(seed)
+    api = SimulatedThreadsAPI(faults, seed)
+    fires, skipped = cron_fire_times(start_date, days, threads_simple.SCHEDULE_TIMES,
+                                     jitter_minutes, skip_rate, rng)
+
+    virtual = VirtualClock(fires[0][0] if fires else datetime(start_date.year, start_date.month,
+                                                              start_date.day, tzinfo=JST))
+    previous_clock = clock.use_clock(virtual)
+    threads_simple.DRY_RUN = False
+    current_account.set({'name': 'simulation', 'access_token': 'sim', 'user_id': 'sim',
+                         'csv': csv_path, 'session': api})
+
+    longest_run = timedelta()
+    try:
+        for fire_at, kind in fires:
+            virtual.advance_to(fire_at)
+            started = clock.now()
+            log = io.StringIO()
+            with contextlib.redirect_stdout(sys.stdout if verbose else log):
+                if kind == 'drain':
+                    threads_simple.drain(clock.now())
+                else:
+                    threads_simple.main(clock.now())
+            longest_run = max(longest_run, clock.now() - started)
+    finally:
+        clock.use_clock(previous_clock)
+
+    # 期待される投稿（CSV）と実際に公開された投稿を突き合わせる
+    published_at = {}
+    for post in api.posts:
+        published_at.setdefault(fingerprint(post['text']), []).append(post['published_at'])
+
+    rows = []
+    expected_count = Counter()
+    for offset in range(days):
+        day = start_date + timedelta(days=offset)
+        by_term = schedule_index.lookup_slots(csv_path, day, threads_simple.SCHEDULE_TIMES)
+        for term in sorted(by_term):
+            for row in by_term[term]:
+                fp = fingerprint(row['text'])
+                expected_count[fp] += 1
+                expected_count.update(fingerprint(part) for part in row['thread_parts'])
+                times = published_at.get(fp, [])
+                # 同じ本文が別の日にもある場合は、予定時刻以降の公開を対応づける
+                at = next((t for t in times if t >= row['scheduled_at']), None)
+                # 予定後に最初に走った実行（スキップされたタームは次に走った実行で補完される）
+                first_run = next((f for f, _ in fires if f >= row['scheduled_at']), None)
+                idle = sum((b - a for (a, _), (b, _) in zip(fires, fires[1:])
+                            if first_run and at and first_run <= a and b <= at
+                            and b - a > timedelta(minutes=IDLE_GAP_MINUTES)), timedelta())
+                parts_missing = sum(1 for part in row['thread_parts'] if fingerprint(part) not in published_at)
+                rows.append({
+                    'csv_id': row['csv_id'],
+                    'scheduled_at': row['scheduled_at'],
+                    'published_at': at,
+                    'late_minutes': (at - row['scheduled_at']).total_seconds() / 60 if at else None,
+                    'run_wait_minutes': (at - first_run - idle).total_seconds() / 60 if at and first_run else None,
+                    'parts_missing': parts_missing,
+                    # 同じ本文が予定より前に公開済み（重複防止で意図的に投稿しない）
+                    'same_text_published': at is None and bool(times),
+                })
+
+    # 翌朝の最初のタームの分は公開されてよい（表には入れない）
+    next_day = start_date + timedelta(days=days)
+    for next_rows in schedule_index.lookup_slots(csv_path, next_day, threads_simple.SCHEDULE_TIMES[:1]).values():
+        for row in next_rows:
+            expected_count[fingerprint(row['text'])] += 1
+            expected_count.update(fingerprint(part) for part in row['thread_parts'])
+
+    return {
+        'rows': rows,
+        'runs': len(fires),
+        'longest_run_minutes': longest_run.total_seconds() / 60,
+        'skipped_runs': skipped,
+        'duplicates': sum(max(0, len(times) - expected_count[fp]) for fp, times in published_at.items()),
+        'api_posts': len(api.posts),
+        'lost_responses': api.lost_responses,
+    }
+
+
+def print_report(result, verbose=False):
+    rows = result['rows']
+    published = [r for r in rows if r['published_at']]
+    missed = [r for r in rows if not r['published_at'] and not r['same_text_published']]
+    same_text = [r for r in rows if r['same_text_published']]
+    late = [r for r in published if r['late_minutes'] > ON_TIME_MINUTES]
+    broken_chains = [r for r in published if r['parts_missing']]
+
+    print("\n" + "=" * 70)
+    print(f"{'ID':<10} {'予定':<17} {'公開':<17} {'遅れ':>8}")
+    print("-" * 70)
+    for r in rows:
+        if not verbose and r in published and r not in late and not r['parts_missing']:
+            continue
+        if r['published_at']:
+            at = r['published_at'].strftime('%Y-%m-%d %H:%M')
+        else:
+            at = '（同じ本文が公開済み）' if r['same_text_published'] else '（未公開）'
+        delay = f"{r['late_minutes']:.0f}分" if r['published_at'] else '-'
+        chain = f"  返信{r['parts_missing']}件欠け" if r['parts_missing'] else ''
+        print(f"{r['csv_id']:<10} {r['scheduled_at'].strftime('%Y-%m-%d %H:%M'):<17} {at:<17} {delay:>8}{chain}")
+
+    print("=" * 70)
+    print(f"cron実行: {result['runs']} 回（スキップ {result['skipped_runs']} 回、最長 {result['longest_run_minutes']:.1f}分）")
+    print(f"予定: {len(rows)} 件 / 公開: {len(published)} 件 / 未公開: {len(missed)} 件")
+    if same_text:
+        print(f"同じ本文が公開済みのため投稿せず: {len(same_text)} 件（{', '.join(r['csv_id'] for r in same_text)}）")
+    if published:
+        delays = sorted(r['late_minutes'] for r in published)
+        print(f"遅れ: 平均 {sum(delays) / len(delays):.1f}分 / 中央値 {delays[len(delays) // 2]:.1f}分 / "
+              f"最大 {delays[-1]:.1f}分（{ON_TIME_MINUTES}分超: {len(late)} 件）")
+    print(f"返信チェーンの欠け: {len(broken_chains)} 件")
+    if result['lost_responses']:
+        print(f"公開の応答喪失: {result['lost_responses']} 回")
+    print(f"二重投稿: {result['duplicates']} 件")
+
+
+def run_acceptance(csv_path):
+    """cronが飛ぶシナリオをまとめて再生し、全件公開・二重投稿なし・補完の遅れが上限内かを確かめる
+
+    補完の遅れ = 予定後に最初に走った実行から公開までの時間（実行の無い夜間は除く。
+    最後のタームの分が翌朝に持ち越されても、翌朝の実行で公開されれば遅れは小さい）。
+
+    Returns:
+        bool: 全シナリオが合格なら True
+    """
+    import threads_simple
+
+    limit = ACCEPTANCE_MAX_WAIT_MINUTES
+    run_limit = threads_simple.RUN_TIME_BUDGET_SECONDS / 60
+    print(f"{'シナリオ':<28} {'予定':>5} {'未公開':>6} {'二重':>4} {'返信欠け':>8} {'補完の遅れ(最大)':>16} {'実行(最長)':>10}")
+    print("-" * 90)
+    passed = True
+    for name, start, days, jitter, skip_rate, seed, faults in ACCEPTANCE_SCENARIOS:
+        with tempfile.TemporaryDirectory() as state_dir:
+            os.environ['THREADS_STATE_DIR'] = state_dir
+            result = simulate(csv_path, datetime.strptime(start, '%Y-%m-%d').date(), days, jitter, skip_rate, seed,
+                              faults=faults)
+        rows = result['rows']
+        missed = sum(1 for r in rows if not r['published_at'] and not r['same_text_published'])
+        broken = sum(1 for r in rows if r['published_at'] and r['parts_missing'])
+        wait = max((r['run_wait_minutes'] for r in rows if r['run_wait_minutes'] is not None), default=0)
+        longest = result['longest_run_minutes']
+        ok = (not missed and not result['duplicates'] and not broken and wait <= limit
+              and longest <= run_limit)
+        passed = passed and ok
+        print(f"{name:<28} {len(rows):>5} {missed:>6} {result['duplicates']:>4} {broken:>8} "
+              f"{wait:>13.1f}分 {longest:>8.1f}分 {'✓' if ok else '✗'}")
+    print(f"\n補完の遅れの上限: {limit:.0f}分（予定後に最初に走った実行から公開まで、夜間を除く）")
+    print(f"1回の実行の上限: {run_limit:.0f}分（threads_simple.RUN_TIME_BUDGET_SECONDS）")
+    print("✅ 受け入れ確認に合格" if passed else "❌ 受け入れ確認に不合格")
+    return passed
+
+
+def main():
+    parser = argparse.ArgumentParser(description='threads_simple.py を仮想時計で再生')
+    parser.add_argument('start', nargs='?', help='開始日 YYYY-MM-DD')
+    parser.add_argument('--days', type=int, default=1, help='日数（既定: 1）')
+    parser.add_argument('--csv', default='data/posts_schedule.csv', help='スケジュールCSV')
+    parser.add_argument('--jitter', type=float, default=10, help='cronの最大遅延（分、既定: 10）')
+    parser.add_argument('--skip-rate', type=float, default=0.0, help='cronがスキップされる確率（既定: 0）')
+    parser.add_argument('--seed', type=int, default=0, help='乱数シード（既定: 0）')
+    parser.add_argument('--lost-publish-rate', type=float, default=0.0, help='公開の応答が失われる確率（既定: 0）')
+    parser.add_argument('--status-outage-rate', type=float, default=0.0,
+                        help='応答が失われたあと状態確認も失敗する確率（既定: 0）')
+    parser.add_argument('--listing-lag', type=float, default=0.0, help='一覧への反映の遅れ（分、既定: 0）')
+    parser.add_argument('--verbose', action='store_true', help='各実行のログと全投稿を表示')
+    parser.add_argument('--acceptance', action='store_true', help='cronが飛ぶシナリオの受け入れ確認')
+    args = parser.parse_args()
+
+    if args.acceptance:
+        sys.exit(0 if run_acceptance(args.csv) else 1)
+    if args.start is None:
+        parser.error('開始日を指定してください（または --acceptance）')
+
+    start_date = datetime.strptime(args.start, '%Y-%m-%d').date()
+
+    with tempfile.TemporaryDirectory() as state_dir:
+        os.environ['THREADS_STATE_DIR'] = state_dir
+        faults = {'lost_publish_rate': args.lost_publish_rate, 'status_outage_rate': args.status_outage_rate,
+                  'listing_lag_minutes': args.listing_lag}
+        result = simulate(args.csv, start_date, args.days, args.jitter, args.skip_rate, args.seed,
+                          verbose=args.verbose, faults=faults)
+
+    print_report(result, verbose=args.verbose)
+
+    if result['duplicates'] or any(not r['published_at'] and not r['same_text_published'] for r in result['rows']):
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+"""
+投稿スロットの暦（全スクリプト共通）
+
+スロットのグリッド（(時, 分) のリスト）を1日1440分の表にコンパイルしておき、
+「この時刻はどのタームか」「次・前のタームはどれか」を O(1) で引く。
+グリッドはここにだけ定義し、投稿スクリプト・生成スクリプト・調整スクリプトはすべて
+get_calendar(名前) から同じコンパイル済みの暦を使う。
+
+使い方:
+- python3 slot_calendar.py             グリッドの一覧を表示
+- python3 slot_calendar.py 8:14        各グリッドで 8:14 がどのタームか表示
+"""
+
+import sys
+
+MINUTES_PER_DAY = 24 * 60
+MATCH_WINDOW_MINUTES = 15  # GitHub Actions の cron の遅れを吸収する判定幅（±分）
+
+
+def _every_30_minutes(first_hour, last_hour):
+    return [(h, m) for h in range(first_hour, last_hour + 1) for m in (0, 30)]
+
+
+# スロットのグリッド
+GRIDS = {
+    # 本番: 30分間隔で8:00~23:30（32枠）
+    'default': _every_30_minutes(8, 23),
+    # 1日12枠（generate_compact_day.py）
+    'compact12': [
+        (8, 0), (9, 30), (11, 0), (12, 30), (14, 0), (15, 30),
+        (17, 0), (18, 30), (20, 0), (21, 0), (22, 0), (23, 30),
+    ],
+    # 1日25枠・夜厚め（retime_night_heavy.py）
+    'night_heavy25': [
+        (8, 30), (9, 30), (11, 0), (12, 0), (13, 0), (13, 30), (14, 0), (15, 0), (15, 30), (16, 0), (16, 30),
+        (17, 0), (17, 30), (18, 0), (18, 30), (19, 0), (19, 30), (20, 0), (20, 30), (21, 0), (21, 30),
+        (22, 0), (22, 30), (23, 0), (23, 30),
+    ],
+    # 1日25枠（generate_week_experiment.py）
+    'week25': [
+        (8, 0), (8, 30), (9, 0), (9, 30), (11, 0),
+        (12, 0), (13, 0), (14, 0), (14, 30), (15, 0),
+        (15, 30), (16, 0), (16, 30), (18, 0), (18, 30),
+        (19, 0), (19, 30), (20, 0), (20, 30), (21, 0),
+        (21, 30), (22, 0), (22, 30), (23, 0), (23, 30),
+    ],
+}
+
+
+class SlotCalendar:
+    """コンパイル済みの暦（分 → ターム、次/前のターム）"""
+
+    def __init__(self, slots, window=MATCH_WINDOW_MINUTES):
+        self.slots = tuple(sorted({(int(h), int(m)) for h, m in slots}))
+        self.window = window
+        self._index = {slot: i for i, slot in enumerate(self.slots)}
+
+        minutes = [h * 60 + m for h, m in self.slots]
+
+        # 分 → ±window 以内で最も近いターム（同じ距離なら早い方）。最初のタームより前は該当なし
+        self._nearest = [None] * MINUTES_PER_DAY
+        distance = [None] * MINUTES_PER_DAY
+        first = minutes[0] if minutes else MINUTES_PER_DAY
+        for i, slot_minute in enumerate(minutes):
+            for minute in range(max(first, slot_minute - window), min(MINUTES_PER_DAY, slot_minute + window + 1)):
+                d = abs(minute - slot_minute)
+                if distance[minute] is None or d < distance[minute]:
+                    distance[minute] = d
+                    self._nearest[minute] = i
+
+        # 分 → その分以降で最初のターム / その分より前で最後のターム
+        self._next = [None] * (MINUTES_PER_DAY + 1)
+        i = len(minutes)
+        for minute in range(MINUTES_PER_DAY - 1, -1, -1):
+            while i > 0 and minutes[i - 1] >= minute:
+                i -= 1
+            self._next[minute] = i if i < len(minutes) else None
+
+        self._prev = [None] * MINUTES_PER_DAY
+        i = -1
+        for minute in range(MINUTES_PER_DAY):
+            while i + 1 < len(minutes) and minutes[i + 1] < minute:
+                i += 1
+            self._prev[minute] = i if i >= 0 else None
+
+    def __len__(self):
+        return len(self.slots)
+
+    def __iter__(self):
+        return iter(self.slots)
+
+    def slot_at(self, hour, minute):
+        """その時刻が該当するターム（±window 以内で最も近いもの、なければNone）"""
+        i = self._nearest[hour * 60 + minute]
+        return None if i is None else self.slots[i]
+
+    def next_slot(self, hour, minute, inclusive=True):
+        """その時刻以降（inclusive=False なら後）で最初のターム（当日になければNone）"""
+        i = self._next[hour * 60 + minute + (0 if inclusive else 1)]
+        return None if i is None else self.slots[i]
+
+    def previous_slot(self, hour, minute):
+        """その時刻より前で最後のターム（なければNone）"""
+        i = self._prev[hour * 60 + minute]
+        return None if i is None else self.slots[i]
+
+    def slots_before(self, slot):
+        """slot より前の全ターム（古い順）"""
+        i = self._next[slot[0] * 60 + slot[1]]
+        return list(self.slots[:len(self.slots) if i is None else i])
+
+    def slots_between(self, start, end):
+        """start < ターム <= end の全ターム（(時, 分) で指定、古い順）"""
+        first = self._next[start[0] * 60 + start[1] + 1]
+        if first is None:
+            return []
+        return [slot for slot in self.slots[first:] if slot <= tuple(end)]
+
+    def index(self, slot):
+        """ターム番号（0始まり、グリッドに無ければ ValueError）"""
+        try:
+            return self._index[tuple(slot)]
+        except KeyError:
+            raise ValueError(f"グリッドに無いタームです: {slot}") from None
+
+
+_compiled = {}
+
+
+def get_calendar(name='default'):
+    """名前付きグリッドのコンパイル済みの暦（プロセス内で1回だけコンパイル）"""
+    if name not in _compiled:
+        if name not in GRIDS:
+            raise KeyError(f"未知のグリッドです: {name}（{', '.join(GRIDS)}）")
+        _compiled[name] = SlotCalendar(GRIDS[name])
+    return _compiled[name]
+
+
+def main():
+    if len(sys.argv) > 1:
+        hour, minute = (int(x) for x in sys.argv[1].split(':'))
+        for name in GRIDS:
+            slot = get_calendar(name).slot_at(hour, minute)
+            label = f"{slot[0]}:{slot[1]:02d}" if slot else 'なし'
+            print(f"{name:<14} {hour}:{minute:02d} → {label}")
+        return
+
+    for name, slots in GRIDS.items():
+        cal = get_calendar(name)
+        print(f"{name:<14} {len(cal)}枠  {cal.slots[0][0]}:{cal.slots[0][1]:02d}〜"
+              f"{cal.slots[-1][0]}:{cal.slots[-1][1]:02d}")
+
+
+if __name__ == '__main__':
+    main()
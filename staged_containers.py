@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+事前作成したコンテナの置き場（.state/staged_containers.json）
+
+スケジュール時刻の少し前にコンテナ（creation_id）を作っておき、
+時刻になったら threads_publish だけを呼ぶ。
+
+無効化の条件:
+- 作成から CONTAINER_TTL_SECONDS を過ぎた（APIの失効より前に捨てる）
+- CSVの本文・トピックが作成時から変わった（指紋が一致しない）
+- 予定時刻を STALE_AFTER_SECONDS 以上過ぎても使われなかった
+
+公開されなかったコンテナはAPI側で失効するため、ここでは台帳から外すだけ。
+
+使い方:
+- python3 staged_containers.py         事前作成済みのコンテナを表示
+"""
+
+import json
+import os
+from datetime import datetime, timezone, timedelta
+
+from threads_state import state_path
+
+# JST タイムゾーン
+JST = timezone(timedelta(hours=9))
+
+STAGED_FILE = 'staged_containers.json'
+CONTAINER_TTL_SECONDS = 12 * 3600  # 公開されないコンテナは24時間で失効するので余裕を見て12時間
+STALE_AFTER_SECONDS = 3 * 3600  # 予定時刻をこれだけ過ぎたら使わない
+
+
+def load_staged():
+    """{csv_id: {fingerprint, topic, creation_id, created_at, scheduled_at}}"""
+    path = state_path(STAGED_FILE)
+    if not path.exists():
+        return {}
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def save_staged(staged):
+    path = state_path(STAGED_FILE)
+    tmp_path = path.with_name(f'{path.name}.{os.getpid()}.tmp')
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(staged, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, path)
+
+
+def _is_expired(entry, now):
+    created_at = datetime.fromisoformat(entry['created_at'])
+    scheduled_at = datetime.fromisoformat(entry['scheduled_at'])
+    return ((now - created_at).total_seconds() > CONTAINER_TTL_SECONDS or
+            (now - scheduled_at).total_seconds() > STALE_AFTER_SECONDS)
+
+
+def prune_staged(staged, now):
+    """失効・期限切れのコンテナを外す
+
+    Returns:
+        list: 外した csv_id
+    """
+    removed = [csv_id for csv_id, entry in staged.items() if _is_expired(entry, now)]
+    for csv_id in removed:
+        del staged[csv_id]
+    return removed
+
+
+def is_staged(staged, csv_id, fp, topic, now):
+    """同じ内容のコンテナが有効なまま残っているか"""
+    entry = staged.get(csv_id)
+    return (entry is not None and entry['fingerprint'] == fp and
+            entry.get('topic') == topic and not _is_expired(entry, now))
+
+
+def add_staged(staged, csv_id, fp, topic, creation_id, scheduled_at, now):
+    staged[csv_id] = {
+        'fingerprint': fp,
+        'topic': topic,
+        'creation_id': creation_id,
+        'created_at': now.isoformat(timespec='seconds'),
+        'scheduled_at': scheduled_at.isoformat(),
+    }
+
+
+def take_staged(staged, csv_id, fp, topic, now):
+    """有効なコンテナがあれば取り出して creation_id を返す（内容が変わっていれば破棄してNone）"""
+    entry = staged.pop(csv_id, None)
+    if entry is None:
+        return None
+    if entry['fingerprint'] != fp or entry.get('topic') != topic:
+        print(f"  ⚠️  事前作成したコンテナは内容が変わったため破棄 ({entry['creation_id']})")
+        return None
+    if _is_expired(entry, now):
+        print(f"  ⚠️  事前作成したコンテナは期限切れのため破棄 ({entry['creation_id']})")
+        return None
+    return entry['creation_id']
+
+
+def main():
+    staged = load_staged()
+    now = datetime.now(JST)
+    print(f"事前作成コンテナ: {state_path(STAGED_FILE)}")
+    if not staged:
+        print("  （なし）")
+    for csv_id, entry in sorted(staged.items(), key=lambda kv: kv[1]['scheduled_at']):
+        status = '期限切れ' if _is_expired(entry, now) else '有効'
+        print(f"  [{csv_id}] 予定 {entry['scheduled_at'][:16]} / 作成 {entry['created_at'][:16]} / "
+              f"{entry['creation_id']}（{status}）")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,365 @@
+#!/usr/bin/env python3
+"""
+Threads API のローカル代役サーバー（オフラインでの動作確認・ベンチマーク用）
+
+このプロジェクトが使うエンドポイントだけをメモリ上で再現する:
+- GET  /me                              ユーザー情報
+- GET  /{user}                          プロフィール / POST /{user} で自己紹介を更新
+- GET  /{user}/threads, /{user}/replies 投稿・返信の一覧（limit / after でページ送り、paging.next 付き）
+- POST /{user}/threads                  コンテナ作成（--processing-ms の間は IN_PROGRESS）
+- POST /{user}/threads_publish          公開
+- GET  /{container_id}                  コンテナの状態
+- GET  /{post_id}/insights              投稿のインサイト
+- GET  /{user}/threads_insights         フォロワー数
+- DELETE /{post_id}                     削除
+- POST /（batch=...）                   バッチリクエスト（--no-batch なら 400 で断る）
+- GET  /access_token                    長期トークンへの交換
+
+遅延・エラー率・レート制限（429 と X-App-Usage）・ページの大きさを指定できる。
+X-App-Usage は実APIと同じく毎回返す（レート制限なしのときは使用率1%）。
+GET の応答には ETag を付け、If-None-Match が一致すれば 304 を返す。
+GET /__stats でエンドポイント別の呼び出し回数を返す（ベンチマーク用）。
+
+使い方:
+  python3 stub_server.py --port 8799 --posts 200 --latency-ms 80 --error-rate 0.05 --rate-limit 200
+  THREADS_API_BASE_URL=http://127.0.0.1:8799/v1.0 python3 threads_simple.py --dry-run
+
+アクセストークンは何でも通る（無いときだけ 400）。
+"""
+
+import argparse
+import hashlib
+import itertools
+import json
+import random
+import threading
+import time
+from collections import Counter, deque
+from datetime import datetime, timezone, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl, urlencode, urlsplit
+
+STUB_USER_ID = '1000'
+STUB_USERNAME = 'stub_user'
+MAX_PAGE_SIZE = 100
+INSIGHT_METRICS = ('views', 'likes', 'replies', 'reposts', 'quotes')
+
+
+def _graph_time(at):
+    """Graph API の時刻表記（2025-11-10T08:00:00+0000）"""
+    return at.astimezone(timezone.utc).strftime('%Y-%m-%dT%H:%M:%S+0000')
+
+
+class StubThreadsAPI:
+    """代役サーバーの状態と処理（HTTPから切り離してあるので直接呼んでもよい）"""
+
+    def __init__(self, posts=0, latency_ms=0, jitter_ms=0, error_rate=0.0, rate_limit=0,
+                 rate_window=60, page_size=MAX_PAGE_SIZE, processing_ms=0, seed=None, batch=True):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.rate_limit = rate_limit
+        self.rate_window = rate_window
+        self.page_size = page_size
+        self.processing_ms = processing_ms
+        self.batch = batch
+        self.rng = random.Random(seed)
+
+        self.posts = []  # 新しい順
+        self.containers = {}
+        self.biography = ''
+        self.stats = Counter()
+        self._calls = deque()  # レート制限の窓に入っている呼び出し時刻
+        self._ids = itertools.count(10_000)
+        self._lock = threading.Lock()
+
+        now = datetime.now(timezone.utc)
+        for i in range(posts):
+            self.posts.append(self._new_post(f"代役の投稿 {posts - i}", None, now - timedelta(minutes=30 * i)))
+
+    def _new_post(self, text, reply_to_id, at):
+        return {'id': str(next(self._ids)), 'text': text, 'reply_to_id': reply_to_id,
+                'timestamp': _graph_time(at), 'permalink': f'https://www.threads.net/@{STUB_USERNAME}/post/stub'}
+
+    # ---- 入口 ----
+
+    def handle(self, method, path, params, data, base_url=''):
+        """1回のHTTP呼び出しを処理する
+
+        Returns:
+            tuple: (ステータス, 本文のdict, 追加ヘッダーのdict)
+        """
+        if self.latency_ms or self.jitter_ms:
+            time.sleep((self.latency_ms + self.rng.uniform(0, self.jitter_ms)) / 1000)
+
+        with self._lock:
+            endpoint = self._endpoint_name(method, path)
+            if endpoint == '__stats':
+                return 200, dict(self.stats), {}
+            self.stats[endpoint] += 1
+
+            throttled, headers = self._rate_limit_check()
+            if throttled:
+                self.stats['429'] += 1
+                return 429, {'error': {'message': 'Application request limit reached', 'code': 4}}, headers
+            if self.error_rate and self.rng.random() < self.error_rate:
+                self.stats['5xx'] += 1
+                return 503, {'error': {'message': 'Service temporarily unavailable', 'code': 2}}, headers
+
+            if 'access_token' not in params and 'access_token' not in data:
+                return 400, {'error': {'message': 'An access token is required', 'code': 190}}, headers
+
+            status, payload = self._dispatch(method, path, params, data, base_url)
+            return status, payload, headers
+
+    def _endpoint_name(self, method, path):
+        parts = [p for p in path.split('/') if p]
+        if not parts:
+            return f'{method} batch'
+        if parts[0] == '__stats':
+            return '__stats'
+        tail = parts[-1] if len(parts) > 1 else ('me' if parts[0] == 'me' else 'node')
+        return f'{method} {tail}'
+
+    def _rate_limit_check(self):
+        """レート制限の窓を更新し、(429にするか, 使用率ヘッダー) を返す"""
+        if not self.rate_limit:
+            return False, {'X-App-Usage': json.dumps({'call_count': 1, 'total_time': 1, 'total_cputime': 1})}
+        now = time.monotonic()
+        while self._calls and self._calls[0] <= now - self.rate_window:
+            self._calls.popleft()
+        if len(self._calls) >= self.rate_limit:
+            retry_after = max(1, int(self._calls[0] + self.rate_window - now + 1))
+            usage = {'call_count': 100, 'total_time': 100, 'total_cputime': 100}
+            return True, {'X-App-Usage': json.dumps(usage), 'Retry-After': str(retry_after)}
+        self._calls.append(now)
+        percent = int(len(self._calls) * 100 / self.rate_limit)
+        usage = {'call_count': percent, 'total_time': percent // 2, 'total_cputime': percent // 2}
+        return False, {'X-App-Usage': json.dumps(usage)}
+
+    # ---- エンドポイント ----
+
+    def _dispatch(self, method, path, params, data, base_url):
+        parts = [p for p in path.split('/') if p]
+
+        if not parts:
+            if method == 'POST' and 'batch' in data:
+                if not self.batch:
+                    return 400, {'error': {'message': 'Unsupported post request', 'code': 100}}
+                return 200, self._batch(json.loads(data['batch']), data, base_url)
+            return 404, {'error': {'message': 'unknown endpoint'}}
+
+        if parts == ['access_token']:
+            return 200, {'access_token': f'stub-long-lived-{next(self._ids)}', 'token_type': 'bearer',
+                         'expires_in': 60 * 24 * 3600}
+
+        node = STUB_USER_ID if parts[0] == 'me' else parts[0]
+        edge = parts[1] if len(parts) > 1 else None
+
+        if edge in ('threads', 'replies') and method == 'GET':
+            return 200, self._list(path, params, base_url, replies=edge == 'replies')
+        if edge == 'threads' and method == 'POST':
+            return self._create_container(data)
+        if edge == 'threads_publish' and method == 'POST':
+            return self._publish(data)
+        if edge == 'insights':
+            return self._insights(node, params)
+        if edge == 'threads_insights':
+            return 200, {'data': [{'name': 'followers_count', 'title': 'followers_count',
+                                   'total_value': {'value': 3 * len(self.posts)},
+                                   'values': [{'value': 3 * len(self.posts)}]}]}
+        if edge is None:
+            return self._node(method, node, params, data)
+        return 404, {'error': {'message': f'unknown endpoint {path}'}}
+
+    def _node(self, method, node, params, data):
+        if node == STUB_USER_ID:
+            if method == 'POST':
+                self.biography = data.get('biography', self.biography)
+                return 200, {'success': True}
+            profile = {'id': STUB_USER_ID, 'username': STUB_USERNAME, 'name': 'Stub User',
+                       'threads_profile_picture_url': '', 'threads_biography': self.biography}
+            return 200, self._pick(profile, params)
+
+        if node in self.containers:
+            container = self.containers[node]
+            if container['status'] == 'IN_PROGRESS' and time.monotonic() >= container['ready_at']:
+                container['status'] = 'FINISHED'
+            return 200, {'id': node, 'status': container['status'], 'error_message': None}
+
+        post = self._find_post(node)
+        if post is None:
+            return 400, {'error': {'message': f'Unsupported request: object {node} does not exist', 'code': 100}}
+        if method == 'DELETE':
+            self.posts.remove(post)
+            return 200, {'success': True}
+        return 200, self._pick(post, params)
+
+    def _list(self, path, params, base_url, replies):
+        limit = min(int(params.get('limit') or 25), self.page_size)
+        offset = int(params.get('after') or 0)
+        found = [p for p in self.posts if bool(p['reply_to_id']) == replies]
+        page = found[offset:offset + limit]
+
+        result = {'data': [self._pick(p, params) for p in page]}
+        if page:
+            result['paging'] = {'cursors': {'before': str(offset), 'after': str(offset + len(page))}}
+            if offset + len(page) < len(found):
+                query = dict(params, after=str(offset + len(page)))
+                result['paging']['next'] = f"{base_url}{path}?{urlencode(query)}"
+        return result
+
+    def _create_container(self, data):
+        if not data.get('text'):
+            return 400, {'error': {'message': 'The parameter text is required', 'code': 100}}
+        container_id = str(next(self._ids))
+        ready = self.processing_ms <= 0
+        self.containers[container_id] = {
+            'text': data['text'],
+            'reply_to_id': data.get('reply_to_id'),
+            'status': 'FINISHED' if ready else 'IN_PROGRESS',
+            'ready_at': time.monotonic() + self.processing_ms / 1000,
+        }
+        return 200, {'id': container_id}
+
+    def _publish(self, data):
+        container = self.containers.get(data.get('creation_id'))
+        if container is None:
+            return 400, {'error': {'message': 'Invalid creation_id', 'code': 100}}
+        if container['status'] == 'IN_PROGRESS' and time.monotonic() >= container['ready_at']:
+            container['status'] = 'FINISHED'
+        if container['status'] != 'FINISHED':
+            return 400, {'error': {'message': f"Container is {container['status']}", 'code': 24}}
+        container['status'] = 'PUBLISHED'
+        post = self._new_post(container['text'], container['reply_to_id'], datetime.now(timezone.utc))
+        self.posts.insert(0, post)
+        return 200, {'id': post['id']}
+
+    def _insights(self, node, params):
+        post = self._find_post(node)
+        if post is None:
+            return 400, {'error': {'message': f'Unsupported request: object {node} does not exist', 'code': 100}}
+        seed = int(hashlib.sha256(post['id'].encode()).hexdigest()[:8], 16)
+        metrics = [m for m in (params.get('metric') or ','.join(INSIGHT_METRICS)).split(',') if m]
+        return 200, {'data': [{'name': m, 'period': 'lifetime',
+                               'values': [{'value': (seed >> (3 * i)) % (1000 if m == 'views' else 50)}]}
+                              for i, m in enumerate(metrics)]}
+
+    def _batch(self, batch, data, base_url):
+        items = []
+        for entry in batch:
+            path, _, query = entry.get('relative_url', '').partition('?')
+            params = dict(parse_qsl(query))
+            params.setdefault('access_token', data.get('access_token'))
+            status, payload = self._dispatch(entry.get('method', 'GET'), '/' + path, params, {}, base_url)
+            items.append({'code': status, 'headers': [{'name': 'Content-Type', 'value': 'application/json'}],
+                          'body': json.dumps(payload, ensure_ascii=False)})
+        return items
+
+    # ---- 補助 ----
+
+    def _find_post(self, post_id):
+        return next((p for p in self.posts if p['id'] == post_id), None)
+
+    @staticmethod
+    def _pick(obj, params):
+        fields = params.get('fields')
+        if not fields:
+            return {'id': obj['id']}
+        return {f: obj[f] for f in fields.split(',') if f in obj}
+
+
+def _make_handler(api, version_prefix):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'  # keep-alive（threads_api の接続プールを効かせる）
+
+        def _serve(self, method):
+            url = urlsplit(self.path)
+            path = url.path
+            if version_prefix and path.startswith(version_prefix):
+                path = path[len(version_prefix):] or '/'
+            params = dict(parse_qsl(url.query))
+            length = int(self.headers.get('Content-Length') or 0)
+            body = self.rfile.read(length).decode('utf-8') if length else ''
+            data = dict(parse_qsl(body)) if body else {}
+
+            base_url = f"http://{self.headers.get('Host')}{version_prefix}"
+            status, payload, headers = api.handle(method, path, params, data, base_url)
+            encoded = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+
+            etag = f'"{hashlib.md5(encoded).hexdigest()}"'
+            if method == 'GET' and status == 200 and self.headers.get('If-None-Match') == etag:
+                status, encoded = 304, b''
+
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(encoded)))
+            if method == 'GET' and status in (200, 304):
+                self.send_header('ETag', etag)
+            for name, value in headers.items():
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(encoded)
+
+        def do_GET(self):
+            self._serve('GET')
+
+        def do_POST(self):
+            self._serve('POST')
+
+        def do_DELETE(self):
+            self._serve('DELETE')
+
+        def log_message(self, format, *args):
+            pass  # 1件ずつのアクセスログは出さない
+
+    return Handler
+
+
+def start_server(api, host='127.0.0.1', port=0, version_prefix='/v1.0'):
+    """代役サーバーを別スレッドで起動する
+
+    Returns:
+        tuple: (サーバー, API_BASE_URL として使うURL)
+    """
+    server = ThreadingHTTPServer((host, port), _make_handler(api, version_prefix))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://{host}:{server.server_address[1]}{version_prefix}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Threads API のローカル代役サーバー')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8799)
+    parser.add_argument('--posts', type=int, default=0, help='最初から入れておく投稿数')
+    parser.add_argument('--latency-ms', type=float, default=0, help='応答の遅延（ミリ秒）')
+    parser.add_argument('--jitter-ms', type=float, default=0, help='遅延のばらつき（0〜指定ミリ秒を加算）')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='503 を返す確率')
+    parser.add_argument('--rate-limit', type=int, default=0, help='窓あたりの呼び出し上限（0で無制限）')
+    parser.add_argument('--rate-window', type=float, default=60, help='レート制限の窓（秒）')
+    parser.add_argument('--page-size', type=int, default=MAX_PAGE_SIZE, help='一覧の1ページの上限')
+    parser.add_argument('--processing-ms', type=float, default=0, help='コンテナが FINISHED になるまでの時間')
+    parser.add_argument('--seed', type=int, default=None, help='乱数シード')
+    parser.add_argument('--no-batch', action='store_true', help='バッチリクエストを受け付けない（400）')
+    args = parser.parse_args()
+
+    api = StubThreadsAPI(posts=args.posts, latency_ms=args.latency_ms, jitter_ms=args.jitter_ms,
+                         error_rate=args.error_rate, rate_limit=args.rate_limit, rate_window=args.rate_window,
+                         page_size=args.page_size, processing_ms=args.processing_ms, seed=args.seed,
+                         batch=not args.no_batch)
+    server, base_url = start_server(api, args.host, args.port)
+    print(f"🧪 代役サーバー起動: {base_url}")
+    print(f"   THREADS_API_BASE_URL={base_url} を設定して各スクリプトを実行（Ctrl+C で終了）")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+        print("\n📊 呼び出し回数:")
+        for name, count in sorted(api.stats.items(), key=lambda kv: -kv[1]):
+            print(f"  {name:<28} {count}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+thread_parts.split_thread_parts のテスト
+
+使い方:
+  python3 -m unittest discover tests
+"""
+
+import re
+import sys
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from thread_parts import THREADS_TEXT_LIMIT, split_thread_parts  # noqa: E402
+
+
+def _squash(text):
+    """空白を除いた本文（分割で落ちてよいのは境目の空白だけ）"""
+    return re.sub(r'\s+', '', text)
+
+
+class SplitThreadPartsTest(unittest.TestCase):
+    def assert_within_limit(self, parts):
+        for part in parts:
+            self.assertLessEqual(len(part), THREADS_TEXT_LIMIT)
+            self.assertEqual(part, part.strip())
+
+    def test_empty(self):
+        self.assertEqual(split_thread_parts(''), [])
+        self.assertEqual(split_thread_parts(None), [])
+
+    def test_separator_lines(self):
+        text = '1つ目。\n---\n2つ目。\n  ---  \n\n3つ目。\n---\n---\n'
+        self.assertEqual(split_thread_parts(text), ['1つ目。', '2つ目。', '3つ目。'])
+
+    def test_separator_must_be_whole_line(self):
+        text = 'A --- B\n---- C'
+        self.assertEqual(split_thread_parts(text), [text])
+
+    def test_short_part_kept_as_is(self):
+        text = '段落1。\n\n段落2。'
+        self.assertEqual(split_thread_parts(text), [text])
+
+    def test_paragraphs_packed_with_original_breaks(self):
+        first = 'あ' * 200 + '。'
+        second = 'い' * 200 + '。'
+        third = 'う' * 200 + '。'
+        parts = split_thread_parts(f'{first}\n\n{second}\n\n\n{third}')
+        self.assertEqual(parts, [f'{first}\n\n{second}', third])
+
+    def test_over_limit_paragraph_splits_at_sentences(self):
+        sentences = [f'{i}番目の文' + 'か' * 90 + '。' for i in range(8)]
+        paragraph = ''.join(sentences)
+        parts = split_thread_parts(paragraph)
+        self.assert_within_limit(parts)
+        self.assertGreater(len(parts), 1)
+        # 同じ段落の文のあいだに段落の区切りを入れない
+        for part in parts:
+            self.assertNotIn('\n', part)
+            self.assertTrue(part.endswith('。'))
+        self.assertEqual(''.join(parts), paragraph)
+
+    def test_over_limit_paragraph_keeps_neighbour_breaks(self):
+        head = '前の段落。'
+        long_paragraph = ''.join('え' * 99 + '。' for _ in range(6))
+        tail = '後の段落。'
+        parts = split_thread_parts(f'{head}\n\n{long_paragraph}\n\n{tail}')
+        self.assert_within_limit(parts)
+        self.assertTrue(parts[0].startswith(f'{head}\n\n'))
+        self.assertTrue(parts[-1].endswith(f'\n\n{tail}'))
+        self.assertEqual(_squash(''.join(parts)), _squash(head + long_paragraph + tail))
+
+    def test_over_limit_single_sentence_is_cut(self):
+        sentence = 'お' * (THREADS_TEXT_LIMIT * 2 + 10) + '。'
+        parts = split_thread_parts(sentence)
+        self.assertEqual([len(p) for p in parts], [THREADS_TEXT_LIMIT, THREADS_TEXT_LIMIT, 11])
+        self.assertEqual(''.join(parts), sentence)
+
+    def test_repeated_punctuation_is_kept(self):
+        sentences = ['き' * 200 + '。。', 'く' * 200 + '。。。', 'け' * 200 + '。', 'こ' * 100]
+        paragraph = ''.join(sentences)
+        parts = split_thread_parts(paragraph)
+        self.assert_within_limit(parts)
+        self.assertEqual(''.join(parts), paragraph)
+        self.assertEqual(parts[0], sentences[0] + sentences[1])
+
+    def test_leading_punctuation_is_kept(self):
+        paragraph = '。。' + 'さ' * 300 + '。' + 'し' * 300
+        parts = split_thread_parts(paragraph)
+        self.assert_within_limit(parts)
+        self.assertEqual(''.join(parts), paragraph)
+
+
+if __name__ == '__main__':
+    unittest.main()
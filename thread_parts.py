@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+thread_text（返信チェーン）のパート分割
+
+THREAD_PART_SEPARATOR だけの行でパートに分け、Threads の文字数上限を超えるパートは
+段落（空行）→ 文（。）の境目でさらに分ける。区切りの改行は元のまま残す。
+"""
+
+import re
+
+THREAD_PART_SEPARATOR = '---'  # thread_text の中でこの行だけの行を挟むと、そこで返信を分ける
+THREADS_TEXT_LIMIT = 500  # Threads の1投稿あたりの文字数上限
+_PARAGRAPH_BREAK = re.compile(r'(\n[^\S\n]*\n\s*)')  # 段落の区切り（空行。続く空白も区切りに含める）
+_SENTENCE = re.compile(r'[^。]+。*|。+')  # 1文（末尾の。の連なりまで）
+
+
+def _tokens(part, limit):
+    """part を (本文, 直後の区切り) の並びに分ける（順に繋ぐと part に戻る）
+
+    段落（空行）で分け、上限を超える段落は文（。の連なりまで）で、
+    上限を超える1文は機械的に limit 文字ごとに切る。
+    """
+    pieces = _PARAGRAPH_BREAK.split(part)
+    for paragraph, sep in zip(pieces[0::2], pieces[1::2] + ['']):
+        if len(paragraph) <= limit:
+            yield paragraph, sep
+            continue
+        sentences = _SENTENCE.findall(paragraph)
+        for j, sentence in enumerate(sentences):
+            tail = sep if j == len(sentences) - 1 else ''
+            slices = [sentence[i:i + limit] for i in range(0, len(sentence), limit)]
+            for k, piece in enumerate(slices):
+                yield piece, tail if k == len(slices) - 1 else ''
+
+
+def _pack(tokens, limit):
+    """(本文, 区切り) を元の区切りで繋ぎながら limit 文字以内のかたまりに詰める
+
+    かたまりの境目に来た区切りは捨て、各かたまりの前後の空白は落とす。
+    """
+    chunks = []
+    current = ''
+    pending = ''  # current の後ろに付く区切り（次の本文が同じかたまりに入るときだけ使う）
+    for piece, sep in tokens:
+        candidate = f'{current}{pending}{piece}' if current else piece.lstrip()
+        if len(candidate.rstrip()) <= limit:
+            current = candidate
+        else:
+            if current.strip():
+                chunks.append(current.strip())
+            current = piece.lstrip()
+        pending = sep
+    if current.strip():
+        chunks.append(current.strip())
+    return chunks
+
+
+def _fit_limit(part, limit=THREADS_TEXT_LIMIT):
+    """上限を超えるパートを段落（空行）→ 文（。）の境目で分ける（区切りは元のまま残す）"""
+    if len(part) <= limit:
+        return [part]
+    return _pack(_tokens(part, limit), limit)
+
+
+def split_thread_parts(thread_text):
+    """thread_text を返信チェーンの各パートに分ける
+
+    THREAD_PART_SEPARATOR だけの行で区切り、文字数上限を超えるパートはさらに分ける。
+
+    Returns:
+        list: 各パートの本文（thread_text が空なら空リスト）
+    """
+    if not thread_text:
+        return []
+
+    parts = []
+    lines = []
+    for line in thread_text.splitlines() + [THREAD_PART_SEPARATOR]:
+        if line.strip() != THREAD_PART_SEPARATOR:
+            lines.append(line)
+            continue
+        part = '\n'.join(lines).strip()
+        lines = []
+        if part:
+            parts.extend(_fit_limit(part))
+    return parts
@@ -0,0 +1,232 @@
+#!/usr/bin/env python3
+"""
+Threads API の共通HTTPクライアント
+
+全スクリプトのAPI呼び出しをここに集める。
+- 接続プール付きの Session を使い回す（keep-alive。複数アカウント時はアカウントごと）
+- 用途ごとのタイムアウト（読み取り / コンテナ作成 / 公開）。無期限に固まらない
+- 5xx・429・接続エラーは指数バックオフ（ジッター付き、Retry-After があれば従う）で再試行
+- 呼び出しのペースは rate_governor.py（使用率ヘッダーで速度が変わるトークンバケット）が決める
+- 公開（threads_publish）は自動では再試行しない。safe_publish が結果の分からない失敗のあと
+  コンテナの状態を確かめ、未公開（FINISHED）のときだけ再試行する（二重投稿しない）
+
+戻り値は requests.Response のまま（呼び出し側で raise_for_status する）。
+"""
+
+import os
+import random
+
+import requests
+from requests.adapters import HTTPAdapter
+
+import threads_clock as clock
+from rate_governor import RateGovernor
+from threads_state import current_account
+
+API_BASE_URL = 'https://graph.threads.net/v1.0'  # THREADS_API_BASE_URL で差し替え可能（stub_server.py など）
+
+# 用途ごとのタイムアウト（接続, 読み取り）秒
+TIMEOUTS = {
+    'read': (5, 20),
+    'write': (5, 30),
+    'publish': (5, 60),
+}
+MAX_RETRIES = 3  # 再試行の回数（初回を含めず）
+BACKOFF_BASE_SECONDS = 1  # 再試行の待ち（1, 2, 4, ... 秒にジッター）
+BACKOFF_MAX_SECONDS = 30
+RETRY_STATUS = {429, 500, 502, 503, 504}
+POOL_SIZE = 16  # 1ホストあたりの接続プール（並行呼び出しの上限に合わせる）
+
+_session = None
+_governor = None
+
+
+class ContainerStatusError(Exception):
+    """コンテナが公開できる状態にならなかった（ERROR / EXPIRED / PUBLISHED / TIMEOUT）"""
+
+    def __init__(self, container_id, status, message=None):
+        self.container_id = container_id
+        self.status = status
+        self.message = message
+        detail = f": {message}" if message else ""
+        super().__init__(f"コンテナ {container_id} が公開できません（{status}）{detail}")
+
+
+def new_session():
+    """接続プール付きの Session を作る"""
+    s = requests.Session()
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=POOL_SIZE)
+    s.mount('https://', adapter)
+    s.mount('http://', adapter)
+    return s
+
+
+def session():
+    """共有の Session（初回呼び出し時に作成、複数アカウント時はアカウントごと）"""
+    global _session
+    account = current_account.get()
+    if account is not None:
+        if 'session' not in account:
+            account['session'] = new_session()
+        return account['session']
+    if _session is None:
+        _session = new_session()
+    return _session
+
+
+def governor():
+    """共有のペース配分（複数アカウント時はアカウントごと。使用率はトークン単位で数えられる）"""
+    global _governor
+    account = current_account.get()
+    if account is not None:
+        if 'governor' not in account:
+            account['governor'] = RateGovernor()
+        return account['governor']
+    if _governor is None:
+        _governor = RateGovernor()
+    return _governor
+
+
+def base_url():
+    """APIのベースURL（環境変数 THREADS_API_BASE_URL があればそちら）"""
+    return (os.getenv('THREADS_API_BASE_URL') or API_BASE_URL).rstrip('/')
+
+
+def api_url(path):
+    """'me/threads' のような相対パスを完全なURLに（完全なURLはそのまま）"""
+    if path.startswith('http://') or path.startswith('https://'):
+        return path
+    return f"{base_url()}/{path.lstrip('/')}"
+
+
+def backoff_seconds(attempt, response=None):
+    """attempt 回目（0始まり）の再試行までの待ち秒数"""
+    retry_after = response.headers.get('Retry-After') if response is not None else None
+    if retry_after and retry_after.isdigit():
+        return min(float(retry_after), BACKOFF_MAX_SECONDS)
+    delay = min(BACKOFF_BASE_SECONDS * 2 ** attempt, BACKOFF_MAX_SECONDS)
+    return delay * random.uniform(0.5, 1.0)
+
+
+def _timeout(kind, deadline):
+    """用途のタイムアウト（期限があれば残り時間まで縮める）"""
+    if deadline is None:
+        return TIMEOUTS[kind]
+    remaining = deadline - clock.monotonic()
+    if remaining <= 0:
+        raise requests.exceptions.Timeout('期限を過ぎたため送信しませんでした')
+    return tuple(min(t, remaining) for t in TIMEOUTS[kind])
+
+
+def _out_of_time(deadline, wait):
+    return deadline is not None and clock.monotonic() + wait >= deadline
+
+
+def request(method, path, params=None, data=None, kind=None, retry=True, headers=None, deadline=None):
+    """APIを呼ぶ（タイムアウト付き、5xx/429/接続エラーは再試行）
+
+    Args:
+        kind: 'read' / 'write' / 'publish'（タイムアウトの種類。省略時は GET=read, それ以外=write）
+        retry: False なら1回だけ（公開など、再送すると結果が変わるもの）
+        headers: 追加のリクエストヘッダー（If-None-Match など）
+        deadline: 期限（clock.monotonic() の時刻）。各回のタイムアウトを残り時間まで縮め、
+            間に合わない再試行はしない
+
+    Returns:
+        requests.Response（最後の応答。4xx/5xx でも例外にはしない）
+
+    Raises:
+        requests.exceptions.RequestException: 接続エラー・タイムアウト（再試行しても失敗、期限切れ）
+    """
+    kind = kind or ('read' if method == 'GET' else 'write')
+    attempts = MAX_RETRIES + 1 if retry else 1
+
+    for attempt in range(attempts):
+        last = attempt == attempts - 1
+        governor().acquire()
+        timeout = _timeout(kind, deadline)
+        try:
+            response = session().request(method, api_url(path), params=params, data=data, headers=headers,
+                                         timeout=timeout)
+        except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+            wait = backoff_seconds(attempt)
+            if last or _out_of_time(deadline, wait):
+                raise
+            print(f"  … 接続エラー（{type(e).__name__}）、{wait:.1f}秒後に再試行 ({attempt + 1}/{MAX_RETRIES})")
+        else:
+            governor().observe(response.status_code, response.headers)
+            if response.status_code not in RETRY_STATUS or last or _out_of_time(deadline, 0):
+                return response
+            if response.status_code == 429:
+                # 待ちはペース配分側で止める（Retry-After / 回復目安まで）
+                print(f"  … HTTP 429、レート制限が解けるまで待って再試行 ({attempt + 1}/{MAX_RETRIES})")
+                continue
+            wait = backoff_seconds(attempt, response)
+            if _out_of_time(deadline, wait):
+                return response
+            print(f"  … HTTP {response.status_code}、{wait:.1f}秒後に再試行 ({attempt + 1}/{MAX_RETRIES})")
+        clock.sleep(wait)
+
+
+def get(path, params=None, kind='read', retry=True, headers=None):
+    return request('GET', path, params=params, kind=kind, retry=retry, headers=headers)
+
+
+def post(path, params=None, data=None, kind='write', retry=True):
+    return request('POST', path, params=params, data=data, kind=kind, retry=retry)
+
+
+def delete(path, params=None, retry=True):
+    return request('DELETE', path, params=params, kind='write', retry=retry)
+
+
+def container_status(container_id, access_token):
+    """コンテナの状態（FINISHED / IN_PROGRESS / PUBLISHED / ERROR / EXPIRED）と詳細"""
+    response = get(container_id, params={'fields': 'status,error_message', 'access_token': access_token})
+    response.raise_for_status()
+    data = response.json()
+    return data.get('status'), data.get('error_message')
+
+
+def safe_publish(user_id, access_token, container_id):
+    """コンテナを公開（二重投稿にならない範囲でだけ再試行）
+
+    タイムアウト・接続エラー・5xx/429 では公開されたかどうか分からないため、
+    コンテナの状態を確認してから決める:
+    - FINISHED（未公開）: 待ってから再試行
+    - PUBLISHED: 公開済み。再送せず ContainerStatusError('PUBLISHED') を送出
+
+    Returns:
+        requests.Response（公開の応答）
+
+    Raises:
+        ContainerStatusError: 既に公開済み、または公開できない状態
+        requests.exceptions.RequestException: 再試行しても結果が得られない
+    """
+    params = {'access_token': access_token}
+    data = {'creation_id': container_id}
+
+    for attempt in range(MAX_RETRIES + 1):
+        response = None
+        try:
+            response = post(f'{user_id}/threads_publish', params=params, data=data, kind='publish', retry=False)
+            if response.status_code not in RETRY_STATUS:
+                return response
+            error = f"HTTP {response.status_code}"
+        except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+            if attempt == MAX_RETRIES:
+                raise
+            error = type(e).__name__
+
+        # 結果が分からない: コンテナの状態で公開済みか確かめる
+        status, message = container_status(container_id, access_token)
+        if status == 'PUBLISHED':
+            raise ContainerStatusError(container_id, status, f"{error} のあと確認したところ公開済み")
+        if status != 'FINISHED':
+            raise ContainerStatusError(container_id, status, message)
+        if attempt == MAX_RETRIES:
+            return response
+
+        wait = backoff_seconds(attempt, response)
+        print(f"  … 公開の応答なし（{error}）、未公開を確認したので{wait:.1f}秒後に再試行")
+        clock.sleep(wait)
@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+Threads API の非同期クライアント（asyncio）
+
+threads_api と同じ呼び出し方（request / get / post / delete）の async 版。
+実際のHTTPは threads_api の同期関数を専用のスレッドで実行するので、
+接続プール・タイムアウト・再試行・ペース配分（rate_governor）はそのまま効く。
+並行にして縮むのは往復の待ち時間だけで、呼び出しの間隔はペース配分が決める。
+逐次は「件数 × 往復の時間」、並行は「件数 ÷ レート」（使用率が低いときの上限40回/秒）で頭打ちになる。
+bench_api.py の代役サーバーで30件の削除は、遅延50msで 逐次 約2.8秒 → 並行 約0.8秒（約3.5倍）、
+遅延150msで 約5.8秒 → 約1.0秒。使用率が上がってレートが落ちると差は縮む。
+
+- 全体の同時実行数（MAX_CONCURRENCY）とホストごとの同時実行数（MAX_PER_HOST）を上限にする
+- run_all は期限（deadline 秒）を過ぎたら未着手・待機中の呼び出しを取り消し、
+  その分は DeadlineExceeded を結果に入れる。送信中の呼び出しも期限を threads_api に渡して
+  タイムアウトを残り時間まで縮めるので、期限を大きく過ぎて残ることはない（終わりも待たない）
+- 実行中のアカウント（threads_state.current_account）は呼び出し元のものを引き継ぐ
+
+スクリプト側はコマンドごとに使うかどうかを選ぶ（例: delete_all_posts.py --async）。
+"""
+
+import asyncio
+import contextvars
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+import threads_api
+import threads_clock as clock
+
+MAX_CONCURRENCY = threads_api.POOL_SIZE  # 接続プールの大きさに合わせる
+MAX_PER_HOST = 8
+
+
+class DeadlineExceeded(Exception):
+    """期限までに実行されなかった呼び出し"""
+
+
+class AsyncThreadsClient:
+    """並行数に上限のある非同期クライアント（async with で使う）"""
+
+    def __init__(self, max_concurrency=MAX_CONCURRENCY, max_per_host=MAX_PER_HOST, deadline=None):
+        self.max_concurrency = max_concurrency
+        self.max_per_host = max_per_host
+        self.deadline_at = clock.monotonic() + deadline if deadline is not None else None
+        self._limit = asyncio.Semaphore(max_concurrency)
+        self._hosts = {}
+        self._executor = ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix='threads-async')
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        self.close()
+
+    def close(self):
+        # まだ始まっていない呼び出しは捨てる（送信中のものは待たない）
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def _host_limit(self, path):
+        host = urlsplit(threads_api.api_url(path)).netloc
+        if host not in self._hosts:
+            self._hosts[host] = asyncio.Semaphore(self.max_per_host)
+        return self._hosts[host]
+
+    async def request(self, method, path, params=None, data=None, kind=None, retry=True, headers=None):
+        """threads_api.request の async 版（戻り値・例外も同じ）"""
+        call = functools.partial(threads_api.request, method, path, params=params, data=data,
+                                 kind=kind, retry=retry, headers=headers, deadline=self.deadline_at)
+        async with self._limit, self._host_limit(path):
+            context = contextvars.copy_context()
+            return await asyncio.get_running_loop().run_in_executor(self._executor, context.run, call)
+
+    async def get(self, path, params=None, kind='read', retry=True, headers=None):
+        return await self.request('GET', path, params=params, kind=kind, retry=retry, headers=headers)
+
+    async def post(self, path, params=None, data=None, kind='write', retry=True):
+        return await self.request('POST', path, params=params, data=data, kind=kind, retry=retry)
+
+    async def delete(self, path, params=None, retry=True):
+        return await self.request('DELETE', path, params=params, kind='write', retry=retry)
+
+
+async def gather_with_deadline(coros, deadline=None):
+    """コルーチンを並行に実行し、入力順の結果を返す
+
+    Args:
+        coros: コルーチンのリスト
+        deadline: 全体の期限（秒）。None なら期限なし
+
+    Returns:
+        list: 各コルーチンの戻り値。失敗したものは例外オブジェクト、期限切れは DeadlineExceeded
+    """
+    tasks = [asyncio.ensure_future(coro) for coro in coros]
+    if not tasks:
+        return []
+    done, pending = await asyncio.wait(tasks, timeout=deadline)
+    for task in pending:
+        task.cancel()
+    if pending:
+        await asyncio.wait(pending)
+
+    results = []
+    for task in tasks:
+        if task in pending:
+            results.append(DeadlineExceeded(f"{deadline}秒の期限までに終わりませんでした"))
+        elif task.exception() is not None:
+            results.append(task.exception())
+        else:
+            results.append(task.result())
+    return results
+
+
+def run_all(calls, deadline=None, max_concurrency=MAX_CONCURRENCY, max_per_host=MAX_PER_HOST):
+    """独立した呼び出しをまとめて並行実行する（同期コードから使う入口）
+
+    Args:
+        calls: [(method, path, {params, data, kind, ...}), ...]
+        deadline: 全体の期限（秒）
+
+    Returns:
+        list: 入力順の結果（requests.Response、失敗したものは例外オブジェクト）
+    """
+    async def _run():
+        async with AsyncThreadsClient(max_concurrency, max_per_host, deadline) as client:
+            return await gather_with_deadline(
+                [client.request(method, path, **(kwargs or {})) for method, path, kwargs in calls], deadline)
+
+    return asyncio.run(_run())
@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+現在時刻とスリープ（差し替え可能な時計）
+
+投稿処理は datetime.now / time.sleep を直接呼ばず、ここを通す。
+通常は実際の時計、シミュレーション（simulate_day.py）では仮想時計に差し替え、
+1日分・1か月分のスロットを数秒で再生する。
+"""
+
+import time
+from datetime import datetime, timezone, timedelta
+
+# JST タイムゾーン
+JST = timezone(timedelta(hours=9))
+
+
+class SystemClock:
+    """実際の時計"""
+
+    def now(self):
+        return datetime.now(JST)
+
+    def sleep(self, seconds):
+        time.sleep(seconds)
+
+    def monotonic(self):
+        return time.monotonic()
+
+
+class VirtualClock:
+    """sleep で進むだけの仮想時計（実際には待たない）"""
+
+    def __init__(self, start):
+        self._now = start
+
+    def now(self):
+        return self._now
+
+    def advance_to(self, at):
+        """at まで進める（既に過ぎていればそのまま。時計は戻らない）"""
+        self._now = max(self._now, at)
+
+    def sleep(self, seconds):
+        # datetime はマイクロ秒単位なので、正の待ちは最低1マイクロ秒進める（待ちが0に丸められて止まらないように）
+        if seconds > 0:
+            self._now += max(timedelta(seconds=seconds), timedelta(microseconds=1))
+
+    def monotonic(self):
+        return self._now.timestamp()
+
+
+_clock = SystemClock()
+
+
+def use_clock(clock):
+    """時計を差し替え、元の時計を返す"""
+    global _clock
+    previous = _clock
+    _clock = clock
+    return previous
+
+
+def now():
+    """現在時刻（JST）"""
+    return _clock.now()
+
+
+def sleep(seconds):
+    _clock.sleep(seconds)
+
+
+def monotonic():
+    return _clock.monotonic()
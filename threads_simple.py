@@ -4,44 +4,101 @@ Threads シンプル投稿スケジューラ + Daily Report
 
 仕組み（新アーキテクチャ - スパム対策版）:
 1. 現在時刻から該当するスケジュールターム（8:00~23:30、30分間隔、計32枠）を判定
-2. Threads APIから最近の投稿を取得
-3. そのタームの投稿で未投稿のものだけを取得
-4. 投稿実行（リポジトリへの影響なし、1回につき最大1投稿）
+2. 当日の過去ターム・現在タームをまとめて投稿プランに解決（CSV索引の参照1回 + 投稿台帳。台帳が途切れていればAPIで照合）
+3. そのタームの投稿で未投稿のものだけを取得（CSVの索引から該当スロットだけ参照）
+4. 投稿実行（リポジトリへの影響なし、1回の実行で公開するのは最大1投稿）
+5. 投稿間隔（5分）が空いていない分・持ち時間（5分）を過ぎた分は待ち行列へ積み、次の実行で投稿
+   （タームの実行に加えて15分・45分のターム間の実行 drain が待ち行列と過去タームの補完を受け持つ）
 
 スケジュール:
 - 投稿頻度: 30分に1回
 - 時間帯: 8:00~23:30（JST）
-- 投稿数: 最大32投稿/日（1回につき1投稿のみ）
+- 投稿数: 最大32投稿/日（1回の実行で1投稿まで。cronが飛んだ分の補完はターム間の実行で、投稿どうしは5分以上空ける）
 
 コマンド:
 - python3 threads_simple.py          投稿実行
 - python3 threads_simple.py --dry-run  ドライラン
+- python3 threads_simple.py drain    持ち越し・過去タームの補完だけ（ターム間のcron用）
 - python3 threads_simple.py daily-report  毎朝の成果報告を投稿
+- python3 threads_simple.py serve    常駐モード（各タームの時刻ぴったりに投稿）
+- python3 threads_simple.py fanout   accounts.json の全アカウントを同じタームで並行投稿（fanout drain で補完だけ）
+- python3 threads_simple.py stage    次のタームのコンテナを事前作成（時刻には公開だけ）
+- python3 threads_simple.py compile-day [YYYY-MM-DD]  指定日（省略時は翌日）の投稿プランをコンパイル
 
 メリット:
-- スパム判定を回避（30分間隔、1回1投稿）
-- リポジトリへの影響ゼロ（ファイル書き込みなし）
+- スパム判定を回避（1回の実行で1投稿、投稿どうしは5分以上）
+- リポジトリへの影響ゼロ（書き込むのは .state/ の索引と投稿台帳のみ、gitignore済み）
 - ブランチ分け不要（mainのみ）
 - 冪等性がある（何度実行しても同じ結果）
-- 重複投稿防止（API照合）
+- 重複投稿防止（API照合、正規化した全文の指紋で判定。thread_text の返信チェーンも対象）
+- thread_text は「---」だけの行で区切ると複数パートの返信チェーンになる（500字超は段落で自動分割）
 """
 
-import csv
 import time
-import requests
 import json
 import os
 import sys
+import io
 import random
+import contextvars
+import importlib
+import threading
 from datetime import datetime, timezone, timedelta
-from dotenv import load_dotenv
 from pathlib import Path
 
-# 環境変数読み込み
-load_dotenv(override=True)
+from deferred_queue import DeferredQueue, MIN_PUBLISH_SPACING_SECONDS
+from post_fingerprint import build_fingerprint_index, fingerprint
+from publish_ledger import UNKNOWN_SETTLE_SECONDS, append_event, is_trusted, load_ledger, record_checkpoint
+from slot_calendar import get_calendar
+import threads_clock as clock
+from threads_state import current_account
+from staged_containers import add_staged, is_staged, load_staged, prune_staged, save_staged, take_staged
 
-# Threads API設定
-API_BASE_URL = 'https://graph.threads.net/v1.0'
+
+class _LazyModule:
+    """最初に属性へアクセスしたときに import するモジュールの代理
+
+    importlib.util.LazyLoader は Python 3.11 以前でスレッドセーフでなく、
+    複数スレッド（複数アカウント・レポートの並行取得）から同時に触ると読み込み途中の
+    モジュールが見えることがある。ここでは import をロックで1回だけにする。
+    """
+
+    _lock = threading.Lock()
+
+    def __init__(self, name):
+        self._name = name
+        self._module = None
+
+    def __getattr__(self, attr):
+        if self._module is None:
+            with self._lock:
+                if self._module is None:
+                    self._module = importlib.import_module(self._name)
+        return getattr(self._module, attr)
+
+
+def _lazy_import(name):
+    """最初に属性へアクセスしたときに読み込まれるモジュールを返す
+
+    requests（urllib3/ssl込みで起動時間の大半）や sqlite3 を使う索引は、
+    スケジュール時間外ですぐ終わる実行では読み込まない。
+    """
+    if name in sys.modules:
+        return sys.modules[name]
+    return _LazyModule(name)
+
+
+requests = _lazy_import('requests')
+threads_api = _lazy_import('threads_api')
+graph_batch = _lazy_import('graph_batch')
+response_cache = _lazy_import('response_cache')
+insights_store = _lazy_import('insights_store')
+timeline_store = _lazy_import('timeline_store')
+accounts = _lazy_import('accounts')
+day_plan = _lazy_import('day_plan')
+schedule_index = _lazy_import('schedule_index')
+
+# Threads API設定（.env は load_env() で読み込む。HTTPは threads_api.py の共通クライアント）
 ACCESS_TOKEN = os.getenv('THREADS_ACCESS_TOKEN')
 USER_ID = os.getenv('THREADS_USER_ID')
 
@@ -49,95 +106,299 @@ USER_ID = os.getenv('THREADS_USER_ID')
 JST = timezone(timedelta(hours=9))
 
 # 設定
-# 30分間隔で8:00~24:00（32枠 × 1投稿 = 32投稿/日）
-SCHEDULE_TIMES = [
-    (8, 0), (8, 30), (9, 0), (9, 30), (10, 0), (10, 30), (11, 0), (11, 30),
-    (12, 0), (12, 30), (13, 0), (13, 30), (14, 0), (14, 30), (15, 0), (15, 30),
-    (16, 0), (16, 30), (17, 0), (17, 30), (18, 0), (18, 30), (19, 0), (19, 30),
-    (20, 0), (20, 30), (21, 0), (21, 30), (22, 0), (22, 30), (23, 0), (23, 30)
-]  # スケジュール時刻（JST）: 時、分のタプル
-POST_INTERVAL_SECONDS = 360  # 投稿間隔（秒、6分）
-MAX_POSTS_PER_RUN = 1  # 1回の実行での最大投稿数（スパム対策: 30分に1投稿のみ）
+# 30分間隔で8:00~24:00（32枠 × 1投稿 = 32投稿/日）。グリッドは slot_calendar.py で共通管理
+SCHEDULE = get_calendar('default')
+SCHEDULE_TIMES = list(SCHEDULE.slots)  # スケジュール時刻（JST）: 時、分のタプル
+MAX_POSTS_PER_RUN = 1  # タームごとの最大投稿数（スパム対策。1回の実行で公開するのも、投稿間隔を待たないので1件まで）
+RUN_TIME_BUDGET_SECONDS = MIN_PUBLISH_SPACING_SECONDS  # 1回の実行の持ち時間。過ぎたら新しい投稿は始めず待ち行列へ
 DRY_RUN = '--dry-run' in sys.argv  # ドライランモード
+SERVE_MAX_SLEEP_SECONDS = 60  # 常駐モードの1回あたりの最大スリープ（秒）
+MAX_INLINE_WAIT_SECONDS = 15  # 投稿間隔の待ちがこれ以内（時計のずれ程度）なら実行内で待つ。超えたら待ち行列へ
+MAX_ACCOUNT_WORKERS = 16  # 複数アカウント実行時の並行数
+CONTAINER_POLL_INITIAL_SECONDS = 0.5  # コンテナ状態確認の初回待ち（以降は倍々）
+CONTAINER_POLL_MAX_SECONDS = 8  # 確認間隔の上限
+CONTAINER_READY_TIMEOUT_SECONDS = 120  # これを過ぎても公開可能にならなければ諦める
+STAGE_AHEAD_MINUTES = 35  # 何分先のタームまでコンテナを事前作成するか（cronの次の実行分をカバー）
+
+
+def load_env():
+    """.env を読み込んで認証情報を設定（投稿・APIが必要になった時点で1回だけ）"""
+    global ACCESS_TOKEN, USER_ID, _env_loaded
+    if _env_loaded:
+        return
+    from dotenv import load_dotenv
+
+    load_dotenv(override=True)
+    ACCESS_TOKEN = os.getenv('THREADS_ACCESS_TOKEN')
+    USER_ID = os.getenv('THREADS_USER_ID')
+    _env_loaded = True
+
+
+_env_loaded = False
+
+
+def current_access_token():
+    """実行中のアカウントのアクセストークン（単一アカウントなら .env の値）"""
+    account = current_account.get()
+    return account['access_token'] if account else ACCESS_TOKEN
+
+
+def current_user_id():
+    """実行中のアカウントのユーザーID（単一アカウントなら .env の値）"""
+    account = current_account.get()
+    return account['user_id'] if account else USER_ID
 
 
 def resolve_csv_path() -> str:
     """CSVファイルのパスを解決
 
-    常に data/posts_schedule.csv を使用
+    常に data/posts_schedule.csv を使用（複数アカウント時はアカウントのCSV）
     """
-    csv_path = Path('data/posts_schedule.csv')
+    account = current_account.get()
+    csv_path = Path(account['csv'] if account else 'data/posts_schedule.csv')
     if not csv_path.exists():
         raise FileNotFoundError(f"CSVファイルが見つかりません: {csv_path}")
     return str(csv_path)
 
-# ドライランモード時は間隔を短縮
-if DRY_RUN:
-    POST_INTERVAL_SECONDS = 0.1
-
 
 def get_current_schedule_time(now_hour, now_minute):
     """現在時刻から該当するスケジュール時刻（ターム）を取得
 
     GitHub Actionsのcronは最大15分程度ずれるため、±15分の範囲で該当するタームを判定
-    複数マッチする場合は最も近いタームを選択
-    新スケジュール: 30分間隔で8:00~23:30（32枠）
+    複数マッチする場合は最も近いタームを選択（コンパイル済みの分→ターム表を引くだけ）
+    新スケジュール: 30分間隔で8:00~23:30（32枠）、8:00より前は該当なし
     """
-    # 8:00より前は該当なし
-    if now_hour < 8:
-        return None
+    return SCHEDULE.slot_at(now_hour, now_minute)
 
-    # 現在時刻を分に変換
-    current_minutes = now_hour * 60 + now_minute
 
-    # 最も近いスケジュール時刻を探す
-    closest_schedule = None
-    min_diff = float('inf')
+RECENT_POSTS_LIMIT = 50  # 重複チェックに使う最近の投稿数（当日分32枠をカバー。過去ターム全体の補完に使う）
 
-    for schedule_hour, schedule_minute in SCHEDULE_TIMES:
-        schedule_minutes = schedule_hour * 60 + schedule_minute
-        diff = abs(current_minutes - schedule_minutes)
 
-        # ±15分の範囲内で最も近いものを記録
-        if diff <= 15 and diff < min_diff:
-            min_diff = diff
-            closest_schedule = (schedule_hour, schedule_minute)
+def get_recent_posts_from_api():
+    """最近の投稿を取得（重複チェック用、失敗時はNone）
 
-    return closest_schedule
+    timeline_store で手元の一覧をAPIと同期し（普段は新着確認の1ページだけ）、新しい順に返す。
+    """
+    try:
+        timeline_store.sync('threads', current_user_id(), current_access_token())
+        return timeline_store.recent('threads', RECENT_POSTS_LIMIT)
+    except Exception as e:
+        print(f"⚠️  API投稿取得エラー: {e}")
+        return None
 
 
-def get_recent_posts_from_api():
-    """Threads APIから最近の投稿を取得（重複チェック用）"""
+def get_recent_replies_from_api():
+    """最近の返信を取得（thread_text の重複チェック用、失敗時はNone）"""
     try:
-        url = f'{API_BASE_URL}/{USER_ID}/threads'
-        params = {
-            'fields': 'id,text,timestamp',
-            'limit': 30,  # 当日分をカバー
-            'access_token': ACCESS_TOKEN
-        }
-        response = requests.get(url, params=params)
-        response.raise_for_status()
-        return response.json().get('data', [])
+        timeline_store.sync('replies', current_user_id(), current_access_token())
+        return timeline_store.recent('replies', RECENT_POSTS_LIMIT)
     except Exception as e:
-        print(f"⚠️  API投稿取得エラー: {e}")
-        return []
+        print(f"⚠️  API返信取得エラー: {e}")
+        return None
+
+
+def row_fingerprint(row):
+    """行の本文の指紋。コンパイル済みプランの値があれば使う"""
+    return row.get('fingerprint') or fingerprint(row['text'])
+
+
+def thread_fingerprints(row):
+    """返信チェーン各パートの指紋（パート順）"""
+    if 'thread_fingerprints' in row:
+        return row['thread_fingerprints']
+    return [fingerprint(part) for part in row['thread_parts']]
+
+
+def thread_part_name(index):
+    """台帳に記録するパート名（1つ目の返信は 'thread'、以降 'thread_2', 'thread_3', ...）"""
+    return 'thread' if index == 0 else f'thread_{index + 1}'
+
+
+def unpublished_thread_part(row, published_index):
+    """返信チェーンで最初に未投稿のパート番号と、その返信先の投稿IDを返す
+
+    Returns:
+        tuple: (パート番号, 返信先ID)。全て投稿済みなら (None, None)。
+            返信先が公開済みでもIDが分からなければ返信先IDは None
+    """
+    reply_to_id = published_index[row_fingerprint(row)]
+    for index, fp in enumerate(thread_fingerprints(row)):
+        if fp not in published_index:
+            return index, reply_to_id
+        reply_to_id = published_index[fp]
+    return None, None
+
+
+def is_post_already_published(post_text, published_index):
+    """指定の投稿が既に投稿済みか確認（正規化した全文の指紋で照合、O(1)）
+
+    Args:
+        published_index: build_fingerprint_index で作った {指紋: 投稿ID}
+    """
+    return fingerprint(post_text) in published_index
+
+
+def _ledger_fields(row, part):
+    """照合で見つかったときに台帳へ記録する項目"""
+    return {'csv_id': row['csv_id'], 'part': part, 'scheduled_at': row['scheduled_at'].isoformat()}
+
+
+def _reconcile(api_posts, published_index, candidates):
+    """APIで見つかった公開済み投稿を索引と台帳に反映（IDの分からなかった公開済み投稿はIDを補う）
+
+    Args:
+        candidates: {指紋: 台帳に記録する項目}
+    """
+    for fp, threads_id in build_fingerprint_index(api_posts).items():
+        if published_index.get(fp) is not None:
+            continue
+        published_index[fp] = threads_id
+        if fp in candidates and not DRY_RUN:
+            append_event('reconcile', fingerprint=fp, threads_id=threads_id, **candidates[fp])
+
+
+def load_published_index(rows):
+    """公開済みの指紋索引を作る（台帳を優先し、途切れていればAPIで照合）
+
+    Args:
+        rows: 判定対象のCSV行
+
+    Returns:
+        dict: {指紋: 投稿ID}（本編・返信の両方を含む）
+    """
+    ledger = load_ledger(allow_compact=not DRY_RUN)
+    published_index = dict(ledger['published'])
+
+    if is_trusted(ledger):
+        if not DRY_RUN:
+            record_checkpoint()
+        return published_index
+
+    print("\n🔎 台帳が途切れている可能性があるため、APIで照合します")
+    complete = True
+
+    # 公開されたか分からない投稿（公開の応答が失われた）は、今回の対象の行でなくても照合する
+    unknown = {fp: entry for fp, entry in ledger['unknown'].items() if fp not in published_index}
+    unknown_fields = {fp: {'csv_id': entry.get('csv_id'), 'part': entry.get('part')} for fp, entry in unknown.items()}
+
+    # 本編: 台帳に無いものがあれば最近の投稿を取得
+    candidates = {row_fingerprint(row): _ledger_fields(row, 'main') for row in rows}
+    candidates.update({fp: f for fp, f in unknown_fields.items() if f['part'] == 'main'})
+    if any(fp not in published_index for fp in candidates):
+        api_posts = get_recent_posts_from_api()
+        if api_posts is None:
+            complete = False
+        else:
+            _reconcile(api_posts, published_index, candidates)
+
+    # 返信: 本編が公開済みで返信チェーンに台帳に無いパートがあれば最近の返信を取得
+    reply_candidates = {
+        fp: _ledger_fields(row, thread_part_name(index))
+        for row in rows
+        if row_fingerprint(row) in published_index
+        for index, fp in enumerate(thread_fingerprints(row))
+    }
+    reply_candidates.update({fp: f for fp, f in unknown_fields.items() if f['part'] != 'main'})
+    if any(fp not in published_index for fp in reply_candidates):
+        api_replies = get_recent_replies_from_api()
+        if api_replies is None:
+            complete = False
+        else:
+            _reconcile(api_replies, published_index, reply_candidates)
+
+    # 一覧に出ていないのは反映待ちかもしれないので、しばらくは投稿済み扱い（次の実行でもう一度照合）
+    now = clock.now()
+    settling = [fp for fp, entry in unknown.items() if fp not in published_index
+                and (now - datetime.fromisoformat(entry['recorded_at'])).total_seconds() < UNKNOWN_SETTLE_SECONDS]
+    for fp in settling:
+        published_index[fp] = None
+    if settling:
+        print(f"⏳ 公開されたか分からない投稿が一覧に出るのを待ちます: "
+              f"{', '.join(unknown[fp].get('csv_id') or '?' for fp in settling)}")
+
+    # APIと突き合わせ済みなら、ここから先は台帳だけで判定できる
+    if complete and not settling and not DRY_RUN:
+        record_checkpoint()
+
+    return published_index
+
 
+def load_schedule_rows(csv_file, target_date, schedule_times):
+    """指定日の複数タームの行を取得（コンパイル済みプラン → 無ければCSV索引）
 
-def is_post_already_published(post_text, recent_posts):
-    """指定の投稿が既に投稿済みか確認（テキストの先頭100文字で照合）"""
-    post_preview = post_text[:100].strip()
+    Returns:
+        dict: {(時, 分): [行, ...]}
+    """
+    terms = [tuple(t) for t in schedule_times]
+    compiled = day_plan.load_day_plan(csv_file, target_date)
+    if compiled is not None:
+        return {term: compiled.get(term, []) for term in terms}
+    return schedule_index.lookup_slots(csv_file, target_date, terms)
+
+
+def compile_day(target_date):
+    """指定日の投稿プランをコンパイル（compile-day コマンド）"""
+    csv_path = resolve_csv_path()
+    path, count = day_plan.compile_day(csv_path, target_date, SCHEDULE_TIMES)
+    print(f"✅ {target_date.strftime('%Y-%m-%d')} のプランをコンパイルしました: {path}（{count}件）")
 
-    for api_post in recent_posts:
-        api_text = api_post.get('text', '').strip()
-        # 先頭100文字が一致すれば同じ投稿と判定
-        if api_text[:100] == post_preview:
-            return True
 
-    return False
+def plan_publish(csv_file, target_date, schedule_times, max_posts_per_term=None):
+    """複数タームの未投稿分をまとめて解決（投稿プラン）
+
+    CSV索引の参照も重複判定の索引作成も1回だけ。前ターム・現在ターム・次ターム
+    などをまとめて渡せば、実行ごとのI/OとAPI往復が一定になる。
+
+    Args:
+        csv_file: CSVファイルパス
+        target_date: 対象日付
+        schedule_times: (時, 分) のタプルのリスト（Noneは無視）
+        max_posts_per_term: タームごとの最大投稿数
+
+    Returns:
+        dict: {(時, 分): [未投稿の投稿, ...]}（schedule_times の順）
+    """
+    terms = [tuple(t) for t in schedule_times if t is not None]
+    rows_by_term = load_schedule_rows(csv_file, target_date, terms)
+
+    # 該当行がなければAPIは呼ばない
+    if not any(rows_by_term.values()):
+        return rows_by_term
+
+    # 公開済みの指紋索引（台帳優先、必要なときだけAPI照合。全ターム共通で1回だけ）
+    published_index = load_published_index([row for rows in rows_by_term.values() for row in rows])
+
+    plan = {}
+    for term, rows in rows_by_term.items():
+        posts = []
+        for row in rows:
+            # 既に投稿済みかチェック
+            fp = row_fingerprint(row)
+            if fp not in published_index:
+                posts.append(row)
+                continue
+
+            # 本編が投稿済みでも返信チェーンが途中までなら、抜けたパートから補完
+            resume_part, reply_to_id = unpublished_thread_part(row, published_index)
+            if resume_part is not None:
+                posts.append(dict(row, published_id=published_index[fp],
+                                  resume_part=resume_part, reply_to_id=reply_to_id))
+
+        # 予定時刻順にソート
+        posts.sort(key=lambda x: x['scheduled_at'])
+
+        # 投稿数制限（スパム対策）
+        if max_posts_per_term and len(posts) > max_posts_per_term:
+            print(f"\n⚠️  投稿数制限 {term[0]}:{term[1]:02d}: {len(posts)}件 → {max_posts_per_term}件に制限（スパム対策）")
+            posts = posts[:max_posts_per_term]
+
+        plan[term] = posts
+
+    return plan
 
 
 def get_posts_to_publish(csv_file, target_date, schedule_time, max_posts=None):
-    """指定日時のスケジュール時刻の未投稿分を取得
+    """指定日時のスケジュール時刻の未投稿分を取得（1ターム版の plan_publish）
 
     Args:
         csv_file: CSVファイルパス
@@ -149,220 +410,499 @@ def get_posts_to_publish(csv_file, target_date, schedule_time, max_posts=None):
     if schedule_time is None:
         return []
 
-    schedule_hour, schedule_minute = schedule_time
+    plan = plan_publish(csv_file, target_date, [schedule_time], max_posts_per_term=max_posts)
+    return plan[tuple(schedule_time)]
 
-    # APIから最近の投稿を取得（ここで1回だけ）
-    recent_posts = get_recent_posts_from_api()
 
-    posts = []
+def wait_for_container(container_id, timeout=None):
+    """コンテナの状態を確認し、公開可能（FINISHED）になった時点で返る
 
-    with open(csv_file, 'r', encoding='utf-8') as f:
-        reader = csv.DictReader(f)
+    最初は待たずに確認し、処理中なら指数バックオフ（上限あり、ジッター付き）で再確認する。
 
-        for row in reader:
-            csv_id = row.get('id', '').strip()
-            datetime_str = row.get('datetime', '').strip()
-            text = row.get('text', '').strip()
-            thread_text = row.get('thread_text', '').strip() or None
-            category = row.get('category', '').strip()
-            subcategory = row.get('subcategory', '').strip()
+    Raises:
+        threads_api.ContainerStatusError: ERROR / EXPIRED / PUBLISHED、または timeout 秒を過ぎた
+        requests.exceptions.RequestException: 状態確認のAPIエラー
+    """
+    deadline = clock.monotonic() + (timeout or CONTAINER_READY_TIMEOUT_SECONDS)
+    delay = CONTAINER_POLL_INITIAL_SECONDS
+
+    while True:
+        status, message = threads_api.container_status(container_id, current_access_token())
+
+        if status == 'FINISHED':
+            return
+        if status in ('ERROR', 'EXPIRED', 'PUBLISHED'):
+            raise threads_api.ContainerStatusError(container_id, status, message)
+
+        remaining = deadline - clock.monotonic()
+        if remaining <= 0:
+            raise threads_api.ContainerStatusError(container_id, 'TIMEOUT', f"最後の状態: {status}")
+
+        print(f"  … コンテナ処理中 ({status})、{delay:.1f}秒以内に再確認")
+        clock.sleep(min(remaining, delay * random.uniform(0.5, 1.0)))
+        delay = min(delay * 2, CONTAINER_POLL_MAX_SECONDS)
+
+
+def _print_api_error(e):
+    print(f"  ✗ API エラー: {e}")
+    if hasattr(e, 'response') and e.response is not None:
+        try:
+            error_detail = e.response.json()
+            print(f"  ✗ エラー詳細: {json.dumps(error_detail, indent=2, ensure_ascii=False)}")
+        except:
+            print(f"  ✗ レスポンス: {e.response.text[:200]}")
+
+
+def _create_container(text, reply_to_id=None, topics=None, csv_id=None, part='main'):
+    """コンテナを作成して creation_id を返す（APIエラーは例外のまま）"""
+    create_params = {'access_token': current_access_token()}
+    create_data = {
+        'media_type': 'TEXT',
+        'text': text
+    }
+
+    # トピックを追加（空でない場合）
+    # Threads APIは1つのトピックのみサポート（topic_tag）
+    if topics and len(topics) > 0:
+        create_data['topic_tag'] = topics[0]  # 最初のトピックのみ使用
+
+    if reply_to_id:
+        create_data['reply_to_id'] = reply_to_id
+        print(f"  → スレッドコンテナ作成中... (返信先: {reply_to_id})")
+    else:
+        topic_info = f" [トピック: {', '.join(topics)}]" if topics else ""
+        print(f"  → コンテナ作成中...{topic_info}")
 
-            if not csv_id or not datetime_str or not text:
-                continue
+    create_response = threads_api.post(f'{current_user_id()}/threads', params=create_params, data=create_data)
+    create_response.raise_for_status()
+    container_id = create_response.json().get('id')
+
+    if not container_id:
+        print(f"  ✗ コンテナIDの取得に失敗")
+        return None
+
+    if csv_id:
+        append_event('container', csv_id=csv_id, part=part, fingerprint=fingerprint(text),
+                     creation_id=container_id)
+    return container_id
+
+
+def _find_published_id(text, reply=False):
+    """公開済みなのにIDが分からない投稿を、最近の投稿・返信から指紋で探す（見つからなければNone）"""
+    recent = get_recent_replies_from_api() if reply else get_recent_posts_from_api()
+    return build_fingerprint_index(recent or []).get(fingerprint(text))
+
+
+def _publish_container(container_id, text, reply_to_id=None, csv_id=None, part='main'):
+    """コンテナが公開可能になるのを待ってから公開し、投稿IDを返す
+
+    公開は threads_api.safe_publish（結果が分からないときは状態を確かめてから再試行）。
+    既に公開済みだった場合は再送せず、最近の投稿から投稿IDを探して返す（見つからなければ
+    IDなしで台帳に公開済みと記録）。公開されたか分からないときは台帳に unknown を記録する。
+    APIエラー・ContainerStatusError は例外のまま。
+    """
+    try:
+        wait_for_container(container_id)
+        print(f"  → 投稿公開中...")
+        try:
+            publish_response = threads_api.safe_publish(current_user_id(), current_access_token(), container_id)
+        except requests.exceptions.RequestException:
+            # 応答も状態確認も失敗し、公開されたか分からない。次の実行は台帳を信用せずAPIで照合する
+            if csv_id:
+                append_event('unknown', csv_id=csv_id, part=part, fingerprint=fingerprint(text),
+                             creation_id=container_id)
+            raise
+        publish_response.raise_for_status()
+        post_id = publish_response.json().get('id')
+    except threads_api.ContainerStatusError as e:
+        if e.status != 'PUBLISHED':
+            raise
+        post_id = _find_published_id(text, reply=bool(reply_to_id))
+        if not post_id:
+            # 公開済みなのは確か（一覧への反映待ち）。IDなしで記録し、作り直さない
+            if csv_id:
+                append_event('publish', csv_id=csv_id, part=part, fingerprint=fingerprint(text),
+                             creation_id=container_id, threads_id=None)
+            raise
+        print(f"  ✓ コンテナは公開済みでした (ID: {post_id})")
+    if post_id:
+        if csv_id:
+            append_event('publish', csv_id=csv_id, part=part, fingerprint=fingerprint(text),
+                         creation_id=container_id, threads_id=post_id)
+        if reply_to_id:
+            print(f"  ✓ スレッド投稿成功！ (ID: {post_id})")
+        else:
+            print(f"  ✓ 投稿成功！ (ID: {post_id})")
+        return post_id
+    else:
+        print(f"  ✗ 投稿IDの取得に失敗")
+        return None
+
+
+def create_threads_post(text, reply_to_id=None, topics=None, csv_id=None, part='main', creation_id=None):
+    """Threads APIで投稿を作成
 
-            # scheduled_at をパース（タイムゾーン情報なし = JST として扱う）
-            scheduled_at = datetime.strptime(datetime_str, '%Y-%m-%d %H:%M')
-            scheduled_at = scheduled_at.replace(tzinfo=JST)
-
-            # トピックリストを構築
-            topics = []
-            if category:
-                topics.append(category)
-            if subcategory:
-                topics.append(subcategory)
-
-            # 今日の日付 & そのスケジュール時刻（時+分）の投稿のみ
-            if (scheduled_at.date() == target_date and
-                scheduled_at.hour == schedule_hour and
-                scheduled_at.minute == schedule_minute):
-                # 既に投稿済みかチェック
-                if not is_post_already_published(text, recent_posts):
-                    posts.append({
-                        'csv_id': csv_id,
-                        'scheduled_at': scheduled_at,
-                        'text': text,
-                        'thread_text': thread_text,
-                        'topics': topics
-                    })
-
-    # 予定時刻順にソート
-    posts.sort(key=lambda x: x['scheduled_at'])
-
-    # 投稿数制限（スパム対策）
-    if max_posts and len(posts) > max_posts:
-        print(f"\n⚠️  投稿数制限: {len(posts)}件 → {max_posts}件に制限（スパム対策）")
-        posts = posts[:max_posts]
-
-    return posts
-
-
-def create_threads_post(text, reply_to_id=None, topics=None):
-    """Threads APIで投稿を作成"""
+    csv_id を渡すと、コンテナ作成・公開の成功を投稿台帳に記録する。
+    creation_id（事前作成したコンテナ）を渡すと公開だけを行い、
+    APIに拒否された場合はコンテナを作り直して公開する。
+    """
     # ドライランモード
     if DRY_RUN:
         if reply_to_id:
             print(f"  → [ドライラン] スレッド投稿をシミュレート中... (返信先: {reply_to_id})")
         else:
             topic_info = f" トピック: {', '.join(topics)}" if topics else ""
-            print(f"  → [ドライラン] 投稿をシミュレート中...{topic_info}")
-        time.sleep(0.1)
-        fake_post_id = f"dry_run_{int(time.time())}"
+            staged_info = f" (事前作成: {creation_id})" if creation_id else ""
+            print(f"  → [ドライラン] 投稿をシミュレート中...{topic_info}{staged_info}")
+        clock.sleep(0.1)
+        fake_post_id = f"dry_run_{int(clock.now().timestamp())}"
         print(f"  ✓ [ドライラン] 投稿成功（シミュレート）！ (ID: {fake_post_id})")
         return fake_post_id
 
     try:
+        # 事前作成したコンテナがあれば公開だけ
+        if creation_id:
+            print(f"  → 事前作成したコンテナを使用 ({creation_id})")
+            try:
+                return _publish_container(creation_id, text, reply_to_id, csv_id, part)
+            except threads_api.ContainerStatusError as e:
+                print(f"  ✗ {e}")
+                if e.status == 'PUBLISHED':
+                    # 公開済みだがIDが見つからない（台帳にはIDなしで公開済みと記録済み）。作り直すと二重投稿になる
+                    return None
+                print(f"  → コンテナを作り直します")
+            except requests.exceptions.HTTPError as e:
+                # 失効・無効なコンテナ。応答が返っているので公開はされていない
+                _print_api_error(e)
+                print(f"  → コンテナを作り直します")
+
         # コンテナ作成
-        create_url = f'{API_BASE_URL}/{USER_ID}/threads'
-        create_params = {'access_token': ACCESS_TOKEN}
-        create_data = {
-            'media_type': 'TEXT',
-            'text': text
-        }
+        container_id = _create_container(text, reply_to_id, topics, csv_id, part)
+        if not container_id:
+            return None
 
-        # トピックを追加（空でない場合）
-        # Threads APIは1つのトピックのみサポート（topic_tag）
-        if topics and len(topics) > 0:
-            create_data['topic_tag'] = topics[0]  # 最初のトピックのみ使用
+        # 投稿公開
+        return _publish_container(container_id, text, reply_to_id, csv_id, part)
 
-        if reply_to_id:
-            create_data['reply_to_id'] = reply_to_id
-            print(f"  → スレッドコンテナ作成中... (返信先: {reply_to_id})")
-        else:
-            topic_info = f" [トピック: {', '.join(topics)}]" if topics else ""
-            print(f"  → コンテナ作成中...{topic_info}")
+    except threads_api.ContainerStatusError as e:
+        print(f"  ✗ {e}")
+        return None
+    except requests.exceptions.RequestException as e:
+        _print_api_error(e)
+        return None
 
-        create_response = requests.post(create_url, params=create_params, data=create_data)
-        create_response.raise_for_status()
-        container_id = create_response.json().get('id')
 
-        if not container_id:
-            print(f"  ✗ コンテナIDの取得に失敗")
-            return None
+def stage_upcoming(now, ahead_minutes=None):
+    """これから来るタームのコンテナを事前作成（スロット時刻には公開だけで済むように）
 
-        # 投稿公開
-        publish_url = f'{API_BASE_URL}/{USER_ID}/threads_publish'
-        publish_params = {'access_token': ACCESS_TOKEN}
-        publish_data = {'creation_id': container_id}
+    返信（thread_text）は返信先の投稿IDが決まるまで作れないので対象外。
 
-        print(f"  → 投稿公開中...")
-        publish_response = requests.post(publish_url, params=publish_params, data=publish_data)
-        publish_response.raise_for_status()
+    Returns:
+        int: 新たに作成したコンテナ数
+    """
+    until = now + timedelta(minutes=ahead_minutes or STAGE_AHEAD_MINUTES)
+    end = (until.hour, until.minute) if until.date() == now.date() else (23, 59)
+    terms = SCHEDULE.slots_between((now.hour, now.minute), end)
+
+    staged = load_staged()
+    removed = prune_staged(staged, now)
+    if removed:
+        print(f"🧹 期限切れの事前作成コンテナを破棄: {', '.join(removed)}")
+
+    created = 0
+    if terms:
+        plan = plan_publish(resolve_csv_path(), now.date(), terms, max_posts_per_term=MAX_POSTS_PER_RUN)
+        for term in terms:
+            for post in plan.get(term, []):
+                if 'resume_part' in post:
+                    continue
+                fp = row_fingerprint(post)
+                topic = post['topics'][0] if post.get('topics') else None
+                if is_staged(staged, post['csv_id'], fp, topic, now):
+                    continue
+
+                print(f"\n📦 事前作成 [{post['csv_id']}] {term[0]}:{term[1]:02d} のターム")
+                if DRY_RUN:
+                    print(f"  → [ドライラン] コンテナ作成をシミュレート")
+                    continue
+                try:
+                    container_id = _create_container(post['text'], topics=post.get('topics'), csv_id=post['csv_id'])
+                except requests.exceptions.RequestException as e:
+                    _print_api_error(e)
+                    continue
+                if container_id:
+                    add_staged(staged, post['csv_id'], fp, topic, container_id, post['scheduled_at'], now)
+                    created += 1
+
+    if not DRY_RUN:
+        save_staged(staged)
+    return created
+
+
+def publish_thread_chain(post, main_post_id):
+    """返信チェーンを順番に投稿（各パートは1つ前のパートへの返信）
+
+    reply_to_id はコンテナ作成時に必要なので、各パートは前のパートの公開後に作る
+    （固定の待ちは入れず、コンテナが公開可能になった時点で公開する）。
+    途中で失敗したら止め、残りは次の実行で続きから補完する（台帳に済んだパートが残る）。
 
-        post_id = publish_response.json().get('id')
-        if post_id:
-            if reply_to_id:
-                print(f"  ✓ スレッド投稿成功！ (ID: {post_id})")
-            else:
-                print(f"  ✓ 投稿成功！ (ID: {post_id})")
-            return post_id
-        else:
-            print(f"  ✗ 投稿IDの取得に失敗")
+    Returns:
+        int: 投稿したパート数
+    """
+    parts = post['thread_parts']
+    start = post.get('resume_part', 0)
+    reply_to_id = post.get('reply_to_id') or main_post_id
+
+    posted = 0
+    for index in range(start, len(parts)):
+        print(f"  → スレッド投稿を作成中... ({index + 1}/{len(parts)})")
+        reply_id = create_threads_post(parts[index], reply_to_id=reply_to_id,
+                                       csv_id=post['csv_id'], part=thread_part_name(index))
+        if not reply_id:
+            print(f"  ⚠️  スレッド投稿 ({index + 1}/{len(parts)}) に失敗。残りは次の実行で続きから補完")
+            break
+        reply_to_id = reply_id
+        posted += 1
+
+    return posted
+
+
+def find_reply_target(post):
+    """返信チェーンの補完で、公開済みなのにIDの分からない返信先を一覧から探す（見つからなければNone）
+
+    見つかったIDは台帳に記録する（次からは台帳だけで分かる）。
+    """
+    index = post['resume_part']
+    text = post['text'] if index == 0 else post['thread_parts'][index - 1]
+    threads_id = _find_published_id(text, reply=index > 0)
+    if threads_id and not DRY_RUN:
+        part = 'main' if index == 0 else thread_part_name(index - 1)
+        append_event('reconcile', fingerprint=fingerprint(text), threads_id=threads_id, **_ledger_fields(post, part))
+    return threads_id
+
+
+def publish_post(post):
+    """プランの1件を投稿（本編 + thread_text の返信チェーン）
+
+    本編が投稿済み（プランに resume_part あり）の場合は返信チェーンの抜けたパートから補完する。
+
+    Returns:
+        str or None: 本編の投稿ID（失敗時はNone。補完で本編のIDが分からなければ返信先のID）
+    """
+    if 'resume_part' in post:
+        threads_post_id = post['published_id']
+        reply_to_id = post['reply_to_id'] or find_reply_target(post)
+        if not reply_to_id:
+            print(f"  ⚠️  返信先は公開済みだがIDがまだ一覧に出ていないため、スレッド投稿は次の実行で補完")
             return None
+        print(f"  → 本編は投稿済み (ID: {threads_post_id or '不明'})、スレッド投稿のみ補完")
+        publish_thread_chain(dict(post, reply_to_id=reply_to_id), threads_post_id)
+        return threads_post_id or reply_to_id
 
-    except requests.exceptions.RequestException as e:
-        print(f"  ✗ API エラー: {e}")
-        if hasattr(e, 'response') and e.response is not None:
-            try:
-                error_detail = e.response.json()
-                print(f"  ✗ エラー詳細: {json.dumps(error_detail, indent=2, ensure_ascii=False)}")
-            except:
-                print(f"  ✗ レスポンス: {e.response.text[:200]}")
-        return None
+    # 事前作成したコンテナがあれば公開だけで済ませる
+    staged = load_staged()
+    topic = post['topics'][0] if post.get('topics') else None
+    creation_id = take_staged(staged, post['csv_id'], row_fingerprint(post), topic, clock.now())
+    if creation_id and not DRY_RUN:
+        save_staged(staged)
+
+    threads_post_id = create_threads_post(post['text'], topics=post.get('topics'), csv_id=post['csv_id'],
+                                          creation_id=creation_id)
+
+    if threads_post_id and post['thread_parts']:
+        publish_thread_chain(post, threads_post_id)
 
+    return threads_post_id
 
-def get_previous_schedule_time(schedule_time):
-    """1つ前のスケジュール時刻を取得"""
+
+def get_past_schedule_times(schedule_time):
+    """当日の schedule_time より前の全タームを返す（古い順）"""
     if schedule_time is None:
-        return None
+        return []
+    return SCHEDULE.slots_before(schedule_time)
 
-    current_hour, current_minute = schedule_time
-    current_index = None
 
-    # 現在のタームのインデックスを探す
-    for i, (h, m) in enumerate(SCHEDULE_TIMES):
-        if h == current_hour and m == current_minute:
-            current_index = i
-            break
+def story_order(post):
+    """話の順番（csv_id の「作品番号_話数」）。数字でなければCSVの行順"""
+    try:
+        return tuple(int(part) for part in post['csv_id'].split('_'))
+    except ValueError:
+        return (int(post['seq']),)
 
-    # 前のタームを返す（存在する場合）
-    if current_index is not None and current_index > 0:
-        return SCHEDULE_TIMES[current_index - 1]
 
-    return None
+def recover_backlog(csv_path, now, current_schedule_time, plan=None, queue=None):
+    """当日の過去ターム全体から未投稿分を洗い出して補完（cronが何回飛んでも取りこぼさない）
 
+    話の順番 → 予定時刻の順に並べ、投稿間隔（5分）が空いていれば先頭から投稿する。
+    間隔が空いていない・実行の持ち時間を過ぎた分は待ち行列へ積み、次の実行で投稿する。
 
-def check_and_post_previous_term(csv_path, now, current_schedule_time):
-    """前タームがスキップされていたら投稿（5分待機あり）
+    Args:
+        plan: plan_publish の結果（渡されればCSV・APIを再参照しない）
+        queue: DeferredQueue（投稿間隔の管理と持ち越し先）
 
     Returns:
-        bool: 前タームの投稿を実行したかどうか
+        int: 補完として投稿した件数
     """
-    previous_time = get_previous_schedule_time(current_schedule_time)
+    past_times = get_past_schedule_times(current_schedule_time)
+    if not past_times:
+        return 0
 
-    if previous_time is None:
-        return False
+    print(f"\n🔍 未投稿チェック: 当日の過去 {len(past_times)} ターム")
 
-    prev_hour, prev_minute = previous_time
-    print(f"\n🔍 前タームチェック: {prev_hour}:{prev_minute:02d}")
+    if plan is None:
+        plan = plan_publish(csv_path, now.date(), past_times, max_posts_per_term=MAX_POSTS_PER_RUN)
+    if queue is None:
+        queue = DeferredQueue()
+
+    # 持ち越し済みのものは待ち行列側で投稿する
+    backlog = [post for term in past_times for post in plan.get(term, []) if post['csv_id'] not in queue]
+    if not backlog:
+        print(f"✓ 過去タームは全て投稿済み")
+        return 0
 
-    # 前タームの投稿を取得
-    previous_posts = get_posts_to_publish(csv_path, now.date(), previous_time, max_posts=1)
+    backlog.sort(key=lambda p: (story_order(p), p['scheduled_at']))
+    print(f"⚠️  未投稿: {len(backlog)} 件 ({', '.join(p['csv_id'] for p in backlog)})")
 
-    if previous_posts:
-        print(f"⚠️  前タームの投稿が未投稿です: {previous_posts[0]['csv_id']}")
-        print(f"   → 前タームの投稿を先に実行します")
+    posted = 0
+    for post in backlog:
+        if not wait_for_publish_slot(queue.next_allowed_at()):
+            defer_post(queue, post)
+            continue
 
-        # 前タームの投稿を実行
-        post = previous_posts[0]
-        print(f"\n[前ターム補完] ID: {post['csv_id']}")
+        print(f"\n[補完] ID: {post['csv_id']}")
         print(f"予定時刻: {post['scheduled_at'].strftime('%Y-%m-%d %H:%M')}")
         print(f"本文: {post['text'][:100]}...")
         if post.get('topics'):
             print(f"トピック: {', '.join(post['topics'])}")
 
-        # 投稿実行
-        threads_post_id = create_threads_post(post['text'], topics=post.get('topics'))
-
-        if threads_post_id:
-            # スレッド投稿がある場合
-            if post['thread_text']:
-                print(f"  → スレッド投稿を作成中...")
-                time.sleep(2)
-                thread_post_id = create_threads_post(post['thread_text'], reply_to_id=threads_post_id)
-                if not thread_post_id:
-                    print(f"  ⚠️  スレッド投稿に失敗しましたが、メイン投稿は成功")
-
-            print(f"✅ 前タームの投稿完了")
-
-            # 5分待機してから現在タームへ（ドライラン時は短縮）
-            wait_seconds = 1 if DRY_RUN else 300
-            if DRY_RUN:
-                print(f"\n⏳ [ドライラン] 現在タームの投稿まで待機（短縮）...")
-            else:
-                print(f"\n⏳ 現在タームの投稿まで {wait_seconds} 秒（5分）待機...")
-            time.sleep(wait_seconds)
-
-            return True
+        if publish_post(post):
+            queue.mark_published(clock.now())
+            posted += 1
+            print(f"✅ 補完投稿完了")
         else:
-            print(f"❌ 前タームの投稿に失敗")
-            return False
-    else:
-        print(f"✓ 前タームは既に投稿済み")
+            print(f"❌ 補完投稿に失敗")
+
+    return posted
+
+
+_run_deadline = contextvars.ContextVar('threads_run_deadline', default=None)  # 実行の持ち時間の終わり（monotonic）
+
+
+def wait_for_publish_slot(allowed_at):
+    """投稿してよい時刻 allowed_at まで実行内で待つ
+
+    待ちが MAX_INLINE_WAIT_SECONDS を超える・待つと実行の持ち時間を過ぎるなら待たずに False
+    （呼び出し側で待ち行列へ積む）。ドライランでは待たない。
+    """
+    wait_seconds = (allowed_at - clock.now()).total_seconds() if allowed_at is not None else 0
+    deadline = _run_deadline.get()
+    if deadline is not None and clock.monotonic() + max(0, wait_seconds) >= deadline:
+        print(f"  ⌛ この実行の持ち時間（{RUN_TIME_BUDGET_SECONDS}秒）に収まらないため、次の実行へ")
+        return False
+    if wait_seconds <= 0:
+        return True
+    if wait_seconds > MAX_INLINE_WAIT_SECONDS:
         return False
+    if DRY_RUN:
+        print(f"  ⏳ [ドライラン] 投稿間隔の待機（{wait_seconds:.0f}秒）を省略")
+        return True
+    print(f"  ⏳ 投稿間隔（{MIN_PUBLISH_SPACING_SECONDS}秒）を空けるため {allowed_at.strftime('%H:%M:%S')} まで待機")
+    sleep_until(allowed_at)
+    return True
+
+
+def defer_post(queue, post):
+    """投稿間隔の待ちが長すぎる・持ち時間を過ぎたときに待ち行列へ積む（次の実行・常駐ループで投稿）"""
+    due_at = max(queue.next_allowed_at() or clock.now(), clock.now())
+    queue.push({'csv_id': post['csv_id'], 'scheduled_at': post['scheduled_at'].isoformat()}, due_at)
+    print(f"  ⏭  投稿間隔（{MIN_PUBLISH_SPACING_SECONDS}秒）を空けるため {due_at.strftime('%H:%M:%S')} 以降に持ち越し")
+
+
+def carry_over_previous_day(csv_path, now, queue):
+    """前日の未投稿分（最後のタームのcronが飛んだ分など）を待ち行列へ引き継ぐ
+
+    前日に投稿していた場合だけ（止めていた日の分をまとめて流さない）。
+    当日の最初の投稿までの実行で確認し、積んだ分は投稿されるまで待ち行列に残る。
+
+    Returns:
+        int: 待ち行列に積んだ件数
+    """
+    previous_day = now.date() - timedelta(days=1)
+    last = queue.last_published_at
+    if last is None or last.astimezone(JST).date() != previous_day:
+        return 0
+
+    plan = plan_publish(csv_path, previous_day, SCHEDULE_TIMES, max_posts_per_term=MAX_POSTS_PER_RUN)
+    tail = [post for term in SCHEDULE_TIMES for post in plan.get(tuple(term), [])
+            if post['csv_id'] not in queue]
+    if not tail:
+        return 0
+
+    tail.sort(key=lambda p: (story_order(p), p['scheduled_at']))
+    for post in tail:
+        queue.push({'csv_id': post['csv_id'], 'scheduled_at': post['scheduled_at'].isoformat()}, now)
+    print(f"\n📥 前日の未投稿分を持ち越し: {len(tail)} 件 ({', '.join(p['csv_id'] for p in tail)})")
+    return len(tail)
+
+
+def drain_deferred(csv_path, queue):
+    """期限の来た持ち越し投稿を投稿（投稿間隔の短い待ちは実行内で待つ）
 
+    前日以前の予定の分も破棄せず、その日の投稿プランで確認して投稿する。
+    期限が先のもの・持ち時間を過ぎた分は待ち行列に残す。
 
-def main():
-    """メイン処理"""
+    Returns:
+        int: 投稿した件数
+    """
+    posted = 0
+    while True:
+        due_at = queue.next_due_at()
+        if due_at is None or not wait_for_publish_slot(due_at):
+            break
+        item = queue.pop_due(max(due_at, clock.now()))
+        if item is None:
+            break
+
+        # 持ち越しの間に投稿された可能性があるので、投稿プランで再確認
+        scheduled_at = datetime.fromisoformat(item['scheduled_at'])
+        term = (scheduled_at.hour, scheduled_at.minute)
+        plan = plan_publish(csv_path, scheduled_at.date(), [term])
+        post = next((p for p in plan[term] if p['csv_id'] == item['csv_id']), None)
+        if post is None:
+            print(f"\n✓ 持ち越し分 [{item['csv_id']}] は投稿済み")
+            continue
+
+        print(f"\n[持ち越し] ID: {post['csv_id']}")
+        print(f"予定時刻: {post['scheduled_at'].strftime('%Y-%m-%d %H:%M')}")
+        print(f"本文: {post['text'][:100]}...")
+
+        if publish_post(post):
+            queue.mark_published(clock.now())
+            posted += 1
+        else:
+            print(f"❌ 持ち越し分の投稿に失敗")
+
+        # 返信チェーンが途中で止まったら待ち行列に戻す（前日以前の分は当日の補完では拾われない）
+        if post['thread_parts']:
+            rest = plan_publish(csv_path, scheduled_at.date(), [term])
+            if any(p['csv_id'] == item['csv_id'] and 'resume_part' in p for p in rest[term]):
+                queue.push(item, clock.now() + timedelta(seconds=MIN_PUBLISH_SPACING_SECONDS))
+                print(f"  ⏭  返信チェーンの残りは次の実行で補完")
+
+    return posted
+
+
+def save_queue(queue):
+    """待ち行列を保存（ドライラン時は保存しない）"""
+    if not DRY_RUN:
+        queue.save()
+
+
+def main(now=None):
+    """メイン処理
+
+    スケジュール時間外なら .env・requests・索引を読み込む前に終了する。
+    """
     print("=" * 70)
     print("📅 Threads シンプル投稿スケジューラ（スキップ補完機能付き）")
     if DRY_RUN:
@@ -370,7 +910,7 @@ def main():
     print("=" * 70)
 
     # 現在時刻（JST）
-    now = datetime.now(JST)
+    now = now or clock.now()
     print(f"\n現在時刻: {now.strftime('%Y-%m-%d %H:%M:%S %Z')}")
 
     # 該当するスケジュール時刻を取得
@@ -384,20 +924,94 @@ def main():
     schedule_hour, schedule_minute = schedule_time
     print(f"該当スケジュール: {schedule_hour}:{schedule_minute:02d} のターム")
 
-    # 投稿すべき投稿を取得（スパム対策: 最大1件）
+    load_env()
+    run_slot(now, schedule_time)
+
+    # 次のタームのコンテナを作っておく（次の実行は公開だけ）。失敗しても投稿済みの実行は成功で終える
+    try:
+        stage_upcoming(clock.now())
+    except Exception as e:
+        print(f"❌ 事前作成でエラー: {e}")
+
+
+def get_latest_schedule_time(now_hour, now_minute):
+    """その時刻以前で最後のターム（当日まだタームが無ければNone）"""
+    term = SCHEDULE.next_slot(now_hour, now_minute)
+    if term == (now_hour, now_minute):
+        return term
+    return SCHEDULE.previous_slot(now_hour, now_minute)
+
+
+def drain(now=None):
+    """ターム間の実行（cronの15分・45分）: 持ち越し分と当日の過去タームの補完だけを行う
+
+    1回の実行で公開するのは1件までなので、cronが飛んでたまった分はターム間の実行で減らす。
+    対象は直前のタームまで（先のタームを早く投稿することはない）。
+    """
+    print("=" * 70)
+    print("📥 Threads 投稿スケジューラ（持ち越し・補完のみ）")
+    if DRY_RUN:
+        print("   [ドライランモード - 実際には投稿されません]")
+    print("=" * 70)
+
+    now = now or clock.now()
+    print(f"\n現在時刻: {now.strftime('%Y-%m-%d %H:%M:%S %Z')}")
+
+    schedule_time = get_latest_schedule_time(now.hour, now.minute)
+    if schedule_time is None:
+        print("\n✓ 当日のタームはまだありません")
+        return
+    print(f"直前のターム: {schedule_time[0]}:{schedule_time[1]:02d}")
+
+    load_env()
+    run_slot(now, schedule_time)
+
+
+def run_slot(now, schedule_time, queue=None):
+    """1ターム分の投稿処理（持ち越し分 → 過去ターム補完 → 現在ターム）
+
+    投稿間隔（5分）は実行内で待たないので、1回の実行で公開するのは1件まで。
+    残りは待ち行列へ積み、次の実行（ターム間の drain 実行を含む）へ引き継ぐ。
+    実行は RUN_TIME_BUDGET_SECONDS を過ぎたら新しい投稿を始めない（次のcronと重ならないように）。
+    queue を渡さなければ .state/ から読み込み、最後に保存して次の実行へ引き継ぐ。
+    """
+    token = _run_deadline.set(clock.monotonic() + RUN_TIME_BUDGET_SECONDS)
+    try:
+        _run_slot(now, schedule_time, queue)
+    finally:
+        _run_deadline.reset(token)
+
+
+def _run_slot(now, schedule_time, queue):
+    own_queue = queue is None
+    if own_queue:
+        queue = DeferredQueue.load()
+
     csv_path = resolve_csv_path()
     print(f"CSV: {csv_path}")
 
-    # 【新機能】前タームがスキップされていたらカバー
-    posted_previous = check_and_post_previous_term(csv_path, now, schedule_time)
+    # 前日の未投稿分を引き継ぎ、前回から持ち越した投稿を先に処理
+    carry_over_previous_day(csv_path, now, queue)
+    if len(queue):
+        print(f"\n📥 持ち越し: {len(queue)} 件")
+        drain_deferred(csv_path, queue)
+
+    # 当日の過去ターム・現在タームを1回のCSV参照とタイムライン取得でまとめて解決
+    past_times = get_past_schedule_times(schedule_time)
+    plan = plan_publish(csv_path, now.date(), past_times + [schedule_time], max_posts_per_term=MAX_POSTS_PER_RUN)
+
+    # cronがスキップされていた分を補完（話の順番を優先するので現在タームより先）
+    recover_backlog(csv_path, now, schedule_time, plan=plan, queue=queue)
 
     # 現在タームの投稿を取得
-    posts_to_publish = get_posts_to_publish(csv_path, now.date(), schedule_time, max_posts=MAX_POSTS_PER_RUN)
+    posts_to_publish = plan.get(schedule_time, [])
 
     print(f"\n📊 投稿対象: {len(posts_to_publish)} 件")
 
     if not posts_to_publish:
         print("\n✓ 投稿する投稿がありません（全て投稿済み or 該当なし）")
+        if own_queue:
+            save_queue(queue)
         return
 
     # 投稿リストを表示
@@ -414,6 +1028,7 @@ def main():
     # 投稿を実行
     success_count = 0
     fail_count = 0
+    deferred_count = 0
 
     for i, post in enumerate(posts_to_publish, 1):
         print(f"\n[{i}/{len(posts_to_publish)}] ID: {post['csv_id']}")
@@ -422,24 +1037,18 @@ def main():
         if post.get('topics'):
             print(f"トピック: {', '.join(post['topics'])}")
 
-        # メイン投稿
-        threads_post_id = create_threads_post(post['text'], topics=post.get('topics'))
+        # 投稿間隔が空いていなければ待ち行列へ積んで次の実行・常駐ループへ引き継ぐ
+        if not wait_for_publish_slot(queue.next_allowed_at()):
+            defer_post(queue, post)
+            deferred_count += 1
+            continue
 
-        if threads_post_id:
-            # スレッド投稿がある場合
-            if post['thread_text']:
-                print(f"  → スレッド投稿を作成中...")
-                time.sleep(2)
-                thread_post_id = create_threads_post(post['thread_text'], reply_to_id=threads_post_id)
-                if not thread_post_id:
-                    print(f"  ⚠️  スレッド投稿に失敗しましたが、メイン投稿は成功")
+        # メイン投稿（+ スレッド投稿）
+        threads_post_id = publish_post(post)
 
+        if threads_post_id:
             success_count += 1
-
-            # 次の投稿まで待機（最後の投稿以外）
-            if i < len(posts_to_publish):
-                print(f"\n⏳ 次の投稿まで {POST_INTERVAL_SECONDS} 秒待機...")
-                time.sleep(POST_INTERVAL_SECONDS)
+            queue.mark_published(clock.now())
         else:
             fail_count += 1
             print(f"  ✗ 投稿に失敗しました")
@@ -450,68 +1059,298 @@ def main():
     print("=" * 70)
     print(f"成功: {success_count} 件")
     print(f"失敗: {fail_count} 件")
+    if deferred_count:
+        print(f"持ち越し: {deferred_count} 件")
     print("\n✅ 処理完了")
 
+    if own_queue:
+        save_queue(queue)
+
+
+class _AccountOutput:
+    """print の出力をアカウントごとのバッファへ振り分ける（並行実行でログが混ざらないように）
+
+    sys.stdout の代わりに置くので、encoding など write 以外の属性は元のストリームのものを返す。
+    アカウントのバッファへ書いている間は端末ではなく、ファイル記述子も持たない（io.StringIO と同じ）。
+    """
+
+    def __init__(self, stream):
+        self._stream = stream
+
+    def write(self, text):
+        buffer = _log_buffer.get()
+        return (buffer or self._stream).write(text)
+
+    def flush(self):
+        self._stream.flush()
+
+    def isatty(self):
+        return _log_buffer.get() is None and self._stream.isatty()
+
+    def fileno(self):
+        if _log_buffer.get() is not None:
+            raise io.UnsupportedOperation('fileno')
+        return self._stream.fileno()
+
+    def __getattr__(self, name):
+        return getattr(self._stream, name)
+
+
+_log_buffer = contextvars.ContextVar('threads_log_buffer', default=None)
 
-def get_user_posts():
-    """ユーザーの投稿一覧を取得"""
+
+def run_account_slot(account, now, schedule_time, stage=True):
+    """1アカウント分のターム処理（別スレッドで実行、失敗は他のアカウントに波及させない）"""
+    buffer = io.StringIO()
+    _log_buffer.set(buffer)
+    current_account.set(account)
+    started = time.monotonic()
+
+    error = None
     try:
-        url = f'{API_BASE_URL}/{USER_ID}/threads'
-        params = {
-            'fields': 'id,text,timestamp,permalink',
-            'limit': 100,
-            'access_token': ACCESS_TOKEN
-        }
-        response = requests.get(url, params=params)
-        response.raise_for_status()
-        return response.json().get('data', [])
+        run_slot(now, schedule_time)
+        if stage:
+            stage_upcoming(clock.now())
     except Exception as e:
-        print(f"✗ 投稿一覧取得エラー: {e}")
-        return []
+        error = f"{type(e).__name__}: {e}"
+        print(f"❌ エラー: {error}")
+
+    return {
+        'name': account['name'],
+        'error': error,
+        'log': buffer.getvalue(),
+        'elapsed': time.monotonic() - started,
+    }
+
+
+def fanout(now=None, drain_only=False):
+    """複数アカウントの同じタームを並行して処理（accounts.json）
+
+    アカウントごとに認証情報・CSV・HTTPセッション・状態ディレクトリを分け、
+    1つのアカウントの失敗・レート制限が他のアカウントに影響しないようにする。
+    drain_only なら drain と同じく直前のタームまでの持ち越し・補完だけを行う。
+
+    Returns:
+        bool: 全アカウント成功なら True
+    """
+    print("=" * 70)
+    print("📅 Threads 投稿スケジューラ（複数アカウント）")
+    if DRY_RUN:
+        print("   [ドライランモード - 実際には投稿されません]")
+    print("=" * 70)
+
+    now = now or clock.now()
+    print(f"\n現在時刻: {now.strftime('%Y-%m-%d %H:%M:%S %Z')}")
+
+    if drain_only:
+        schedule_time = get_latest_schedule_time(now.hour, now.minute)
+    else:
+        schedule_time = get_current_schedule_time(now.hour, now.minute)
+    if schedule_time is None:
+        print("\n✓ スケジュール時間外です（8:00~23:30の30分間隔）")
+        return True
+    print(f"該当スケジュール: {schedule_time[0]}:{schedule_time[1]:02d} のターム")
 
+    load_env()
+    # concurrent.futures は logging ごと読み込むので、時間外で即終了する実行では読まない
+    from concurrent.futures import ThreadPoolExecutor, as_completed
 
-def get_post_insights(post_id):
-    """投稿のインサイトを取得"""
+    account_list = accounts.load_accounts()
+    print(f"アカウント: {len(account_list)} 件")
+
+    results = []
+    original_stdout = sys.stdout
+    sys.stdout = _AccountOutput(original_stdout)
     try:
-        url = f'{API_BASE_URL}/{post_id}/insights'
-        params = {
-            'metric': 'views,likes,replies,reposts,quotes',
-            'access_token': ACCESS_TOKEN
-        }
-        response = requests.get(url, params=params)
-        response.raise_for_status()
+        workers = max(1, min(MAX_ACCOUNT_WORKERS, len(account_list)))
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = [
+                executor.submit(contextvars.copy_context().run, run_account_slot, account, now, schedule_time,
+                                not drain_only)
+                for account in account_list
+            ]
+            # 終わったアカウントから順にログをまとめて表示
+            for future in as_completed(futures):
+                result = future.result()
+                results.append(result)
+                print("\n" + "-" * 70)
+                print(f"👤 [{result['name']}] ({result['elapsed']:.1f}秒)")
+                print("-" * 70)
+                print(result['log'], end='')
+    finally:
+        sys.stdout = original_stdout
+
+    failed = [r['name'] for r in results if r['error']]
+    print("\n" + "=" * 70)
+    print(f"📊 アカウント別: 成功 {len(results) - len(failed)} 件 / 失敗 {len(failed)} 件")
+    if failed:
+        print(f"失敗: {', '.join(failed)}")
+    print("=" * 70)
+    return not failed
 
-        data = response.json().get('data', [])
-        insights = {}
-        for item in data:
-            metric_name = item.get('name')
-            value = item.get('values', [{}])[0].get('value', 0)
-            insights[metric_name] = value
 
-        return insights
+def get_next_schedule_datetime(now):
+    """now 以降で最初のスケジュール時刻（datetime, (時, 分)）を返す（翌日にまたがる場合あり）"""
+    on_the_minute = now.second == 0 and now.microsecond == 0
+    slot = SCHEDULE.next_slot(now.hour, now.minute, inclusive=on_the_minute)
+    day = now
+    if slot is None:
+        if not len(SCHEDULE):
+            return None, None
+        slot = SCHEDULE.slots[0]
+        day = now + timedelta(days=1)
+    return day.replace(hour=slot[0], minute=slot[1], second=0, microsecond=0), slot
+
+
+def sleep_until(target):
+    """target（JSTのdatetime）までスリープ（長い待機は刻んで時計のずれを吸収、最後は1秒未満で合わせる）"""
+    while True:
+        remaining = (target - clock.now()).total_seconds()
+        if remaining <= 0:
+            return
+        clock.sleep(min(remaining, SERVE_MAX_SLEEP_SECONDS))
+
+
+def serve():
+    """常駐モード: スケジュール時刻ぴったりに投稿処理を実行し続ける
+
+    - 1プロセスで常駐し、HTTP接続（HTTP セッション）を使い回す
+    - 次のスケジュール時刻まで眠り、±15分の判定ではなく正確なタームで実行
+    - CSVが更新されたら次のタームで索引を作り直す（索引側で mtime/ハッシュを確認）
+    """
+    print("=" * 70)
+    print("🕰  Threads 投稿スケジューラ（常駐モード）")
+    if DRY_RUN:
+        print("   [ドライランモード - 実際には投稿されません]")
+    print("=" * 70)
+
+    load_env()
+    csv_path = resolve_csv_path()
+    csv_mtime = os.stat(csv_path).st_mtime_ns
+    print(f"CSV: {csv_path}")
+
+    queue = DeferredQueue.load()
+    staged_for = None
+
+    try:
+        while True:
+            slot_at, schedule_time = get_next_schedule_datetime(clock.now())
+            stage_at = slot_at - timedelta(minutes=STAGE_AHEAD_MINUTES)
+
+            # 持ち越し投稿の期限が先に来るならそちらで起きる
+            due_at = queue.next_due_at()
+            if due_at is not None and due_at < slot_at and (staged_for == slot_at or due_at <= stage_at):
+                print(f"\n💤 持ち越し投稿 {due_at.strftime('%H:%M:%S')} まで待機...")
+                sleep_until(due_at)
+                try:
+                    drain_deferred(resolve_csv_path(), queue)
+                except Exception as e:
+                    print(f"❌ 持ち越し処理でエラー: {e}")
+                save_queue(queue)
+                continue
+
+            # スロットの少し前にコンテナを事前作成
+            if staged_for != slot_at:
+                sleep_until(stage_at)
+                try:
+                    stage_upcoming(clock.now())
+                except Exception as e:
+                    print(f"❌ 事前作成でエラー: {e}")
+                staged_for = slot_at
+                continue
+
+            print(f"\n💤 次のターム {slot_at.strftime('%Y-%m-%d %H:%M')} まで待機...")
+            sleep_until(slot_at)
+
+            now = clock.now()
+            lateness = (now - slot_at).total_seconds()
+            print("\n" + "=" * 70)
+            print(f"⏰ {schedule_time[0]}:{schedule_time[1]:02d} のターム（遅れ {lateness:.2f} 秒）")
+            print("=" * 70)
+
+            # CSVの更新を検知（索引は参照時に自動で再構築される）
+            csv_path = resolve_csv_path()
+            mtime = os.stat(csv_path).st_mtime_ns
+            if mtime != csv_mtime:
+                print(f"🔄 CSVの更新を検知しました: {csv_path}")
+                csv_mtime = mtime
+
+            try:
+                run_slot(now, schedule_time, queue)
+            except Exception as e:
+                # 1ターム失敗しても常駐は続ける
+                print(f"❌ ターム処理でエラー: {e}")
+            save_queue(queue)
+    except KeyboardInterrupt:
+        print("\n👋 常駐モードを終了します")
+
+
+def get_user_posts(since=None):
+    """ユーザーの投稿一覧を取得（timeline_store で同期した全履歴、新しい順。失敗時は None）
+
+    Args:
+        since: この時刻以降の投稿だけ
+    """
+    try:
+        timeline_store.sync('threads', current_user_id(), current_access_token())
+        return timeline_store.recent('threads', since=since)
     except Exception as e:
-        return {'views': 0, 'likes': 0, 'replies': 0, 'reposts': 0, 'quotes': 0}
+        print(f"✗ 投稿一覧取得エラー: {e}")
+        return None
+
+
+INSIGHT_METRICS = ('views', 'likes', 'replies', 'reposts', 'quotes')
+REPORT_METRICS = ('views', 'likes')  # 毎朝のレポートで使う指標
+
+
+def get_posts_insights(post_ids):
+    """複数の投稿のインサイトをまとめて取得
+
+    graph_batch でバッチにまとめる（使えなければ1件ずつを並行に送る）。
+    失敗した投稿があっても、取れた分は返す。
+
+    Returns:
+        dict: 投稿ID → {指標名: 値}（取得できなかった投稿は None。指標が欠けていればその指標は入らない）
+    """
+    params = {
+        'metric': ','.join(INSIGHT_METRICS),
+        'access_token': current_access_token()
+    }
+    responses = graph_batch.get_many([(f'{post_id}/insights', params) for post_id in post_ids],
+                                     current_access_token())
+
+    results = {}
+    for post_id, response in zip(post_ids, responses):
+        try:
+            if isinstance(response, Exception):
+                raise response
+            response.raise_for_status()
+            results[post_id] = {item.get('name'): item.get('values', [{}])[0].get('value', 0)
+                                for item in response.json().get('data', [])}
+        except Exception as e:
+            print(f"  ✗ インサイト取得エラー（{post_id}）: {e}")
+            results[post_id] = None
+    return results
 
 
 def get_followers_count():
-    """フォロワー数を取得"""
+    """フォロワー数を取得（失敗時は None）"""
     try:
-        url = f'{API_BASE_URL}/{USER_ID}/threads_insights'
         params = {
             'metric': 'followers_count',
-            'access_token': ACCESS_TOKEN
+            'access_token': current_access_token()
         }
-        response = requests.get(url, params=params)
+        response = response_cache.cached_get('followers', f'{current_user_id()}/threads_insights', params)
         response.raise_for_status()
 
         data = response.json().get('data', [])
         for item in data:
             if item.get('name') == 'followers_count':
                 return item.get('values', [{}])[0].get('value', 0)
-        return 0
+        return None
     except Exception as e:
         print(f"✗ フォロワー数取得エラー: {e}")
-        return 0
+        return None
 
 
 def generate_daily_report():
@@ -520,9 +1359,11 @@ def generate_daily_report():
     print("📊 Daily Report Generator")
     print("=" * 70)
 
+    load_env()
+
     # 運用開始日
     start_date = datetime(2025, 10, 29, tzinfo=JST)
-    today = datetime.now(JST)
+    today = clock.now()
     days_running = (today - start_date).days
 
     print(f"\n運用開始日: {start_date.strftime('%Y-%m-%d')}")
@@ -535,8 +1376,18 @@ def generate_daily_report():
 
     print(f"\n昨日の範囲: {yesterday_start.strftime('%Y-%m-%d %H:%M')} - {yesterday_end.strftime('%Y-%m-%d %H:%M')}")
 
+    # フォロワー数は投稿一覧・インサイトの取得と並行に取る
+    from concurrent.futures import ThreadPoolExecutor
+
+    followers_pool = ThreadPoolExecutor(max_workers=1)
+    followers_future = followers_pool.submit(contextvars.copy_context().run, get_followers_count)
+
     # 投稿一覧を取得
-    posts = get_user_posts()
+    posts = get_user_posts(since=yesterday_start)
+    if posts is None:
+        followers_pool.shutdown()
+        print("\n✗ 投稿一覧を取得できないため、レポートを中止します")
+        return
 
     # 昨日の投稿を抽出
     yesterday_posts = []
@@ -556,26 +1407,37 @@ def generate_daily_report():
 
     print(f"昨日の投稿数: {len(yesterday_posts)}件")
 
-    # インサイト集計
-    total_views = 0
-    total_likes = 0
-
-    for post in yesterday_posts:
-        post_id = post.get('id')
-        insights = get_post_insights(post_id)
-        total_views += insights.get('views', 0)
-        total_likes += insights.get('likes', 0)
+    # インサイト集計（取れなかった投稿・指標は0として数えず、集計外として報告する）
+    # 取り直しの期限が来た投稿だけAPIで取り、残りは insights_store の記録を使う
+    all_insights, fetched_count = insights_store.refresh(yesterday_posts, get_posts_insights)
+    print(f"インサイト: {fetched_count}件をAPIで取得（残り{len(all_insights) - fetched_count}件は記録済みの値）")
+    measured = {}
+    missing = {}
+    for post_id, insights in all_insights.items():
+        lacking = [m for m in REPORT_METRICS if insights is None or m not in insights]
+        if lacking:
+            missing[post_id] = lacking
+        else:
+            measured[post_id] = insights
 
-    avg_likes = total_likes / len(yesterday_posts) if yesterday_posts else 0
+    total_views = sum(insights['views'] for insights in measured.values())
+    total_likes = sum(insights['likes'] for insights in measured.values())
+    avg_likes = total_likes / len(measured) if measured else 0
 
     # フォロワー数
-    followers_count = get_followers_count()
+    followers_count = followers_future.result()
+    followers_pool.shutdown()
+    followers_text = f"{followers_count}人" if followers_count is not None else "取得できず"
 
     print(f"\n📊 集計結果:")
-    print(f"  投稿数: {len(yesterday_posts)}投稿")
+    print(f"  投稿数: {len(yesterday_posts)}投稿（集計できたのは{len(measured)}投稿）")
     print(f"  いいね: {total_likes}件（平均{avg_likes:.1f}）")
     print(f"  インプレッション: {total_views:,}回")
-    print(f"  フォロワー: {followers_count}人")
+    print(f"  フォロワー: {followers_text}")
+    if missing:
+        print(f"\n⚠️  インサイトが欠けている投稿: {len(missing)}件（集計から除外）")
+        for post_id, lacking in missing.items():
+            print(f"  - {post_id}: {', '.join(lacking)}")
 
     # モチベーションメッセージ
     motivation_messages = [
@@ -594,9 +1456,11 @@ def generate_daily_report():
 【投稿数】{len(yesterday_posts)}投稿
 【いいね】{total_likes}件（平均{avg_likes:.1f}）
 【インプレッション】{total_views:,}回
-【フォロワー】{followers_count}人
+【フォロワー】{followers_text}
 
 {motivation}"""
+    if missing:
+        report_text += f"\n\n※{len(missing)}投稿はデータを取得できず集計外"
 
     print(f"\n📝 レポート本文:")
     print(report_text)
@@ -618,5 +1482,23 @@ if __name__ == '__main__':
     # コマンドライン引数チェック
     if len(sys.argv) > 1 and sys.argv[1] == 'daily-report':
         generate_daily_report()
+    elif len(sys.argv) > 1 and sys.argv[1] == 'fanout':
+        if not fanout(drain_only='drain' in sys.argv[2:]):
+            sys.exit(1)
+    elif len(sys.argv) > 1 and sys.argv[1] == 'drain':
+        drain()
+    elif len(sys.argv) > 1 and sys.argv[1] == 'serve':
+        serve()
+    elif len(sys.argv) > 1 and sys.argv[1] == 'compile-day':
+        # 引数なしなら翌日分
+        if len(sys.argv) > 2 and not sys.argv[2].startswith('--'):
+            target_date = datetime.strptime(sys.argv[2], '%Y-%m-%d').date()
+        else:
+            target_date = (clock.now() + timedelta(days=1)).date()
+        compile_day(target_date)
+    elif len(sys.argv) > 1 and sys.argv[1] == 'stage':
+        load_env()
+        created = stage_upcoming(clock.now())
+        print(f"\n✅ 事前作成: {created} 件")
     else:
         main()
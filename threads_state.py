@@ -0,0 +1,32 @@
+#!/usr/bin/env python3
+"""
+ローカル状態ファイルの置き場所
+
+索引などの派生ファイルはリポジトリ直下の .state/ にまとめる（gitignore済み）。
+THREADS_STATE_DIR で場所を変更可能。GitHub Actions では actions/cache で復元する。
+
+複数アカウントを1プロセスで回すときは、実行中のアカウント（current_account）ごとに
+.state/accounts/<name>/ へ分ける（台帳・待ち行列・事前作成コンテナが混ざらない）。
+"""
+
+import contextvars
+import os
+from pathlib import Path
+
+# 実行中のアカウント（accounts.load_accounts の1要素。None なら .env の単一アカウント）
+current_account = contextvars.ContextVar('threads_account', default=None)
+
+
+def state_dir() -> Path:
+    """状態ディレクトリを返す（無ければ作成）"""
+    path = Path(os.getenv('THREADS_STATE_DIR') or '.state')
+    account = current_account.get()
+    if account is not None:
+        path = path / 'accounts' / account['name']
+    path.mkdir(parents=True, exist_ok=True)
+    return path
+
+
+def state_path(name: str) -> Path:
+    """状態ディレクトリ配下のファイルパスを返す"""
+    return state_dir() / name
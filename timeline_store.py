@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+"""
+自分の投稿・返信の一覧のローカル同期（.state/timeline.sqlite）
+
+投稿一覧のAPIは新しい順にページで返る（paging.next / cursors.after）。
+sync は先頭から読み、手元に既にある投稿に当たったところで止める。
+新しい投稿が無ければ先頭ページ1回（ETag が一致すれば 304）で終わる。
+
+- 初回（手元が空）は paging.next を最後まで辿って全履歴を保存する。
+  途中で失敗したら続きのカーソルを覚えておき、次回の sync で続きから取る
+- 2回目以降の新着分は、既知の投稿に当たるまで読み切ってからまとめて保存する
+  （途中で失敗しても、新着と既知の間に穴が空かない）
+- 削除した投稿は forget で外す
+
+使い方:
+- python3 timeline_store.py    保存済みの件数と最新・最古の投稿時刻を表示
+"""
+
+import sqlite3
+from datetime import timezone
+
+import threads_api
+import response_cache
+from insights_store import parse_graph_time
+from threads_state import state_path
+
+STORE_FILE = 'timeline.sqlite'
+KINDS = ('threads', 'replies')
+FIELDS = 'id,text,timestamp,permalink'
+INCREMENTAL_PAGE_SIZE = 25  # 新着の確認（普段は1ページで終わる）
+BACKFILL_PAGE_SIZE = 100  # 全履歴の取得（APIの上限）
+
+
+def open_store():
+    """ストアへの接続を返す（無ければ作成）"""
+    conn = sqlite3.connect(state_path(STORE_FILE), timeout=30)
+    conn.executescript("""
+        CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+        CREATE TABLE IF NOT EXISTS posts (
+            kind TEXT NOT NULL,
+            id TEXT NOT NULL,
+            text TEXT,
+            timestamp TEXT NOT NULL,
+            published_utc TEXT NOT NULL,
+            permalink TEXT,
+            PRIMARY KEY (kind, id)
+        );
+        CREATE INDEX IF NOT EXISTS idx_posts_time ON posts (kind, published_utc);
+    """)
+    return conn
+
+
+def _meta(conn, key):
+    row = conn.execute('SELECT value FROM meta WHERE key = ?', (key,)).fetchone()
+    return row[0] if row else None
+
+
+def _set_meta(conn, key, value):
+    if value is None:
+        conn.execute('DELETE FROM meta WHERE key = ?', (key,))
+    else:
+        conn.execute('INSERT OR REPLACE INTO meta VALUES (?, ?)', (key, value))
+
+
+def _insert(conn, kind, posts):
+    conn.executemany('INSERT OR IGNORE INTO posts VALUES (?, ?, ?, ?, ?, ?)', [
+        (kind, p['id'], p.get('text'), p['timestamp'],
+         parse_graph_time(p['timestamp']).astimezone(timezone.utc).isoformat(), p.get('permalink'))
+        for p in posts
+    ])
+
+
+def _unknown(conn, kind, page):
+    """ページのうち手元に無い投稿（ページの順のまま）"""
+    ids = [p['id'] for p in page]
+    if not ids:
+        return []
+    known = {row[0] for row in conn.execute(
+        f"SELECT id FROM posts WHERE kind = ? AND id IN ({', '.join('?' * len(ids))})", (kind, *ids))}
+    return [p for p in page if p['id'] not in known]
+
+
+def _fetch_page(path, params, after=None):
+    """1ページ取得して (投稿のリスト, 次ページのカーソル or None) を返す"""
+    if after is None:
+        # 先頭ページは応答キャッシュ経由（新着が無ければ 304 で本文を取らない）
+        response = response_cache.cached_get('timeline', path, params)
+    else:
+        response = threads_api.get(path, params=dict(params, after=after))
+    response.raise_for_status()
+    data = response.json()
+    paging = data.get('paging') or {}
+    cursor = (paging.get('cursors') or {}).get('after') if paging.get('next') else None
+    page = [p for p in data.get('data', []) if p.get('id') and p.get('timestamp')]
+    return page, cursor
+
+
+def _backfill(conn, kind, path, params, after):
+    """カーソル after から最後のページまで辿って保存（ページごとに続きのカーソルを記録）"""
+    added = 0
+    while True:
+        page, cursor = _fetch_page(path, params, after)
+        _insert(conn, kind, page)
+        added += len(page)
+        _set_meta(conn, f'{kind}:backfill_after', cursor)
+        if cursor is None:
+            _set_meta(conn, f'{kind}:complete', '1')
+        conn.commit()
+        if cursor is None:
+            return added
+        after = cursor
+
+
+def sync(kind, user_id, access_token):
+    """一覧を手元と同期し、新しく保存した件数を返す
+
+    Raises:
+        requests.exceptions.RequestException: APIの取得に失敗（取れたところまでは保存される）
+    """
+    path = f'{user_id}/{kind}'
+    conn = open_store()
+    try:
+        empty = conn.execute('SELECT 1 FROM posts WHERE kind = ? LIMIT 1', (kind,)).fetchone() is None
+        if empty and not _meta(conn, f'{kind}:complete'):
+            params = {'fields': FIELDS, 'limit': BACKFILL_PAGE_SIZE, 'access_token': access_token}
+            return _backfill(conn, kind, path, params, None)
+
+        # 新着: 既知の投稿に当たるまで読んでからまとめて保存
+        params = {'fields': FIELDS, 'limit': INCREMENTAL_PAGE_SIZE, 'access_token': access_token}
+        pending = []
+        after = None
+        while True:
+            page, cursor = _fetch_page(path, params, after)
+            fresh = _unknown(conn, kind, page)
+            pending.extend(fresh)
+            if len(fresh) < len(page) or cursor is None:
+                break
+            after = cursor
+        _insert(conn, kind, pending)
+        conn.commit()
+
+        # 初回の全履歴取得が途中で止まっていれば続きから
+        after = _meta(conn, f'{kind}:backfill_after')
+        if after and not _meta(conn, f'{kind}:complete'):
+            params = dict(params, limit=BACKFILL_PAGE_SIZE)
+            return len(pending) + _backfill(conn, kind, path, params, after)
+        return len(pending)
+    finally:
+        conn.close()
+
+
+def recent(kind, limit=None, since=None):
+    """保存済みの投稿（新しい順、Graph API の一覧と同じ形の dict）
+
+    Args:
+        limit: 最大件数（None なら全件）
+        since: この時刻以降の投稿だけ（datetime）
+    """
+    query = 'SELECT id, text, timestamp, permalink FROM posts WHERE kind = ?'
+    args = [kind]
+    if since is not None:
+        query += ' AND published_utc >= ?'
+        args.append(since.astimezone(timezone.utc).isoformat())
+    query += ' ORDER BY published_utc DESC, id DESC'
+    if limit is not None:
+        query += ' LIMIT ?'
+        args.append(limit)
+    conn = open_store()
+    try:
+        return [{'id': i, 'text': text, 'timestamp': ts, 'permalink': link}
+                for i, text, ts, link in conn.execute(query, args)]
+    finally:
+        conn.close()
+
+
+def forget(post_ids, kind='threads'):
+    """削除した投稿を外す"""
+    conn = open_store()
+    try:
+        conn.executemany('DELETE FROM posts WHERE kind = ? AND id = ?', [(kind, i) for i in post_ids])
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def main():
+    conn = open_store()
+    for kind in KINDS:
+        count, oldest, newest = conn.execute(
+            'SELECT COUNT(*), MIN(published_utc), MAX(published_utc) FROM posts WHERE kind = ?', (kind,)).fetchone()
+        state = '全履歴取得済み' if _meta(conn, f'{kind}:complete') else '全履歴は未取得'
+        print(f"{kind:<8} {count:>6} 件  {oldest or '-'} 〜 {newest or '-'}（{state}）")
+
+
+if __name__ == '__main__':
+    main()
@@ -8,16 +8,17 @@ Threads プロフィール更新スクリプト
 3. python3 update_profile.py で実行
 """
 
-import requests
 import os
 import sys
 from dotenv import load_dotenv
 
+import response_cache
+import threads_api
+
 # 環境変数読み込み
 load_dotenv(override=True)
 
 # Threads API設定
-API_BASE_URL = 'https://graph.threads.net/v1.0'
 ACCESS_TOKEN = os.getenv('THREADS_ACCESS_TOKEN')
 USER_ID = os.getenv('THREADS_USER_ID')
 
@@ -36,12 +37,11 @@ PROFILE_BIO = """あの頃の教室の匂い
 def get_current_profile():
     """現在のプロフィール情報を取得"""
     try:
-        url = f'{API_BASE_URL}/{USER_ID}'
         params = {
             'fields': 'id,username,name,threads_profile_picture_url,threads_biography',
             'access_token': ACCESS_TOKEN
         }
-        response = requests.get(url, params=params)
+        response = response_cache.cached_get('profile', USER_ID, params)
         response.raise_for_status()
         return response.json()
     except Exception as e:
@@ -64,13 +64,13 @@ def update_profile(bio):
         return True
 
     try:
-        url = f'{API_BASE_URL}/{USER_ID}'
         params = {'access_token': ACCESS_TOKEN}
         data = {'biography': bio}
 
-        response = requests.post(url, params=params, data=data)
+        response = threads_api.post(USER_ID, params=params, data=data)
         response.raise_for_status()
 
+        response_cache.invalidate('profile')
         print("✓ プロフィール更新成功！")
         return True
 